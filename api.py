@@ -0,0 +1,422 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import json
+import sys
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+
+from flask import Blueprint, current_app, request
+from sqlalchemy.exc import IntegrityError
+
+from catalog import artist_tags, reindex, venue_tags
+from counters import refresh as refresh_counters
+from exporter import with_genres
+from extensions import cache, csrf
+from importer import ARTIST_FIELDS, SHOW_FIELDS, VENUE_FIELDS, RowError, clean, clean_genres
+from models import db, Artist, ArtistGenre, Venue, VenueGenre, Show
+from pagination import keyset_page
+from scheduling import Booking, describe, find_conflicts, is_exclusion_violation
+
+#----------------------------------------------------------------------------#
+# JSON API (v1)
+#----------------------------------------------------------------------------#
+# Venues, artists and shows for the mobile app and partner integrations:
+#
+#   GET   /api/v1/<kind>?fields=id,name&limit=100&after=<cursor>&since=<iso time>
+#   GET   /api/v1/<kind>?ids=3,1,2                 many records in one request
+#   GET   /api/v1/<kind>/<id>
+#   POST  /api/v1/<kind>   {"data": [{...}, ...]}  create records
+#   PATCH /api/v1/<kind>   {"data": [{"id": 3, ...}, ...]}  update the given fields
+#
+# Reads select only the requested columns and page by id (pagination.py), so
+# any page costs one indexed range scan plus one genre query; records are
+# encoded straight from the row tuples, never through ORM instances. Writes
+# are validated with the importer's cleaners and applied in one transaction:
+# every record is written or none, and the errors name the records' indexes.
+# The blueprint is exempt from CSRF: it only accepts JSON bodies, which
+# cannot be sent cross-site without CORS.
+
+bp = Blueprint("api", __name__, url_prefix="/api/v1")
+csrf.exempt(bp)
+
+# kind -> model, genre model and fk (or None), readable fields, writable fields
+_Resource = namedtuple("Resource", "model genres fields writable")
+
+_RESOURCES = {
+    "venues": _Resource(
+        Venue,
+        (VenueGenre, VenueGenre.venue_id),
+        [
+            "id", "name", "city", "state", "address", "phone", "genres", "image_link",
+            "facebook_link", "website", "seeking_talent", "seeking_description",
+            "upcoming_shows_count", "updated_at",
+        ],
+        VENUE_FIELDS,
+    ),
+    "artists": _Resource(
+        Artist,
+        (ArtistGenre, ArtistGenre.artist_id),
+        [
+            "id", "name", "city", "state", "phone", "genres", "image_link", "facebook_link",
+            "website", "seeking_venue", "seeking_description", "upcoming_shows_count",
+            "updated_at",
+        ],
+        ARTIST_FIELDS,
+    ),
+    "shows": _Resource(
+        Show,
+        None,
+        ["id", "venue_id", "artist_id", "start_time", "duration_minutes", "updated_at"],
+        SHOW_FIELDS,
+    ),
+}
+
+_KIND = "<any(venues, artists, shows):kind>"
+
+
+class _ApiError(Exception):
+    """ Ends an API request with `status` and a JSON error body. """
+
+    def __init__(self, status, message, **details):
+        super(_ApiError, self).__init__(message)
+        self.status = status
+        self.details = details
+
+
+@lru_cache(maxsize=None)
+def _encoder():
+    # orjson, when installed, encodes several times faster
+    try:
+        import orjson
+    except ImportError:
+        return json.JSONEncoder(
+            ensure_ascii=False, check_circular=False, separators=(",", ":")
+        ).encode
+    return orjson.dumps
+
+
+def _response(body, status=200):
+    return current_app.response_class(_encoder()(body), status=status, mimetype="application/json")
+
+
+@bp.errorhandler(_ApiError)
+def _api_error(error):
+    return _response(dict({"error": str(error)}, **error.details), error.status)
+
+#  Encoding
+#  ----------------------------------------------------------------
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def _fields(resource):
+    """ The requested fields (?fields=name,city), id first; all by default. """
+    names = [name.strip() for name in request.args.get("fields", "").split(",") if name.strip()]
+    if not names:
+        return resource.fields
+    unknown = [name for name in names if name not in resource.fields]
+    if unknown:
+        raise _ApiError(400, "unknown fields: {}".format(", ".join(unknown)))
+    return ["id"] + [name for name in dict.fromkeys(names) if name != "id"]
+
+
+def _query(resource, fields):
+    model = resource.model
+    return db.session.query(*[getattr(model, field) for field in fields if field != "genres"])
+
+
+def _records(resource, fields, rows):
+    """ Dicts of `fields` for `rows` (tuples of the non-genre fields, in order). """
+    rows = with_genres(rows, resource.genres if "genres" in fields else None, fields)
+    converters = [
+        position
+        for position, field in enumerate(fields)
+        if field != "genres" and isinstance(getattr(resource.model, field).type, db.DateTime)
+    ]
+    records = []
+    for row in rows:
+        values = list(row)
+        for position in converters:
+            values[position] = _isoformat(values[position])
+        records.append(dict(zip(fields, values)))
+    return records
+
+
+def _by_ids(resource, fields, ids):
+    model = resource.model
+    rows = _query(resource, fields).filter(model.id.in_(ids)).all() if ids else []
+    return {record["id"]: record for record in _records(resource, fields, rows)}
+
+#  Reads
+#  ----------------------------------------------------------------
+
+def _int_list(value, name):
+    try:
+        return [int(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise _ApiError(400, "{} must be comma separated integers".format(name))
+
+
+@bp.route("/" + _KIND)
+@db.replica_reads
+def list_records(kind):
+    resource = _RESOURCES[kind]
+    model = resource.model
+    fields = _fields(resource)
+    if "ids" in request.args:
+        ids = list(dict.fromkeys(_int_list(request.args["ids"], "ids")))
+        if len(ids) > current_app.config["API_MAX_BATCH_SIZE"]:
+            raise _ApiError(
+                400, "at most {} ids per request".format(current_app.config["API_MAX_BATCH_SIZE"])
+            )
+        found = _by_ids(resource, fields, ids)
+        return _response({
+            "data": [found[record_id] for record_id in ids if record_id in found],
+            "missing": [record_id for record_id in ids if record_id not in found],
+        })
+
+    try:
+        limit = int(request.args.get("limit") or current_app.config["API_PAGE_SIZE"])
+    except ValueError:
+        raise _ApiError(400, "limit must be an integer")
+    limit = min(max(limit, 1), current_app.config["API_MAX_PAGE_SIZE"])
+    query = _query(resource, fields)
+    if request.args.get("since"):
+        try:
+            query = query.filter(model.updated_at >= datetime.fromisoformat(request.args["since"]))
+        except ValueError:
+            raise _ApiError(400, "since must be an ISO 8601 date or time")
+    try:
+        page = keyset_page(
+            query,
+            [model.id],
+            lambda row: (row.id,),
+            limit,
+            after=request.args.get("after"),
+            before=request.args.get("before"),
+        )
+    except ValueError as e:
+        raise _ApiError(400, str(e))
+    return _response({
+        "data": _records(resource, fields, page.items),
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+    })
+
+
+@bp.route("/" + _KIND + "/<int:record_id>")
+@db.replica_reads
+def get_record(kind, record_id):
+    resource = _RESOURCES[kind]
+    found = _by_ids(resource, _fields(resource), [record_id])
+    if record_id not in found:
+        raise _ApiError(404, "no {} with id {}".format(kind[:-1], record_id))
+    return _response({"data": found[record_id]})
+
+#  Writes
+#  ----------------------------------------------------------------
+
+def _items():
+    """ The request's records: {"data": [...]} or a bare list of objects. """
+    if not request.is_json:
+        raise _ApiError(415, "send the records as application/json")
+    payload = request.get_json(silent=True)
+    items = payload.get("data") if isinstance(payload, dict) else payload
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise _ApiError(400, 'expected {"data": [objects]}')
+    if not items:
+        raise _ApiError(400, "no records")
+    if len(items) > current_app.config["API_MAX_BATCH_SIZE"]:
+        raise _ApiError(
+            400, "at most {} records per request".format(current_app.config["API_MAX_BATCH_SIZE"])
+        )
+    return items
+
+
+def _count(errors, items, problem):
+    return "{} of {} records {}".format(len(errors), len(items), problem)
+
+
+def _clean(resource, items, partial):
+    """ [(fields, genres or None)] for `items`; with `partial` only the fields
+    present are cleaned. Raises _ApiError listing every invalid record. """
+    cleaned, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            unknown = [name for name in item if name not in resource.fields]
+            if unknown:
+                raise RowError("unknown fields: {}".format(", ".join(unknown)))
+            only = [name for name in resource.writable if name in item] if partial else None
+            fields, genres = clean(resource.writable, item, only), None
+            if resource.genres is not None and (not partial or "genres" in item):
+                genres = clean_genres(item)
+            cleaned.append((fields, genres))
+        except RowError as e:
+            errors.append({"index": index, "error": str(e)})
+    if errors:
+        raise _ApiError(400, _count(errors, items, "are invalid"), errors=errors)
+    return cleaned
+
+
+def _ids(items):
+    ids, errors = [], []
+    for index, item in enumerate(items):
+        record_id = item.get("id")
+        if not isinstance(record_id, int) or isinstance(record_id, bool):
+            errors.append({"index": index, "error": "id must be an integer"})
+        ids.append(record_id)
+    if not errors and len(set(ids)) < len(ids):
+        errors.append({"index": None, "error": "duplicate ids"})
+    if errors:
+        raise _ApiError(400, _count(errors, items, "are invalid"), errors=errors)
+    return ids
+
+
+def _check_shows(bookings, exclude_ids=()):
+    """ The bookings' venues and artists exist and no booking overlaps
+    another (scheduling.py); raises _ApiError otherwise. """
+    venue_ids = {booking.venue_id for booking in bookings}
+    artist_ids = {booking.artist_id for booking in bookings}
+    venue_ids -= {id for (id,) in db.session.query(Venue.id).filter(Venue.id.in_(venue_ids))}
+    artist_ids -= {id for (id,) in db.session.query(Artist.id).filter(Artist.id.in_(artist_ids))}
+    errors = [
+        {
+            "index": index,
+            "error": "unknown {}".format("venue" if booking.venue_id in venue_ids else "artist"),
+        }
+        for index, booking in enumerate(bookings)
+        if booking.venue_id in venue_ids or booking.artist_id in artist_ids
+    ]
+    if errors:
+        raise _ApiError(
+            404, _count(errors, bookings, "name unknown venues or artists"), errors=errors
+        )
+    try:
+        conflicts = find_conflicts(bookings, exclude_ids=exclude_ids)
+    except ValueError as e:
+        raise _ApiError(400, str(e))
+    if conflicts:
+        raise _ApiError(
+            409,
+            "{} of {} shows overlap other bookings".format(len(conflicts), len(bookings)),
+            conflicts=[
+                {"index": index, "overlaps": describe(found)}
+                for index, found in sorted(conflicts.items())
+            ],
+        )
+
+
+def _shows_written(shows, before=()):
+    """ Refresh the counters of the venues and artists of `shows` (and of the
+    (venue_id, artist_id) pairs in `before`); returns the cache tags. """
+    pairs = {(show.venue_id, show.artist_id) for show in shows} | set(before)
+    venue_ids = sorted({venue_id for venue_id, _ in pairs})
+    artist_ids = sorted({artist_id for _, artist_id in pairs})
+    db.session.flush()
+    refresh_counters(Venue, ids=venue_ids)
+    refresh_counters(Artist, ids=artist_ids)
+    return (
+        ["shows", "venues"]
+        + ["venue:{}".format(venue_id) for venue_id in venue_ids]
+        + ["artist:{}".format(artist_id) for artist_id in artist_ids]
+    )
+
+
+def _write(kind, apply):
+    """ Run `apply(resource, items)` in one transaction; it returns (records,
+    cache tags). Returns the stored records, encoded with every field. """
+    resource = _RESOURCES[kind]
+    items = _items()
+    try:
+        instances, tags = apply(resource, items)
+        db.session.commit()
+        if resource.genres is not None:
+            for instance in instances:
+                reindex(instance)
+        cache.invalidate(*tags)
+        ids = [instance.id for instance in instances]
+        found = _by_ids(resource, resource.fields, ids)
+        return [found[record_id] for record_id in ids]
+    except _ApiError:
+        db.session.rollback()
+        raise
+    except IntegrityError as e:
+        db.session.rollback()
+        print(sys.exc_info())
+        if is_exclusion_violation(e):
+            raise _ApiError(409, "a show overlaps a booking made meanwhile")
+        raise _ApiError(409, "the records conflict with stored ones")
+    except Exception:
+        db.session.rollback()
+        print(sys.exc_info())
+        raise _ApiError(500, "the {} could not be saved".format(kind))
+    finally:
+        db.session.close()
+
+
+def _create(resource, items):
+    cleaned = _clean(resource, items, partial=False)
+    if resource.model is Show:
+        _check_shows([Booking(None, **fields) for fields, _ in cleaned])
+    instances = []
+    for fields, genres in cleaned:
+        instance = resource.model(**fields)
+        if genres is not None:
+            instance.genres = genres
+        instances.append(instance)
+    db.session.add_all(instances)
+    if resource.model is Show:
+        return instances, _shows_written(instances)
+    db.session.flush()
+    return instances, [resource.model.__tablename__]
+
+
+def _update(resource, items):
+    model = resource.model
+    ids = _ids(items)
+    cleaned = _clean(resource, items, partial=True)
+    stored = {instance.id: instance for instance in model.query.filter(model.id.in_(ids))}
+    errors = [
+        {"index": index, "error": "no {} with id {}".format(model.__tablename__[:-1], record_id)}
+        for index, record_id in enumerate(ids)
+        if record_id not in stored
+    ]
+    if errors:
+        raise _ApiError(404, _count(errors, items, "do not exist"), errors=errors)
+    instances = [stored[record_id] for record_id in ids]
+    if model is Show:
+        before = [(show.venue_id, show.artist_id) for show in instances]
+        bookings = [
+            Booking(show.id, **dict(
+                {name: getattr(show, name) for name in SHOW_FIELDS}, **fields
+            ))
+            for show, (fields, _) in zip(instances, cleaned)
+        ]
+        _check_shows(bookings, exclude_ids=ids)
+    else:
+        tags = (venue_tags if model is Venue else artist_tags)(*ids)
+    now = datetime.utcnow()
+    for instance, (fields, genres) in zip(instances, cleaned):
+        for name, value in fields.items():
+            setattr(instance, name, value)
+        if genres is not None:
+            instance.genres = genres
+        # genres live in their own table; touch the row for the pages' validators
+        instance.updated_at = now
+    if model is Show:
+        return instances, _shows_written(instances, before)
+    return instances, tags
+
+
+@bp.route("/" + _KIND, methods=["POST"])
+def create_records(kind):
+    return _response({"data": _write(kind, _create)}, 201)
+
+
+@bp.route("/" + _KIND, methods=["PATCH"])
+def update_records(kind):
+    return _response({"data": _write(kind, _update)})
@@ -0,0 +1,202 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import sys
+from datetime import datetime
+
+from flask import (
+    Blueprint, current_app, flash, jsonify, redirect, render_template, request, url_for,
+)
+
+from catalog import (
+    artist_tags, autocomplete, detail_version, filter_listing, listing_version, past_shows_limit,
+    reindex, show_partitions, streamed_rows, suggestions, suggestions_limit, until_next_show,
+)
+from counters import fresh
+from extensions import cache
+from forms import ArtistForm
+from models import db, Artist, ArtistGenre, Venue, Show
+from search import search
+from templating import stream_template
+
+bp = Blueprint("artists", __name__)
+
+#  Artists
+#  ----------------------------------------------------------------
+@bp.route('/artists')
+@db.replica_reads
+@cache.conditional(lambda: listing_version(Artist))
+@cache.page(tags=lambda: ["artists"])
+def artists():
+      # Only the columns the page shows, read through a server-side cursor
+      # while the page streams out; a database error mid-stream ends the
+      # listing early (catalog.streamed_rows).
+      artists = []
+      try:
+          artists = streamed_rows(
+              db.session.query(Artist.id, Artist.name).order_by(Artist.name).yield_per(1000)
+          )
+      except Exception:
+          print(sys.exc_info())
+      return stream_template("pages/artists.html", artists = artists)
+
+
+@bp.route('/artists/search', methods=['POST'])
+@db.replica_reads
+def search_artists():
+    # search for "band" should return "The Wild Sax Band".
+    search_term = request.form.get("search_term", "").strip()
+    artists = search(
+        Artist,
+        search_term,
+        current_app.config["SEARCH_RESULT_LIMIT"],
+        max_age=current_app.config["SEARCH_INDEX_MAX_AGE"],
+    )
+    response = {
+        "count": len(artists),
+        "data": artists,
+    }
+    return render_template("pages/search_artists.html", results=response, search_term=search_term,)
+
+@bp.route('/artists/autocomplete')
+def autocomplete_artists():
+    return autocomplete(Artist)
+
+@bp.route('/artists/filter')
+@db.replica_reads
+@cache.conditional(lambda: listing_version(Artist))
+@cache.page(tags=lambda: ["artists"])
+def filter_artists():
+    # e.g. /artists/filter?genre=Jazz&genre=Blues&city=San+Francisco
+    return filter_listing(Artist, ArtistGenre, ArtistGenre.artist_id, "pages/filter_artists.html")
+
+
+@bp.route('/artists/<int:artist_id>')
+@db.replica_reads
+@cache.conditional(
+    lambda artist_id: detail_version(Artist, artist_id, Venue, Show.artist_id, Show.venue_id)
+)
+@cache.page(tags=lambda artist_id: ["artist:{}".format(artist_id)])
+def show_artist(artist_id):
+    artist = Artist.query.get_or_404(artist_id)
+    past_limit = past_shows_limit()
+    now = datetime.now()
+    counts = (artist.past_shows_count, artist.upcoming_shows_count) if fresh(artist, now) else None
+    past_shows, upcoming_shows, past_shows_count, upcoming_shows_count = cache.fragment(
+        "artist:{}:shows:{}".format(artist_id, past_limit),
+        ["artist:{}".format(artist_id)],
+        lambda: show_partitions(
+            Show.artist_id, artist_id, Venue, Show.venue_id, "venue", past_limit, counts, now
+        ),
+        until_next_show(now),
+    )
+    return render_template(
+        'pages/show_artist.html',
+        suggestions=suggestions(artist),
+        artist=dict(
+            artist.__dict__,
+            genres=list(artist.genres),
+            past_shows=past_shows,
+            upcoming_shows=upcoming_shows,
+            past_shows_count=past_shows_count,
+            upcoming_shows_count=upcoming_shows_count,
+        ),
+    )
+
+@bp.route('/artists/<int:artist_id>/suggestions')
+@db.replica_reads
+def artist_suggestions(artist_id):
+    # Venues to play, e.g. /artists/3/suggestions?limit=20
+    artist = Artist.query.get_or_404(artist_id)
+    return jsonify({"artist_id": artist_id, "venues": suggestions(artist, suggestions_limit())})
+
+#  Update
+#  ----------------------------------------------------------------
+@bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+      artist = Artist.query.get_or_404(artist_id)
+      form = ArtistForm(obj=artist)
+      return render_template("forms/edit_artist.html", form=form, artist=artist)
+
+@bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+    error = False
+    try:
+        data = request.form
+        artist = Artist.query.get(artist_id)
+        artist.name = data.get("name")
+        artist.city = data.get("city")
+        artist.state = data.get("state")
+        artist.phone = data.get("phone")
+        artist.genres = data.getlist("genres")
+        artist.image_link = data.get("image_link")
+        # genres live in artist_genres; touch the row for the pages' validators
+        artist.updated_at = datetime.utcnow()
+        tags = artist_tags(artist_id)
+        db.session.commit()
+        reindex(artist)
+        cache.invalidate(*tags)
+    except Exception:
+        error = True
+        db.session.rollback()
+        print(sys.exc_info())
+    finally:
+        db.session.close()
+        if error:
+            flash("An error occurred. Artist " + data["name"] + " could not be updated.")
+        else:
+            flash("Artist " + data["name"] + " was successfully updated")
+    return redirect(url_for("artists.show_artist", artist_id=artist_id))
+
+
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@bp.route('/artists/create', methods=['GET'])
+def create_artist_form():
+  form = ArtistForm()
+  return render_template('forms/new_artist.html', form=form)
+
+
+def _hydrate_artist(form):
+    return Artist(
+        name=form.get("name"),
+        city=form.get("city"),
+        state=form.get("state"),
+        phone=form.get("phone"),
+        genres=form.getlist("genres"),
+        image_link=form.get("image_link"),
+        facebook_link=form.get("facebook_link"),
+        website=form.get("website"),
+        seeking_venue=form.get("seeking_venue"),
+        seeking_description=form.get("seeking_description"),
+    )
+
+
+@bp.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+    form = ArtistForm()
+    if not form.validate():
+        flash(form.errors)
+        return redirect(url_for("artists.create_artist_form"))
+    error = False
+    try:
+        data = request.form
+        artist = _hydrate_artist(data)
+        db.session.add(artist)
+        db.session.commit()
+        reindex(artist)
+        cache.invalidate("artists")
+    except Exception:
+        error = True
+        db.session.rollback()
+        print(sys.exc_info())
+    finally:
+        db.session.close()
+        if error:
+            flash("An error occurred. Artist " + data["name"] + " could not be listed.")
+        else:
+            flash("Artist " + data["name"] + " was successfully listed!")
+    return render_template("pages/home.html")
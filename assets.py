@@ -0,0 +1,279 @@
+# ----------------------------------------------------------------------------#
+# Imports
+# ----------------------------------------------------------------------------#
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+
+from flask import abort, request, send_file, url_for
+from flask.helpers import safe_join
+
+# ----------------------------------------------------------------------------#
+# Static asset pipeline
+# ----------------------------------------------------------------------------#
+# "flask build-assets" concatenates the stylesheets and scripts the layout
+# loads into a few bundles, minifies them and writes them, along with a copy
+# of every other static file, under static/dist/ with a content hash in the
+# name ("dist/app.3f2a91c0d4.css"), plus .gz (and .br, when the `brotli`
+# package is installed) variants of text files. dist/manifest.json maps
+# source paths and bundle names to the hashed files:
+#
+#   url_for('static', filename='img/front-splash.jpg')
+#       -> /static/dist/img/front-splash.7be05a1c93.jpg
+#   bundle_urls('app.css') -> ['/static/dist/app.3f2a91c0d4.css']
+#
+# A hashed name changes whenever its content does, so those files are served
+# as immutable for a year, in the best precompressed encoding the client
+# accepts. Builds keep earlier hashed files, which pages still cached by
+# browsers or the page cache may reference. Without a manifest (or with
+# ASSETS_BUNDLED off) every source file is linked as is.
+
+DIST = "dist"
+MANIFEST = "manifest.json"
+
+# Bundle name -> source files, in load order. Keep in step with
+# templates/layouts/main.html.
+BUNDLES = {
+    "app.css": [
+        "css/bootstrap.min.css",
+        "css/layout.main.css",
+        "css/main.css",
+        "css/main.responsive.css",
+        "css/main.quickfix.css",
+    ],
+    # loaded in <head>
+    "head.js": [
+        "js/libs/modernizr-2.8.2.min.js",
+        "js/libs/moment.min.js",
+    ],
+    # deferred, after jQuery
+    "app.js": [
+        "js/script.js",
+        "js/libs/bootstrap-3.1.1.min.js",
+        "js/plugins.js",
+    ],
+}
+
+# Worth compressing; images and woff fonts already are.
+_COMPRESSIBLE = frozenset(
+    [".css", ".js", ".map", ".svg", ".json", ".txt", ".ttf", ".otf", ".eot"]
+)
+_HASH_LENGTH = 10
+_IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Strings, unquoted url()s and comments: kept as they are (comments dropped)
+# while the text between them is minified.
+_CSS_TOKENS = re.compile(
+    r"""("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|url\(\s*[^'"()]*\)|/\*.*?\*/)""", re.S
+)
+_CSS_SPACE = re.compile(r"\s+")
+# not before ":" (".nav :hover" is not ".nav:hover")
+_CSS_PUNCTUATION = re.compile(r"\s*([{};,>])\s*|(:)\s+")
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def _hashed_name(path, content):
+    root, ext = posixpath.splitext(path)
+    return "{}.{}{}".format(root, hashlib.sha256(content).hexdigest()[:_HASH_LENGTH], ext)
+
+
+def _minify_css_code(text):
+    text = _CSS_SPACE.sub(" ", text)
+    text = _CSS_PUNCTUATION.sub(lambda match: match.group(1) or match.group(2), text)
+    return text.replace(";}", "}")
+
+
+def minify_css(text):
+    """ Drop comments (but /*! licenses */) and insignificant whitespace,
+    leaving quoted strings and url()s as they are. """
+    minified, code = [], []
+    for index, part in enumerate(_CSS_TOKENS.split(text)):
+        if index % 2 == 0:
+            code.append(part)
+        elif not part.startswith("/*") or part.startswith("/*!"):
+            minified.extend((_minify_css_code("".join(code)), part))
+            code = []
+    minified.append(_minify_css_code("".join(code)))
+    return "".join(minified).strip()
+
+
+def minify_js(text):
+    """ rjsmin when installed; otherwise the source as is (the libraries are
+    shipped minified already). """
+    try:
+        import rjsmin
+    except ImportError:
+        return text
+    return rjsmin.jsmin(text)
+
+
+def _rebase_css_urls(text, source, target, files):
+    """ Point the url()s of `source` (a static path) at the hashed copies, as
+    paths relative to `target`, where the text ends up. """
+
+    def replace(match):
+        url = match.group(2)
+        if re.match(r"^(?:[a-z]+:|/|#)", url, re.I):
+            return match.group(0)
+        path, suffix = re.match(r"^([^?#]*)(.*)$", url).groups()
+        resolved = posixpath.normpath(posixpath.join(posixpath.dirname(source), path))
+        if resolved not in files:
+            return match.group(0)
+        relative = posixpath.relpath(files[resolved], posixpath.dirname(target))
+        return 'url("{}{}")'.format(relative, suffix)
+
+    return _CSS_URL.sub(replace, text)
+
+
+def _write(static_folder, path, content):
+    """ Write static/`path` and its precompressed variants, once. """
+    target = os.path.join(static_folder, *path.split("/"))
+    if os.path.exists(target):
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, "wb") as output:
+        output.write(content)
+    if posixpath.splitext(path)[1] not in _COMPRESSIBLE:
+        return
+    with open(target + ".gz", "wb") as output:
+        # mtime=0: identical builds produce identical files
+        with gzip.GzipFile(fileobj=output, mode="wb", compresslevel=9, mtime=0) as compressed:
+            compressed.write(content)
+    try:
+        import brotli
+    except ImportError:
+        return
+    with open(target + ".br", "wb") as output:
+        output.write(brotli.compress(content, quality=11))
+
+
+def build(static_folder):
+    """ Fingerprint every static file, build the bundles and write the
+    manifest; returns it. """
+    files = {}
+    for root, dirs, names in os.walk(static_folder):
+        if os.path.abspath(root) == os.path.abspath(static_folder):
+            dirs[:] = [name for name in dirs if name != DIST]
+        for name in sorted(names):
+            if name.startswith("."):
+                continue
+            source = os.path.join(root, name)
+            path = os.path.relpath(source, static_folder).replace(os.sep, "/")
+            with open(source, "rb") as handle:
+                content = handle.read()
+            files[path] = posixpath.join(DIST, _hashed_name(path, content))
+            # stylesheets are written below, once their urls are rebased
+            if not path.endswith(".css"):
+                _write(static_folder, files[path], content)
+
+    for path in [path for path in files if path.endswith(".css")]:
+        with open(os.path.join(static_folder, *path.split("/")), encoding="utf-8") as handle:
+            text = _rebase_css_urls(handle.read(), path, files[path], files)
+        content = text.encode("utf-8")
+        files[path] = posixpath.join(DIST, _hashed_name(path, content))
+        _write(static_folder, files[path], content)
+
+    bundles = {}
+    for name, sources in sorted(BUNDLES.items()):
+        parts = []
+        for source in sources:
+            with open(os.path.join(static_folder, *source.split("/")), encoding="utf-8") as handle:
+                text = handle.read()
+            if name.endswith(".css"):
+                text = _rebase_css_urls(text, source, posixpath.join(DIST, name), files)
+                parts.append(minify_css(text))
+            else:
+                # a script without a trailing semicolon must not run into the next
+                parts.append(minify_js(text).rstrip() + "\n;")
+        content = "\n".join(parts).encode("utf-8")
+        bundles[name] = posixpath.join(DIST, _hashed_name(name, content))
+        _write(static_folder, bundles[name], content)
+
+    manifest = {"files": files, "bundles": bundles}
+    manifest_path = os.path.join(static_folder, DIST, MANIFEST)
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path + ".tmp", "w") as output:
+        json.dump(manifest, output, indent=1, sort_keys=True)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return manifest
+
+
+# ----------------------------------------------------------------------------#
+# Flask integration
+# ----------------------------------------------------------------------------#
+
+
+class Assets(object):
+    """ Serves the built assets, configured from ASSETS_* settings:
+
+    ASSETS_BUNDLED  link the hashed bundles and files of dist/manifest.json
+                    (default True); off, or without a manifest, every
+                    source file is linked as is """
+
+    def __init__(self, app=None):
+        self.files = {}
+        self.bundles = {}
+        self.version = None
+        self._hashed = frozenset()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        if app.config.get("ASSETS_BUNDLED", True):
+            self.load()
+        app.url_defaults(self._hashed_url)
+        app.view_functions["static"] = self.send_static_file
+        app.jinja_env.globals["bundle_urls"] = self.bundle_urls
+        app.extensions["assets"] = self
+
+    def load(self):
+        """ (Re)read the manifest written by build(), if any. """
+        path = os.path.join(self.static_folder, DIST, MANIFEST)
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as handle:
+            raw = handle.read()
+        manifest = json.loads(raw.decode("utf-8"))
+        self.files, self.bundles = manifest["files"], manifest["bundles"]
+        self._hashed = frozenset(self.files.values()) | frozenset(self.bundles.values())
+        self.version = hashlib.sha256(raw).hexdigest()[:_HASH_LENGTH]
+
+    def _hashed_url(self, endpoint, values):
+        if endpoint == "static" and values.get("filename") in self.files:
+            values["filename"] = self.files[values["filename"]]
+
+    def bundle_urls(self, name):
+        """ Urls to load bundle `name` from: the hashed bundle once built,
+        otherwise each of its sources. """
+        if name in self.bundles:
+            return [url_for("static", filename=self.bundles[name])]
+        return [url_for("static", filename=source) for source in BUNDLES[name]]
+
+    def send_static_file(self, filename):
+        path = safe_join(self.static_folder, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        hashed = filename in self._hashed
+        encoding = None
+        if hashed:
+            for candidate, suffix in (("br", ".br"), ("gzip", ".gz")):
+                if request.accept_encodings[candidate] and os.path.isfile(path + suffix):
+                    encoding, path = candidate, path + suffix
+                    break
+        response = send_file(path, mimetype=mimetype, conditional=True)
+        if hashed:
+            response.headers["Cache-Control"] = "public, max-age={}, immutable".format(
+                _IMMUTABLE_MAX_AGE
+            )
+            response.vary.add("Accept-Encoding")
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+        return response
+
@@ -0,0 +1,140 @@
+# ----------------------------------------------------------------------------#
+# Imports
+# ----------------------------------------------------------------------------#
+
+import threading
+import time
+from bisect import bisect_left, insort
+
+from models import db, Artist, Venue
+from search import tokenize
+
+# ----------------------------------------------------------------------------#
+# Typeahead
+# ----------------------------------------------------------------------------#
+# Name-prefix suggestions for the search boxes and the show forms, served from
+# sorted arrays held by each worker. Names are stored as normalized keys
+# ("the wild sax band") and, in a second array, from each later word to the
+# end ("wild sax band", "sax band", "band"), so typing the start of any word
+# matches. A lookup is a bisect plus a scan of at most `limit` entries per
+# array; names starting with the query come first.
+
+
+class PrefixIndex(object):
+    """ Sorted (key, id) arrays with prefix lookup. """
+
+    def __init__(self):
+        self._names = []
+        self._words = []
+        self._records = {}
+        self._lock = threading.Lock()
+        self.built_at = None
+
+    @staticmethod
+    def _keys(name):
+        tokens = tokenize(name)
+        return [" ".join(tokens[start:]) for start in range(len(tokens))]
+
+    def build(self, records):
+        names, words, stored = [], [], {}
+        for record in records:
+            stored[record["id"]] = record
+            keys = self._keys(record["name"])
+            names.extend((key, record["id"]) for key in keys[:1])
+            words.extend((key, record["id"]) for key in keys[1:])
+        names.sort()
+        words.sort()
+        with self._lock:
+            self._names, self._words, self._records = names, words, stored
+            self.built_at = time.monotonic()
+
+    def add(self, record):
+        with self._lock:
+            self._remove(record["id"])
+            self._records[record["id"]] = record
+            keys = self._keys(record["name"])
+            for key in keys[:1]:
+                insort(self._names, (key, record["id"]))
+            for key in keys[1:]:
+                insort(self._words, (key, record["id"]))
+
+    def remove(self, record_id):
+        with self._lock:
+            self._remove(record_id)
+
+    def complete(self, term, limit):
+        """ Records whose name has a word sequence starting with `term`. """
+        prefix = " ".join(tokenize(term))
+        if not prefix:
+            return []
+        if not term[-1:].isalnum():
+            prefix += " "
+        found, seen = [], set()
+        with self._lock:
+            for entries in (self._names, self._words):
+                position = bisect_left(entries, (prefix,))
+                while position < len(entries) and len(found) < limit:
+                    key, record_id = entries[position]
+                    if not key.startswith(prefix):
+                        break
+                    position += 1
+                    if record_id not in seen:
+                        seen.add(record_id)
+                        found.append(self._records[record_id])
+        return found
+
+    def _remove(self, record_id):
+        record = self._records.pop(record_id, None)
+        if record is None:
+            return
+        keys = self._keys(record["name"])
+        for entries, entry_keys in ((self._names, keys[:1]), (self._words, keys[1:])):
+            for key in entry_keys:
+                position = bisect_left(entries, (key, record_id))
+                if position < len(entries) and entries[position] == (key, record_id):
+                    del entries[position]
+
+
+_indexes = {Venue: PrefixIndex(), Artist: PrefixIndex()}
+
+
+def _record(row):
+    return {"id": row.id, "name": row.name, "city": row.city, "state": row.state}
+
+
+def build(model):
+    """ (Re)load `model`'s names into this worker's index. """
+    rows = db.session.query(model.id, model.name, model.city, model.state)
+    _indexes[model].build(_record(row) for row in rows.yield_per(5000))
+
+
+# ----------------------------------------------------------------------------#
+# Public API
+# ----------------------------------------------------------------------------#
+
+
+def complete(model, term, limit, max_age=None):
+    """ [{"id", "name", "city", "state"}] of `model` rows whose name has a
+    word starting with `term`; the index is (re)built on first use and when
+    older than `max_age` seconds (edits made in other workers). """
+    index = _indexes[model]
+    stale = max_age is not None and index.built_at is not None and (
+        time.monotonic() - index.built_at >= max_age
+    )
+    if index.built_at is None or stale:
+        build(model)
+    return index.complete(term, limit)
+
+
+def index_name(instance):
+    """ Refresh a created or edited Venue/Artist in this worker's index. """
+    index = _indexes[type(instance)]
+    if index.built_at is not None:
+        index.add(_record(instance))
+
+
+def unindex_name(model, record_id):
+    """ Drop a deleted row from this worker's index. """
+    index = _indexes[model]
+    if index.built_at is not None:
+        index.remove(record_id)
@@ -0,0 +1,78 @@
+"""Micro-benchmark for the `datetime` Jinja filter.
+
+Compares the previous implementation (re-parse the string with dateutil and
+call babel.dates.format_datetime with a pattern string) against
+filters.format_datetime on a /shows-like workload: a page of shows whose
+start times repeat across requests.
+
+    $ python benchmarks/bench_datetime_filter.py [--shows 30] [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import babel.dates  # noqa: E402
+
+from filters import format_datetime  # noqa: E402
+
+
+def _legacy_parser():
+    # The pinned python-dateutil fails on Python 3.10+ (collections.Callable);
+    # the legacy path then parses with fromisoformat.
+    try:
+        import dateutil.parser
+
+        dateutil.parser.parse("2026-01-01 20:00:00")
+        return dateutil.parser.parse
+    except (ImportError, AttributeError):
+        return datetime.fromisoformat
+
+
+legacy_parse = _legacy_parser()
+
+
+def legacy_format_datetime(value, format="medium"):
+    date = legacy_parse(value)
+    if format == "full":
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == "medium":
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format, locale='en_US')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shows", type=int, default=30, help="shows per page")
+    parser.add_argument("--repeat", type=int, default=200, help="page renders")
+    args = parser.parse_args()
+
+    start = datetime(2026, 1, 1, 20, 0)
+    times = [start + timedelta(days=i, minutes=30 * (i % 4)) for i in range(args.shows)]
+    strings = [str(t) for t in times]
+
+    assert [legacy_format_datetime(s, "full") for s in strings] == [
+        format_datetime(t, "full") for t in times
+    ]
+
+    legacy = timeit.timeit(
+        lambda: [legacy_format_datetime(s, "full") for s in strings], number=args.repeat
+    )
+    cold = timeit.timeit(lambda: [format_datetime(t, "full") for t in times], number=1)
+    warm = timeit.timeit(
+        lambda: [format_datetime(t, "full") for t in times], number=args.repeat
+    )
+    calls = args.shows * args.repeat
+    print("legacy parser: {}.{}".format(legacy_parse.__module__, legacy_parse.__name__))
+    print("legacy   {:8.2f} us/call".format(legacy / calls * 1e6))
+    print("cold     {:8.2f} us/call".format(cold / args.shows * 1e6))
+    print("memoized {:8.2f} us/call  ({:.0f}x faster than legacy)".format(
+        warm / calls * 1e6, legacy / warm
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Query-plan regression check.
+
+Seeds a database (see run_benchmarks.py), drives every route of app.py once
+through the Flask test client while recording the SQL it issues, then runs
+EXPLAIN on each distinct statement. The run fails when a statement plans a
+sequential scan of a large table, unless that statement's scan of that table
+is listed in ALLOWED_SCANS with the reason it is expected. Statements are
+listed by fingerprint (printed with every failure): a new scan of the same
+table by any other statement still fails.
+
+    $ python benchmarks/check_query_plans.py --database postgresql://localhost/fyyur_plans --migrate
+    $ python benchmarks/check_query_plans.py            # SQLite, EXPLAIN QUERY PLAN
+
+tests/test_query_plans.py runs the SQLite check on a small seed with the suite.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+from run_benchmarks import routes, seed  # noqa: E402
+
+LARGE_TABLES = frozenset(["shows", "venues", "artists", "venue_genres", "artist_genres"])
+
+# (statement fingerprint, table) -> why a full scan is the right plan there
+_INDEX_BUILD = "the worker's autocomplete and (SQLite) search indexes read every name"
+_MATCHING = "the worker's matching index is built from a scan"
+_VALIDATOR = "the listing's validator counts the rows (an index-only scan at best)"
+ALLOWED_SCANS = {
+    # SELECT venues.id, venues.name, venues.city, venues.state FROM venues
+    ("188ec8c6ad8b", "venues"): _INDEX_BUILD,
+    # SELECT artists.id, artists.name, artists.city, artists.state FROM artists
+    ("72b05690a83a", "artists"): _INDEX_BUILD,
+    # SELECT venue_genres.venue_id, venue_genres.genre FROM venue_genres
+    ("575a11aec66a", "venue_genres"): _INDEX_BUILD + "; " + _MATCHING,
+    # SELECT artist_genres.artist_id, artist_genres.genre FROM artist_genres
+    ("27c3f5d05d56", "artist_genres"): _INDEX_BUILD + "; " + _MATCHING,
+    # SELECT venues.id, venues.state, venues.city, venues.seeking_talent FROM venues
+    ("ee0789319624", "venues"): _MATCHING,
+    # SELECT artists.id, artists.state, artists.city, artists.seeking_venue FROM artists
+    ("9d9f67c5c59a", "artists"): _MATCHING,
+    # SELECT venues.state, venues.city, venues.id, ... FROM venues ORDER BY state, city, name
+    ("261f7c5f71d5", "venues"): "the area listing renders every venue",
+    # SELECT artists.id, artists.name FROM artists ORDER BY artists.name
+    ("57029d421e32", "artists"): "the artist listing renders every artist",
+    # listing_version(Venue), listing_version(Artist), shows_version()
+    ("1e32c969aadd", "venues"): _VALIDATOR,
+    ("4b367a1bb491", "artists"): _VALIDATOR,
+    ("1cff6f9befe0", "venues"): _VALIDATOR,
+    ("1cff6f9befe0", "artists"): _VALIDATOR,
+    # SELECT shows.* FROM shows ORDER BY start_time, id LIMIT ? (SQLite)
+    ("0fbeb666b3a0", "shows"): "the first /shows page walks ix_shows_start_time_id up to its LIMIT",
+}
+
+# A full walk of one of the table's indexes ("SCAN shows USING INDEX ...")
+# reads every row just the same, so it counts as a scan too.
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+
+# Bind parameters of either paramstyle, literals, and IN lists of any length.
+_NORMALIZE = [
+    (re.compile(r"%\(\w+\)s|:\w+|\?|'(?:[^']|'')*'|\b\d+\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?)"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def fingerprint(statement):
+    """ Short hash of `statement` with parameters and literals normalized
+    away, stable across runs, parameter counts and SQL dialect paramstyles. """
+    for pattern, replacement in _NORMALIZE:
+        statement = pattern.sub(replacement, statement)
+    return hashlib.sha1(statement.strip().encode("utf-8")).hexdigest()[:12]
+
+
+class StatementRecorder(object):
+    """ Distinct (statement, parameters) per route, in first-seen order. """
+
+    def __init__(self):
+        self.route = None
+        self.statements = {}
+        event.listen(Engine, "before_cursor_execute", self._record)
+
+    def close(self):
+        event.remove(Engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self.route is None or executemany:
+            return
+        if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+            return
+        self.statements.setdefault(self.route, {}).setdefault(statement, parameters)
+
+
+def _postgres_scans(cursor, statement, parameters):
+    cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+    plan = cursor.fetchone()[0]
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    scans, nodes = [], [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node.get("Node Type") == "Seq Scan":
+            scans.append(node.get("Relation Name"))
+        nodes.extend(node.get("Plans", []))
+    return scans
+
+
+def _sqlite_scans(cursor, statement, parameters):
+    cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+    scans = []
+    for row in cursor.fetchall():
+        match = _SQLITE_SCAN.match(row[-1])
+        if match:
+            scans.append(match.group(1))
+    return scans
+
+
+def check(engine, statements):
+    """ [(route, table, statement)] of sequential scans not in ALLOWED_SCANS. """
+    explain = _postgres_scans if engine.dialect.name == "postgresql" else _sqlite_scans
+    failures = []
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        for route, route_statements in statements.items():
+            for statement, parameters in route_statements.items():
+                key = fingerprint(statement)
+                for table in explain(cursor, statement, parameters):
+                    if table in LARGE_TABLES and (key, table) not in ALLOWED_SCANS:
+                        failures.append((route, table, statement))
+        raw.rollback()
+    finally:
+        raw.close()
+    return failures
+
+
+def record_routes(app):
+    """ {route: {statement: parameters}} issued by one request to every route
+    of `app`'s database as it is. Must run inside an app context. """
+    from models import db, Artist, Venue
+
+    if db.engine.dialect.name == "postgresql":
+        db.session.execute("ANALYZE")
+        db.session.commit()
+    venue_ids = [venue_id for (venue_id,) in db.session.query(Venue.id).limit(100)]
+    artist_ids = [artist_id for (artist_id,) in db.session.query(Artist.id).limit(100)]
+    db.session.remove()
+
+    recorder = StatementRecorder()
+    try:
+        client = app.test_client()
+        for name, method, path, form in routes(random.Random(1), venue_ids, artist_ids):
+            recorder.route = name
+            client.open(path(), method=method, data=form() if form else None).get_data()
+    finally:
+        recorder.close()
+    return recorder.statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", default="sqlite:///" + os.path.join(tempfile.gettempdir(), "fyyur_plans.db"))
+    parser.add_argument("--no-seed", dest="seed", action="store_false", help="check the database as is")
+    parser.add_argument("--migrate", action="store_true", help="build the schema with the migrations")
+    parser.add_argument("--venues", type=int, default=20000)
+    parser.add_argument("--artists", type=int, default=20000)
+    parser.add_argument("--shows", type=int, default=200000)
+    args = parser.parse_args()
+
+    from app import create_app
+    from models import db
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": args.database, "WTF_CSRF_ENABLED": False, "DEBUG": False,
+        "TESTING": True, "CACHE_BACKEND": "null",
+    })
+
+    with app.app_context():
+        if args.seed:
+            seed(args.venues, args.artists, args.shows, migrate=args.migrate)
+        statements = record_routes(app)
+        failures = check(db.engine, statements)
+
+    checked = sum(len(route_statements) for route_statements in statements.values())
+    print("checked {} statements over {} routes".format(checked, len(statements)))
+    for route, table, statement in failures:
+        print("SEQ SCAN on {} in route {} (fingerprint {}):\n    {}".format(
+            table, route, fingerprint(statement), " ".join(statement.split())
+        ))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
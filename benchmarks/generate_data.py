@@ -0,0 +1,199 @@
+"""Synthetic catalog generator for load tests and benchmarks.
+
+Writes venues, artists and shows files in the format read by `flask import`
+(see importer.py), streaming rows so 1M shows need no more memory than 10k.
+States and genres follow skewed, roughly realistic distributions drawn from
+enums.py, and a few "popular" venues and artists get most of the shows.
+The same --seed always produces the same files.
+
+    $ python benchmarks/generate_data.py out/ --venues 10000 --artists 20000 --shows 1000000
+    $ flask import --venues out/venues.csv --artists out/artists.csv --shows out/shows.csv
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enums import Genres, States  # noqa: E402
+
+# Rough share of live-music activity per state; unlisted states weigh 1.
+STATE_WEIGHTS = {
+    "CA": 40, "NY": 30, "TX": 28, "FL": 22, "IL": 14, "TN": 12, "WA": 10, "GA": 10,
+    "PA": 10, "MA": 9, "CO": 8, "OR": 7, "NC": 7, "OH": 7, "MI": 7, "LA": 6,
+    "MN": 6, "AZ": 6, "NV": 5, "NJ": 5, "VA": 5, "MO": 4, "DC": 4,
+}
+CITIES = {
+    "CA": ["Los Angeles", "San Francisco", "San Diego", "Oakland", "Sacramento"],
+    "NY": ["New York", "Brooklyn", "Buffalo", "Rochester"],
+    "TX": ["Austin", "Houston", "Dallas", "San Antonio"],
+    "FL": ["Miami", "Orlando", "Tampa", "Jacksonville"],
+    "IL": ["Chicago", "Springfield"],
+    "TN": ["Nashville", "Memphis", "Knoxville"],
+    "WA": ["Seattle", "Spokane", "Tacoma"],
+    "GA": ["Atlanta", "Savannah", "Athens"],
+    "LA": ["New Orleans", "Baton Rouge"],
+}
+GENRE_WEIGHTS = {
+    Genres.Rock_n_Roll: 18, Genres.Pop: 15, Genres.Hip_Hop: 14, Genres.Alternative: 10,
+    Genres.Jazz: 9, Genres.Electronic: 9, Genres.R_B: 8, Genres.Country: 8, Genres.Blues: 6,
+    Genres.Folk: 6, Genres.Punk: 5, Genres.Soul: 5, Genres.Heavy_Metal: 5, Genres.Funk: 4,
+    Genres.Reggae: 4, Genres.Classical: 4, Genres.Instrumental: 3, Genres.Musical_Theatre: 2,
+    Genres.Other: 2,
+}
+NAME_WORDS = [
+    "Blue", "Velvet", "Electric", "Golden", "Midnight", "Neon", "Rusty", "Silver", "Wild",
+    "Crimson", "Lucky", "Hollow", "Broken", "Sunset", "Paper", "Iron", "Echo", "Lost",
+]
+VENUE_NOUNS = ["Room", "Hall", "Tavern", "Lounge", "Theatre", "Club", "Garage", "Barn", "Cellar"]
+ARTIST_NOUNS = ["Band", "Collective", "Trio", "Quartet", "Orchestra", "Kids", "Brothers", "Ghosts"]
+
+VENUE_FIELDS = [
+    "id", "name", "city", "state", "address", "phone", "genres", "image_link",
+    "facebook_link", "website", "seeking_talent", "seeking_description",
+]
+ARTIST_FIELDS = [
+    "id", "name", "city", "state", "phone", "genres", "image_link", "facebook_link",
+    "website", "seeking_venue", "seeking_description",
+]
+SHOW_FIELDS = ["venue_id", "artist_id", "start_time"]
+
+
+class _Writer(object):
+    """ Streams dict rows to a .csv or .jsonl file. """
+
+    def __init__(self, path, fields):
+        self.path = path
+        self._file = io.open(path, "w", newline="", encoding="utf-8")
+        self._jsonl = path.endswith(".jsonl")
+        if not self._jsonl:
+            self._csv = csv.DictWriter(self._file, fieldnames=fields)
+            self._csv.writeheader()
+
+    def write(self, row):
+        if self._jsonl:
+            self._file.write(json.dumps(row) + "\n")
+        else:
+            self._csv.writerow(dict(row, genres=",".join(row["genres"])) if "genres" in row else row)
+
+    def close(self):
+        self._file.close()
+
+
+def _weighted(rng, weights):
+    population = list(weights)
+    cumulative, total = [], 0
+    for item in population:
+        total += weights[item]
+        cumulative.append(total)
+    return lambda: rng.choices(population, cum_weights=cumulative)[0]
+
+
+def _location(rng, pick_state):
+    state = pick_state()
+    cities = CITIES.get(state)
+    city = rng.choice(cities) if cities else "{} City {}".format(state, rng.randint(1, 5))
+    return state, city
+
+
+def _genres(rng, pick_genre):
+    genres = {pick_genre().value for _ in range(rng.choice((1, 1, 2, 2, 3, 4)))}
+    return sorted(genres)
+
+
+def _phone(rng):
+    return "{:03d}-{:03d}-{:04d}".format(rng.randint(200, 999), rng.randint(0, 999), rng.randint(0, 9999))
+
+
+def _popular_id(rng, count, hot_share=0.05, hot_bookings=0.5):
+    """ Id in 1..count where the first `hot_share` of ids get `hot_bookings`
+    of all shows. """
+    if rng.random() < hot_bookings:
+        return rng.randint(1, max(1, int(count * hot_share)))
+    return rng.randint(1, count)
+
+
+def generate(out_dir, venues=10000, artists=10000, shows=100000, seed=42, fmt="csv", now=None):
+    """ Write venues/artists/shows files into `out_dir`; returns their paths. """
+    rng = random.Random(seed)
+    now = now or datetime(2026, 1, 1)
+    pick_state = _weighted(rng, {state.value: STATE_WEIGHTS.get(state.value, 1) for state in States})
+    pick_genre = _weighted(rng, GENRE_WEIGHTS)
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+    paths = {kind: os.path.join(out_dir, "{}.{}".format(kind, fmt)) for kind in ("venues", "artists", "shows")}
+
+    writer = _Writer(paths["venues"], VENUE_FIELDS)
+    for venue_id in range(1, venues + 1):
+        state, city = _location(rng, pick_state)
+        seeking = rng.random() < 0.3
+        writer.write({
+            "id": venue_id,
+            "name": "The {} {} {}".format(rng.choice(NAME_WORDS), rng.choice(VENUE_NOUNS), venue_id),
+            "city": city,
+            "state": state,
+            "address": "{} {} Street".format(rng.randint(1, 9999), rng.choice(NAME_WORDS)),
+            "phone": _phone(rng),
+            "genres": _genres(rng, pick_genre),
+            "image_link": "https://picsum.photos/seed/venue{}/400/300".format(venue_id),
+            "facebook_link": "https://www.facebook.com/venue{}".format(venue_id),
+            "website": "https://venue{}.example.com".format(venue_id),
+            "seeking_talent": seeking,
+            "seeking_description": "Looking for local acts." if seeking else "",
+        })
+    writer.close()
+
+    writer = _Writer(paths["artists"], ARTIST_FIELDS)
+    for artist_id in range(1, artists + 1):
+        state, city = _location(rng, pick_state)
+        seeking = rng.random() < 0.4
+        writer.write({
+            "id": artist_id,
+            "name": "{} {} {}".format(rng.choice(NAME_WORDS), rng.choice(ARTIST_NOUNS), artist_id),
+            "city": city,
+            "state": state,
+            "phone": _phone(rng),
+            "genres": _genres(rng, pick_genre),
+            "image_link": "https://picsum.photos/seed/artist{}/400/300".format(artist_id),
+            "facebook_link": "https://www.facebook.com/artist{}".format(artist_id),
+            "website": "https://artist{}.example.com".format(artist_id),
+            "seeking_venue": seeking,
+            "seeking_description": "Touring next season." if seeking else "",
+        })
+    writer.close()
+
+    # Three years of history and one year of bookings ahead, evenings only.
+    writer = _Writer(paths["shows"], SHOW_FIELDS)
+    for _ in range(shows):
+        day = now + timedelta(days=rng.randint(-3 * 365, 365))
+        start = day.replace(hour=rng.choice((18, 19, 20, 21, 22)), minute=rng.choice((0, 30)))
+        writer.write({
+            "venue_id": _popular_id(rng, venues),
+            "artist_id": _popular_id(rng, artists),
+            "start_time": start.isoformat(),
+        })
+    writer.close()
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--venues", type=int, default=10000)
+    parser.add_argument("--artists", type=int, default=10000)
+    parser.add_argument("--shows", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    args = parser.parse_args()
+    paths = generate(args.out_dir, args.venues, args.artists, args.shows, args.seed, args.format)
+    for kind in ("venues", "artists", "shows"):
+        print("wrote {}".format(paths[kind]))
+
+
+if __name__ == "__main__":
+    main()
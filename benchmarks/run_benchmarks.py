@@ -0,0 +1,244 @@
+"""Route benchmark harness.
+
+Seeds a database with benchmarks/generate_data.py through the importer, then
+drives every route of app.py through the Flask test client (or a local WSGI
+server with --server) and reports p50/p95/p99 latency and SQL queries per
+request. Results can be saved with --json and compared with --baseline, which
+exits non-zero when a route regresses beyond --max-regression.
+
+    $ python benchmarks/run_benchmarks.py --database sqlite:////tmp/bench.db \\
+          --venues 10000 --artists 10000 --shows 200000 --json bench.json
+    $ python benchmarks/run_benchmarks.py --database postgresql://localhost/fyyur_bench \\
+          --no-seed --baseline bench.json
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+from generate_data import generate  # noqa: E402
+
+
+def seed(venues, artists, shows, migrate=False):
+    """ Recreate the schema and load generated data through the importer.
+    Must run inside an app context. With `migrate` the schema comes from the
+    Alembic migrations (which add the PostgreSQL-only search indexes) instead
+    of create_all(). """
+    from importer import Importer
+    from models import db, Artist, Venue
+    from counters import refresh
+
+    db.drop_all()
+    if migrate:
+        from flask import current_app
+        from flask_migrate import Migrate, upgrade
+
+        # create_app() sets Flask-Migrate up for the "flask db" commands only
+        if "migrate" not in current_app.extensions:
+            Migrate(current_app, db)
+
+        db.session.execute("DROP TABLE IF EXISTS alembic_version")
+        db.session.commit()
+        upgrade(directory=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations"))
+    else:
+        db.create_all()
+    paths = generate(tempfile.mkdtemp(prefix="fyyur_bench_"), venues, artists, shows)
+    started = time.perf_counter()
+    importer = Importer()
+    for run_import, kind in ((importer.import_venues, "venues"), (importer.import_artists, "artists"), (importer.import_shows, "shows")):
+        report = run_import(paths[kind])
+        print("seeded {} {} ({} rejected)".format(report.inserted, kind, report.rejected))
+    refresh(Venue)
+    refresh(Artist)
+    db.session.commit()
+    print("seeding took {:.1f}s".format(time.perf_counter() - started))
+
+
+def percentile(samples, pct):
+    """ Nearest-rank percentile of a non-empty list. """
+    ordered = sorted(samples)
+    return ordered[max(0, int(math.ceil(pct / 100.0 * len(ordered))) - 1)]
+
+
+class QueryCounter(object):
+    """ Counts cursor executions on every engine while enabled. """
+
+    def __init__(self):
+        self.count = 0
+        event.listen(Engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def routes(rng, venue_ids, artist_ids):
+    """ (name, method, path, form data factory) for every route worth timing. """
+    def venue_form():
+        n = rng.randint(0, 10 ** 9)
+        return {
+            "name": "Bench Venue {}".format(n), "city": "Austin", "state": "TX",
+            "address": "{} Bench Street".format(n), "genres": ["Jazz", "Blues"],
+        }
+
+    def artist_form():
+        n = rng.randint(0, 10 ** 9)
+        return {"name": "Bench Artist {}".format(n), "city": "Austin", "state": "TX", "genres": ["Rock n Roll"]}
+
+    def show_form():
+        return {
+            "venue_id": str(rng.choice(venue_ids)), "artist_id": str(rng.choice(artist_ids)),
+            "start_time": "2027-{:02d}-{:02d} 20:00:00".format(rng.randint(1, 12), rng.randint(1, 28)),
+        }
+
+    return [
+        ("index", "GET", lambda: "/", None),
+        ("venues", "GET", lambda: "/venues", None),
+        ("artists", "GET", lambda: "/artists", None),
+        ("shows", "GET", lambda: "/shows", None),
+        ("shows_upcoming", "GET", lambda: "/shows?upcoming=1", None),
+        ("filter_venues", "GET", lambda: "/venues/filter?genre=Jazz&state=CA", None),
+        ("filter_artists", "GET", lambda: "/artists/filter?genre=Rock+n+Roll", None),
+        ("show_venue", "GET", lambda: "/venues/{}".format(rng.choice(venue_ids)), None),
+        ("show_artist", "GET", lambda: "/artists/{}".format(rng.choice(artist_ids)), None),
+        ("search_venues", "POST", lambda: "/venues/search", lambda: {"search_term": rng.choice(["the", "blue", "hall", "jazz"])}),
+        ("search_artists", "POST", lambda: "/artists/search", lambda: {"search_term": rng.choice(["band", "wild", "kids", "rock"])}),
+        ("create_venue", "POST", lambda: "/venues/create", venue_form),
+        ("create_artist", "POST", lambda: "/artists/create", artist_form),
+        ("create_show", "POST", lambda: "/shows/create", show_form),
+    ]
+
+
+class TestClientDriver(object):
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data):
+        response = self.client.open(path, method=method, data=data)
+        response.get_data()
+        return response.status_code
+
+
+class ServerDriver(object):
+    """ Serves the app with werkzeug in a thread and calls it over HTTP. """
+
+    def __init__(self, app):
+        from werkzeug.serving import make_server
+
+        self.server = make_server("127.0.0.1", 0, app, threaded=True)
+        self.base = "http://127.0.0.1:{}".format(self.server.server_port)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def request(self, method, path, data):
+        body = urlencode(data, doseq=True).encode("ascii") if data is not None else None
+        try:
+            with urlopen(Request(self.base + path, data=body, method=method)) as response:
+                response.read()
+                return response.status
+        except Exception as e:
+            return getattr(e, "code", 599)
+
+
+def run(driver, counter, rng, venue_ids, artist_ids, requests, warmup):
+    results = {}
+    for name, method, path, form in routes(rng, venue_ids, artist_ids):
+        for _ in range(warmup):
+            driver.request(method, path(), form() if form else None)
+        latencies, queries, errors = [], [], 0
+        for _ in range(requests):
+            data = form() if form else None
+            before = counter.count
+            started = time.perf_counter()
+            status = driver.request(method, path(), data)
+            latencies.append(time.perf_counter() - started)
+            queries.append(counter.count - before)
+            errors += status >= 400
+        results[name] = {
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "queries_per_request": sum(queries) / float(len(queries)),
+            "errors": errors,
+        }
+    return results
+
+
+def compare(results, baseline, max_regression):
+    """ Route names whose p95 or query count grew more than `max_regression`. """
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ("p95_ms", "queries_per_request"):
+            if current[metric] > previous[metric] * (1 + max_regression) and current[metric] - previous[metric] > 0.5:
+                regressions.append("{} {}: {:.2f} -> {:.2f}".format(name, metric, previous[metric], current[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", default="sqlite:///" + os.path.join(tempfile.gettempdir(), "fyyur_bench.db"))
+    parser.add_argument("--seed-data", dest="seed", action="store_true", default=True)
+    parser.add_argument("--no-seed", dest="seed", action="store_false", help="benchmark the database as is")
+    parser.add_argument("--venues", type=int, default=10000)
+    parser.add_argument("--artists", type=int, default=10000)
+    parser.add_argument("--shows", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=50, help="timed requests per route")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--cache", action="store_true", help="keep the page cache enabled")
+    parser.add_argument("--server", action="store_true", help="go through a local WSGI server")
+    parser.add_argument("--json", help="write results here")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--random-seed", type=int, default=1)
+    args = parser.parse_args()
+
+    from app import create_app
+    from models import db, Artist, Venue
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": args.database, "WTF_CSRF_ENABLED": False, "DEBUG": False,
+        "TESTING": True, **({} if args.cache else {"CACHE_BACKEND": "null"}),
+    })
+
+    with app.app_context():
+        if args.seed:
+            seed(args.venues, args.artists, args.shows)
+        venue_ids = [venue_id for (venue_id,) in db.session.query(Venue.id)]
+        artist_ids = [artist_id for (artist_id,) in db.session.query(Artist.id)]
+        db.session.remove()
+
+    counter = QueryCounter()
+    driver = ServerDriver(app) if args.server else TestClientDriver(app)
+    results = run(driver, counter, random.Random(args.random_seed), venue_ids, artist_ids, args.requests, args.warmup)
+
+    print("{:<16} {:>9} {:>9} {:>9} {:>9} {:>7}".format("route", "p50 ms", "p95 ms", "p99 ms", "queries", "errors"))
+    for name, result in results.items():
+        print("{:<16} {p50_ms:>9.2f} {p95_ms:>9.2f} {p99_ms:>9.2f} {queries_per_request:>9.1f} {errors:>7}".format(name, **result))
+
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump(results, out, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as previous:
+            regressions = compare(results, json.load(previous), args.max_regression)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
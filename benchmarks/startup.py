@@ -0,0 +1,98 @@
+"""Startup time benchmark.
+
+Starts fresh interpreters, each importing app.py, building the application
+with create_app() and serving its first request (the home page, through the
+test client), and reports the median time of every step. Exits non-zero when
+the median time to first request exceeds --max-seconds, so it can guard
+deploys and autoscaling cold starts.
+
+    $ python benchmarks/startup.py --runs 10
+    $ python benchmarks/startup.py --database postgresql://localhost/fyyur --max-seconds 1.5
+    $ python benchmarks/startup.py --profile   # python -X importtime, slowest imports
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in the child; prints the elapsed seconds of each step as JSON.
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app({"SQLALCHEMY_DATABASE_URI": sys.argv[1], "DEBUG": True})
+created = time.perf_counter()
+status = app.test_client().get(sys.argv[2]).status_code
+served = time.perf_counter()
+print(json.dumps({
+    "import": imported - started,
+    "create_app": created - imported,
+    "first_request": served - created,
+    "total": served - started,
+    "status": status,
+}))
+"""
+
+STEPS = ["import", "create_app", "first_request", "total"]
+
+
+def run_once(database, path):
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD, database, path],
+        cwd=ROOT, check=True, stdout=subprocess.PIPE, universal_newlines=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def profile_imports(top):
+    """ The `top` slowest imports of app.py, by cumulative time. """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=ROOT, check=True, stderr=subprocess.PIPE, universal_newlines=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        rows.append((int(cumulative), name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", default="sqlite:///" + os.path.join(tempfile.gettempdir(), "fyyur_startup.db"))
+    parser.add_argument("--path", default="/", help="first request")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, help="fail above this median time to first request")
+    parser.add_argument("--profile", action="store_true", help="list the slowest imports")
+    args = parser.parse_args()
+
+    if args.profile:
+        for cumulative, name in profile_imports(25):
+            print("{:>9.1f} ms  {}".format(cumulative / 1000.0, name))
+        return
+
+    runs = [run_once(args.database, args.path) for _ in range(args.runs)]
+    if any(run["status"] >= 500 for run in runs):
+        print("first request failed with status {}".format(runs[0]["status"]))
+        sys.exit(1)
+    print("{:<14} {:>9} {:>9} {:>9}".format("step", "median ms", "min ms", "max ms"))
+    medians = {}
+    for step in STEPS:
+        values = [run[step] for run in runs]
+        medians[step] = statistics.median(values)
+        print("{:<14} {:>9.1f} {:>9.1f} {:>9.1f}".format(step, medians[step] * 1000, min(values) * 1000, max(values) * 1000))
+    if args.max_seconds is not None and medians["total"] > args.max_seconds:
+        print("REGRESSION time to first request {:.2f}s > {:.2f}s".format(medians["total"], args.max_seconds))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
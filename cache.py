@@ -0,0 +1,344 @@
+# ----------------------------------------------------------------------------#
+# Imports
+# ----------------------------------------------------------------------------#
+
+import hashlib
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import wraps
+
+from flask import Response, current_app, g, make_response, request, session
+
+# ----------------------------------------------------------------------------#
+# Backends
+# ----------------------------------------------------------------------------#
+# Entries are never deleted on write. Instead every entry key embeds the
+# current version of each tag it depends on ("venues", "venue:3", ...), and
+# invalidating a tag bumps its version so stale entries are simply never read
+# again and age out through LRU eviction or their TTL. This works the same way
+# for the in-process and the shared backend.
+
+
+class LRUBackend(object):
+    """ In-process, size-bounded LRU with per-entry TTL. Tag versions are kept
+    outside the LRU so they are never evicted. """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_versions(self, tags):
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class RedisBackend(object):
+    """ Shared backend for multi-worker deployments; any local `redis-server`
+    stands in for it during development. """
+
+    def __init__(self, url, prefix="fyyur:"):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key):
+        value = self._client.get(self._prefix + key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl):
+        self._client.set(self._prefix + key, pickle.dumps(value), ex=int(ttl))
+
+    def get_versions(self, tags):
+        if not tags:
+            return []
+        values = self._client.mget([self._prefix + "tag:" + tag for tag in tags])
+        return [int(value) if value is not None else 0 for value in values]
+
+    def bump(self, tags):
+        pipe = self._client.pipeline(transaction=False)
+        for tag in tags:
+            pipe.incr(self._prefix + "tag:" + tag)
+        pipe.execute()
+
+    def clear(self):
+        for key in self._client.scan_iter(self._prefix + "*"):
+            self._client.delete(key)
+
+
+class NullBackend(object):
+    """ Caching disabled: every lookup misses. """
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def get_versions(self, tags):
+        return [0] * len(tags)
+
+    def bump(self, tags):
+        pass
+
+    def clear(self):
+        pass
+
+
+# ----------------------------------------------------------------------------#
+# Cache
+# ----------------------------------------------------------------------------#
+
+
+def _not_modified(etag, last_modified):
+    # If-None-Match takes precedence over If-Modified-Since (RFC 7232)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    if since is None or last_modified is None:
+        return False
+    return last_modified <= since.replace(tzinfo=None)
+
+
+# Set in the WSGI environ of a request whose page must not be stored.
+_DISCARD_PAGE = "fyyur.cache.discard_page"
+
+
+class Cache(object):
+    """ Page and fragment cache configured from CACHE_* settings:
+
+    CACHE_BACKEND        "lru" (default), "redis" or "null"
+    CACHE_REDIS_URL      redis:// url for the "redis" backend
+    CACHE_MAX_ENTRIES    size bound of the "lru" backend
+    CACHE_DEFAULT_TTL    seconds an entry may be served
+    CACHE_MAX_PAGE_SIZE  largest streamed page kept, in characters """
+
+    def __init__(self, app=None):
+        self.backend = NullBackend()
+        self.default_ttl = 300
+        self.max_page_size = 4 * 1024 * 1024
+        self._stats = Counter()
+        self._stats_lock = threading.Lock()
+        self._vary = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        kind = app.config.get("CACHE_BACKEND", "lru")
+        if kind == "lru":
+            self.backend = LRUBackend(app.config.get("CACHE_MAX_ENTRIES", 1024))
+        elif kind == "redis":
+            self.backend = RedisBackend(app.config["CACHE_REDIS_URL"])
+        elif kind == "null":
+            self.backend = NullBackend()
+        else:
+            raise ValueError("Unknown CACHE_BACKEND: {!r}".format(kind))
+        self.default_ttl = app.config.get("CACHE_DEFAULT_TTL", 300)
+        self.max_page_size = app.config.get("CACHE_MAX_PAGE_SIZE", 4 * 1024 * 1024)
+        app.extensions["cache"] = self
+
+    def vary(self, func):
+        """ Register `func()` as part of every page key, for request state
+        other than the url that changes the rendered body (e.g. locale). """
+        self._vary.append(func)
+        return func
+
+    def _count(self, namespace, outcome):
+        with self._stats_lock:
+            self._stats[(namespace, outcome)] += 1
+
+    def _versioned_key(self, key, tags):
+        versions = self.backend.get_versions(tags)
+        return "{}|{}".format(key, ",".join("{}={}".format(t, v) for t, v in zip(tags, versions)))
+
+    def discard_page(self):
+        """ Keep the page being sent out of the cache, e.g. a streamed listing
+        cut short by a database error. """
+        request.environ[_DISCARD_PAGE] = True
+
+    def invalidate(self, *tags):
+        """ Drop every page and fragment that depends on any of `tags`. """
+        self.backend.bump(list(tags))
+
+    def _expires(self, expires_at):
+        # The page being rendered must not outlive its fragments (see page()).
+        g._cache_expires_at = min(g.get("_cache_expires_at", expires_at), expires_at)
+
+    def fragment(self, name, tags, producer, ttl=None):
+        """ Cached result of `producer()` under `name`, until one of `tags` is
+        invalidated or `ttl` elapses. `ttl` may also be a function of the
+        result returning seconds, capped at CACHE_DEFAULT_TTL (None: the
+        default), for results that go stale at a known time, e.g. when the
+        next show starts. """
+        key = self._versioned_key("fragment:" + name, tags)
+        entry = self.backend.get(key)
+        if entry is not None:
+            self._count("fragment", "hits")
+            expires_at, value = entry
+            self._expires(expires_at)
+            return value
+        self._count("fragment", "misses")
+        value = producer()
+        seconds = ttl(value) if callable(ttl) else ttl
+        if seconds is None:
+            seconds = self.default_ttl
+        elif callable(ttl):
+            seconds = min(seconds, self.default_ttl)
+        expires_at = time.time() + seconds
+        self._expires(expires_at)
+        if seconds >= 1:
+            self.backend.set(key, (expires_at, value), seconds)
+        return value
+
+    def _page_ttl(self, ttl):
+        # Seconds left before the page's earliest fragment expires, if sooner.
+        ttl = ttl or self.default_ttl
+        expires_at = g.get("_cache_expires_at")
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        return ttl
+
+    def page(self, tags, ttl=None):
+        """ Cache a GET view's rendered body per path and query string. A
+        streamed page is stored once it was sent in full.
+
+        `tags(**view_args)` lists the tags the page depends on. A page is
+        kept no longer than the fragments it rendered. Pages are neither
+        served from nor stored into the cache while flash messages are
+        pending, since the layout renders them into the body. """
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**view_args):
+                if request.method != "GET" or session.get("_flashes"):
+                    return view(**view_args)
+                vary = ":".join(str(func()) for func in self._vary)
+                key = self._versioned_key(
+                    "page:{}:{}".format(vary, request.full_path), tags(**view_args)
+                )
+                body = self.backend.get(key)
+                if body is not None:
+                    self._count("page", "hits")
+                    return body
+                self._count("page", "misses")
+                body = view(**view_args)
+                page_ttl = self._page_ttl(ttl)
+                if page_ttl < 1:
+                    return body
+                if isinstance(body, str):
+                    if not request.environ.get(_DISCARD_PAGE):
+                        self.backend.set(key, body, page_ttl)
+                elif (
+                    isinstance(body, Response)
+                    and body.is_streamed
+                    and body.status_code == 200
+                    and not isinstance(self.backend, NullBackend)
+                ):
+                    body.response = self._tee(body.response, key, page_ttl, request.environ)
+                return body
+
+            return wrapper
+
+        return decorator
+
+    def _tee(self, chunks, key, ttl, environ):
+        """ Pass a streamed page through, storing it once it was sent in full
+        (and is no larger than CACHE_MAX_PAGE_SIZE characters) unless it was
+        discarded while it rendered. """
+        parts, size = [], 0
+        for chunk in chunks:
+            if parts is not None:
+                size += len(chunk)
+                if size <= self.max_page_size:
+                    parts.append(chunk)
+                else:
+                    parts = None
+            yield chunk
+        if environ.get(_DISCARD_PAGE):
+            return
+        if parts is not None and all(isinstance(part, str) for part in parts):
+            self.backend.set(key, "".join(parts), ttl)
+
+    def conditional(self, validator):
+        """ Answer a GET view with 304 Not Modified when the client's copy is
+        current, without running the view.
+
+        `validator(**view_args)` returns (version, last_modified): a cheap
+        value that changes whenever the page would (e.g. max(updated_at) and
+        row counts) and a naive UTC datetime or None. It may return None when
+        the page cannot be validated; the view then runs without validators.
+        The ETag also covers the `vary` functions (locale, time zone). """
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**view_args):
+                if request.method not in ("GET", "HEAD") or session.get("_flashes"):
+                    return view(**view_args)
+                current = validator(**view_args)
+                if current is None:
+                    return view(**view_args)
+                version, last_modified = current
+                vary = ":".join(str(func()) for func in self._vary)
+                etag = hashlib.sha1("{}|{}".format(vary, version).encode("utf-8")).hexdigest()
+                if last_modified is not None:
+                    last_modified = last_modified.replace(microsecond=0)
+                if _not_modified(etag, last_modified):
+                    self._count("conditional", "hits")
+                    response = current_app.response_class(status=304)
+                else:
+                    self._count("conditional", "misses")
+                    response = make_response(view(**view_args))
+                    if response.status_code != 200:
+                        return response
+                response.set_etag(etag, weak=True)
+                if last_modified is not None:
+                    response.last_modified = last_modified
+                # stored by browsers and proxies, but revalidated on every use
+                response.cache_control.no_cache = True
+                response.vary.update(("Accept-Language", "Cookie"))
+                return response
+
+            return wrapper
+
+        return decorator
+
+    def stats(self):
+        """ {"page": {"hits": n, "misses": n}, "fragment": {...}} """
+        with self._stats_lock:
+            stats = {}
+            for (namespace, outcome), count in self._stats.items():
+                stats.setdefault(namespace, {"hits": 0, "misses": 0})[outcome] = count
+            return stats
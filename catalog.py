@@ -0,0 +1,311 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import sys
+from datetime import datetime
+
+from flask import abort, current_app, jsonify, render_template, request
+from sqlalchemy import case, func
+
+from autocomplete import complete, index_name, unindex_name
+from counters import fresh
+from enums import Genres
+from extensions import cache, identities
+from matching import suggest, index_candidate, unindex_candidate
+from models import db, Artist, Show, Venue
+from pagination import keyset_page
+from search import index_instance, unindex_instance
+
+#----------------------------------------------------------------------------#
+# Catalog helpers.
+#----------------------------------------------------------------------------#
+# Shared by the venues, artists and shows blueprints.
+
+_GENRE_VALUES = frozenset(genre.value for genre in Genres)
+
+#----------------------------------------------------------------------------#
+# Cache invalidation.
+#----------------------------------------------------------------------------#
+# Pages are tagged "venues"/"artists"/"shows" (listings) and "venue:<id>"/
+# "artist:<id>" (detail pages). Detail pages also render their counterparts'
+# names and images, so renaming a venue invalidates the pages of every artist
+# that played there. Tags are collected before the commit (a deleted venue's
+# shows are gone after it) and invalidated once the commit succeeded.
+
+def venue_tags(*venue_ids):
+    artist_ids = db.session.query(Show.artist_id).filter(Show.venue_id.in_(venue_ids)).distinct()
+    return ["venues", "shows"] + ["venue:{}".format(venue_id) for venue_id in venue_ids] + [
+        "artist:{}".format(artist_id) for (artist_id,) in artist_ids
+    ]
+
+
+def artist_tags(*artist_ids):
+    venue_ids = db.session.query(Show.venue_id).filter(Show.artist_id.in_(artist_ids)).distinct()
+    return ["artists", "shows"] + ["artist:{}".format(artist_id) for artist_id in artist_ids] + [
+        "venue:{}".format(venue_id) for (venue_id,) in venue_ids
+    ]
+
+
+#----------------------------------------------------------------------------#
+# Conditional GET.
+#----------------------------------------------------------------------------#
+# Validators for the catalog pages (cache.conditional): one small query over
+# the updated_at indexes and row counts, so a 304 runs neither the page's
+# queries nor its template. Show writes refresh the venue and artist counters,
+# which bumps their updated_at, so shows need no count of their own. Detail
+# pages whose counters went stale (a show started since) are not validated:
+# their past/upcoming split changes with the clock. Suggestion panels are not
+# covered and, as with the page cache, may lag behind edits to other rows.
+
+def _latest(*stamps):
+    stamps = [stamp for stamp in stamps if stamp is not None]
+    return max(stamps) if stamps else None
+
+
+def listing_version(*models):
+    columns = []
+    for model in models:
+        columns.append(db.session.query(func.max(model.updated_at)).as_scalar())
+        columns.append(db.session.query(func.count(model.id)).as_scalar())
+    row = db.session.query(*columns).one()
+    return tuple(row), _latest(*row[::2])
+
+
+def shows_version():
+    version, last_modified = listing_version(Venue, Artist)
+    # ?upcoming=1 changes whenever the next show starts
+    next_start = db.session.query(func.min(Show.start_time)).filter(
+        Show.start_time >= datetime.now()
+    )
+    latest_show, next_start = db.session.query(
+        db.session.query(func.max(Show.updated_at)).as_scalar(), next_start.as_scalar()
+    ).one()
+    return version + (latest_show, next_start), _latest(last_modified, latest_show)
+
+
+def detail_version(model, record_id, counterpart, owner_fk, counterpart_fk):
+    counterparts = (
+        db.session.query(func.max(counterpart.updated_at))
+        .select_from(Show)
+        .join(counterpart, counterpart_fk == counterpart.id)
+        .filter(owner_fk == record_id)
+        .as_scalar()
+    )
+    row = (
+        db.session.query(model.updated_at, model.next_show_at, counterparts.label("counterparts"))
+        .filter(model.id == record_id)
+        .first()
+    )
+    if row is None or not fresh(row):
+        return None
+    return tuple(row), _latest(row.updated_at, row.counterparts)
+
+
+#----------------------------------------------------------------------------#
+# In-process indexes.
+#----------------------------------------------------------------------------#
+# Search (SQLite fallback), matchmaking, typeahead and the identity cache keep
+# per-worker copies of venues and artists; the create/edit/delete handlers
+# update them once the commit succeeded.
+
+def reindex(instance):
+    identities.invalidate(type(instance), instance.id)
+    index_instance(instance)
+    index_candidate(instance)
+    index_name(instance)
+
+
+def unindex(model, instance_id):
+    identities.invalidate(model, instance_id)
+    unindex_instance(model, instance_id)
+    unindex_candidate(model, instance_id)
+    unindex_name(model, instance_id)
+
+
+def autocomplete(model):
+    # e.g. /artists/autocomplete?q=wild+sa -> {"results": [{"id", "name", "city", "state"}]}
+    config = current_app.config
+    limit = request.args.get("limit", type=int, default=config["AUTOCOMPLETE_LIMIT"])
+    limit = min(max(limit, 1), 50)
+    results = complete(
+        model, request.args.get("q", ""), limit, max_age=config["AUTOCOMPLETE_INDEX_MAX_AGE"]
+    )
+    return jsonify({"results": results})
+
+
+#----------------------------------------------------------------------------#
+# Listings and detail pages.
+#----------------------------------------------------------------------------#
+
+def _genre_filtered(model, genre_model, genre_fk, genres, state, city):
+    """ Query (id, name) of `model` rows having every genre in `genres`, each
+    genre resolved through the (genre, <fk>) index of its association table. """
+    query = db.session.query(model.id, model.name)
+    for genre in genres:
+        query = query.filter(
+            model.id.in_(db.session.query(genre_fk).filter(genre_model.genre == genre))
+        )
+    if state:
+        query = query.filter(model.state == state)
+    if city:
+        query = query.filter(model.city == city)
+    return query
+
+
+def _genre_facets(model, genre_model, genre_fk, filtered):
+    """ [(genre, count)] over the rows matched by `filtered`. """
+    return (
+        db.session.query(genre_model.genre, func.count())
+        .filter(genre_fk.in_(filtered.with_entities(model.id)))
+        .group_by(genre_model.genre)
+        .order_by(genre_model.genre)
+        .all()
+    )
+
+
+def filter_listing(model, genre_model, genre_fk, template):
+    genres = request.args.getlist("genre")
+    state = request.args.get("state", "").strip()
+    city = request.args.get("city", "").strip()
+    if any(genre not in _GENRE_VALUES for genre in genres):
+        abort(400)
+    filtered = _genre_filtered(model, genre_model, genre_fk, genres, state, city)
+    try:
+        page = keyset_page(
+            filtered,
+            [model.name, model.id],
+            key=lambda row: (row.name, row.id),
+            per_page=current_app.config["LISTING_PER_PAGE"],
+            after=request.args.get("after"),
+            before=request.args.get("before"),
+        )
+    except ValueError:
+        abort(400)
+    return render_template(
+        template,
+        results=page.items,
+        page=page,
+        facets=_genre_facets(model, genre_model, genre_fk, filtered),
+        genres=genres,
+        state=state,
+        city=city,
+    )
+
+
+def show_partitions(owner_fk, owner_id, counterpart, counterpart_fk, prefix, past_limit,
+                    counts=None, now=None):
+    """ Past and upcoming shows of one venue/artist, with the counterpart's
+    id, name and image from the identity cache: (past, upcoming, past_count,
+    upcoming_count).
+
+    Past shows are most recent first and capped at `past_limit` (None: no cap);
+    upcoming shows are soonest first and capped at UPCOMING_SHOWS_LIMIT.
+    Shows starting before `now` (default: datetime.now(), the clock fresh()
+    uses) are past.
+
+    Both lists are always read. A list shorter than its cap holds every such
+    show, so it is its own total; only a capped list needs `counts`, the
+    stored (past, upcoming) totals when the counters are fresh, and they are
+    counted here when missing or short of the rows read. A missed counter
+    refresh thus costs a query, never a page without its shows. """
+    now = now or datetime.now()
+    upcoming_limit = current_app.config["UPCOMING_SHOWS_LIMIT"]
+    base = db.session.query(counterpart_fk.label("id"), Show.start_time).filter(
+        owner_fk == owner_id
+    )
+    past = base.filter(Show.start_time < now).order_by(Show.start_time.desc())
+    upcoming = base.filter(Show.start_time >= now).order_by(Show.start_time)
+    if past_limit is not None:
+        past = past.limit(past_limit)
+    if upcoming_limit is not None:
+        upcoming = upcoming.limit(upcoming_limit)
+    past, upcoming = past.all(), upcoming.all()
+
+    lists = ((past, past_limit), (upcoming, upcoming_limit))
+    totals = [len(rows) if limit is None or len(rows) < limit else None for rows, limit in lists]
+    if None in totals:
+        if counts is None or any(count < len(rows) for count, (rows, _) in zip(counts, lists)):
+            counts = (
+                db.session.query(
+                    func.count(case([(Show.start_time < now, Show.id)])),
+                    func.count(case([(Show.start_time >= now, Show.id)])),
+                )
+                .filter(owner_fk == owner_id)
+                .one()
+            )
+        totals = [count if total is None else total for total, count in zip(totals, counts)]
+    past_count, upcoming_count = totals
+    summaries = identities.get_many(counterpart, [row.id for row in past + upcoming])
+
+    def _to_dicts(rows):
+        return [
+            {
+                prefix + "_id": row.id,
+                prefix + "_name": summaries[row.id].name,
+                prefix + "_image_link": summaries[row.id].image_link,
+                "start_time": row.start_time,
+            }
+            for row in rows
+            if row.id in summaries
+        ]
+
+    return _to_dicts(past), _to_dicts(upcoming), past_count, upcoming_count
+
+
+def until_next_show(now):
+    """ Fragment ttl for show_partitions() results, which go stale once their
+    first upcoming show (if any) starts. """
+
+    def ttl(partitions):
+        upcoming = partitions[1]
+        return (upcoming[0]["start_time"] - now).total_seconds() if upcoming else None
+
+    return ttl
+
+
+def streamed_rows(rows):
+    """ `rows` (a yield_per query) for a page that renders them while it
+    streams out. A database error part way through ends the rows early
+    instead of cutting the page off mid-markup: it is logged, the session
+    rolled back and the page kept out of the cache. """
+    try:
+        for row in rows:
+            yield row
+    except Exception:
+        print(sys.exc_info())
+        db.session.rollback()
+        cache.discard_page()
+
+
+def past_shows_limit():
+    """ ?past_limit= overrides PAST_SHOWS_LIMIT, clamped to [0,
+    PAST_SHOWS_MAX_LIMIT] (0: counts only); 400 if it is not an integer. """
+    if "past_limit" not in request.args:
+        return current_app.config["PAST_SHOWS_LIMIT"]
+    try:
+        limit = int(request.args["past_limit"])
+    except ValueError:
+        abort(400)
+    return min(max(limit, 0), current_app.config["PAST_SHOWS_MAX_LIMIT"])
+
+
+def suggestions(owner, limit=None):
+    """ Suggested artists for a venue or venues for an artist (matching.py);
+    the detail pages render without the panel if matching fails. """
+    try:
+        return suggest(
+            owner,
+            limit or current_app.config["MATCHING_SUGGESTIONS"],
+            max_age=current_app.config["MATCHING_INDEX_MAX_AGE"],
+        )
+    except Exception:
+        print(sys.exc_info())
+        return []
+
+
+def suggestions_limit():
+    limit = request.args.get(
+        "limit", type=int, default=current_app.config["MATCHING_SUGGESTIONS"]
+    )
+    return min(max(limit, 1), 50)
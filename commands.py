@@ -0,0 +1,186 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import os
+import sys
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from assets import build as build_assets
+from counters import refresh as refresh_counters, roll_over
+from exporter import export, FORMATS as EXPORT_FORMATS, KINDS as EXPORT_KINDS
+from extensions import cache
+from models import db, Artist, Venue
+from templating import precompile
+
+#----------------------------------------------------------------------------#
+# CLI commands.
+#----------------------------------------------------------------------------#
+# Registered on the application by create_app().
+
+# Inject data to the Database
+# Flask CLI command to inject fake data "flask inject-data"
+@click.command('inject-data')
+@with_appcontext
+def _inject_init_data():
+      print("Start injecting data (artists, venues, shows) from 'data.py'")
+      from data import artists, venues, shows
+
+      os.system("color")
+
+      try:
+          for venue in venues:
+              db.session.add(venue)
+          print("\033[94mInjected {} venues\033[0m".format(len(venues)))
+          for artist in artists:
+              db.session.add(artist)
+          print("\033[94mInjected {} artists\033[0m".format(len(artists)))
+          for show in shows:
+              db.session.add(show)
+          print("\033[94mInjected {} shows\033[0m".format(len(shows)))
+          # the shows were added directly; compute the venue/artist counters
+          db.session.flush()
+          refresh_counters(Venue)
+          refresh_counters(Artist)
+          db.session.commit()
+          print("\033[92mData injection success.\033[0m")
+      except Exception:
+          print("\033[91m!Error during data injection.\033[0m")
+          db.session.rollback()
+          print("\033[93mData injection rolled back.\033[0m")
+          print(sys.exc_info())
+      finally:
+          db.session.close()
+
+# Flask CLI command to bulk load partner feeds, e.g.
+# "flask import --venues venues.csv --artists artists.jsonl --shows shows.csv"
+@click.command('import')
+@click.option('--venues', type=click.Path(exists=True, dir_okay=False), help='Venues .csv/.jsonl')
+@click.option('--artists', type=click.Path(exists=True, dir_okay=False), help='Artists .csv/.jsonl')
+@click.option('--shows', type=click.Path(exists=True, dir_okay=False), help='Shows .csv/.jsonl')
+@click.option('--batch-size', type=int,
+              help='Rows per insert batch and transaction (default: IMPORT_BATCH_SIZE)')
+@click.option('--rejects', type=click.File('w'), help='Write rejected rows here as JSON lines')
+@click.option('--copy/--no-copy', default=True, help='Load shows with COPY on PostgreSQL')
+@with_appcontext
+def _import_data(venues, artists, shows, batch_size, rejects, copy):
+      from importer import Importer
+
+      importer = Importer(
+          batch_size=batch_size or current_app.config["IMPORT_BATCH_SIZE"],
+          rejects=rejects,
+          use_copy=copy,
+      )
+      steps = [
+          (venues, importer.import_venues),
+          (artists, importer.import_artists),
+          (shows, importer.import_shows),
+      ]
+      for path, run in steps:
+          if not path:
+              continue
+          report = run(path)
+          click.secho(
+              "Imported {} {} from {} ({} rejected) in {:.1f}s, {:.0f} rows/s".format(
+                  report.inserted, report.kind, path, report.rejected,
+                  report.elapsed, report.rows_per_second,
+              ),
+              fg="green" if not report.rejected else "yellow",
+          )
+          for line, reason in report.rejects:
+              click.secho("  line {}: {}".format(line, reason), fg="red")
+          if report.rejected > len(report.rejects):
+              click.secho("  ... {} more".format(report.rejected - len(report.rejects)), fg="red")
+      if shows or venues or artists:
+          # Bulk inserts bypass the write paths; recompute every counter at once.
+          refresh_counters(Venue)
+          refresh_counters(Artist)
+          db.session.commit()
+      # Only reaches workers through a shared cache backend; per-process caches
+      # catch up within CACHE_DEFAULT_TTL.
+      cache.invalidate("venues", "artists", "shows")
+
+
+# Flask CLI command streaming the catalog out, e.g.
+# "flask export shows --format jsonl --output shows.jsonl --since 2026-10-01"
+@click.command('export')
+@click.argument('kind', type=click.Choice(EXPORT_KINDS))
+@click.option('--format', 'fmt', type=click.Choice(sorted(EXPORT_FORMATS)), default='csv',
+              show_default=True)
+@click.option('--output', type=click.File('w'), default='-', help='Output file (default: stdout)')
+@click.option('--since', type=click.DateTime(), help='Only rows updated since then (UTC)')
+@click.option('--batch-size', type=int,
+              help='Rows per cursor fetch and write (default: EXPORT_BATCH_SIZE)')
+@with_appcontext
+def _export_data(kind, fmt, output, since, batch_size):
+      started = time.monotonic()
+      batch_size = batch_size or current_app.config["EXPORT_BATCH_SIZE"]
+      try:
+          for chunk in export(kind, fmt, since=since, batch_size=batch_size):
+              output.write(chunk)
+          click.secho(
+              "Exported {} in {:.1f}s".format(kind, time.monotonic() - started), fg="green", err=True
+          )
+      finally:
+          db.session.close()
+
+
+# Flask CLI command bundling, fingerprinting and precompressing the static
+# files into static/dist/ (see assets.py); run it on every deploy.
+@click.command('build-assets')
+@with_appcontext
+def _build_assets():
+      static_folder = current_app.static_folder
+      manifest = build_assets(static_folder)
+      for name, path in sorted(manifest["bundles"].items()):
+          size = os.path.getsize(os.path.join(static_folder, path))
+          click.secho("{} -> {} ({:.1f} KB)".format(name, path, size / 1024.0), fg="green")
+      click.secho("Fingerprinted {} files".format(len(manifest["files"])), fg="green")
+
+
+# Flask CLI command compiling every template into the bytecode cache
+# (TEMPLATE_BYTECODE_CACHE_DIR); run it with build-assets on every deploy.
+@click.command('precompile-templates')
+@with_appcontext
+def _precompile_templates():
+      started = time.monotonic()
+      names = precompile(current_app)
+      click.secho(
+          "Compiled {} templates in {:.2f}s into {}".format(
+              len(names), time.monotonic() - started,
+              current_app.config.get("TEMPLATE_BYTECODE_CACHE_DIR") or "memory only",
+          ),
+          fg="green",
+      )
+
+
+# Flask CLI command moving started shows from upcoming to past in the venue
+# and artist counters; run it periodically, e.g. every 5 minutes from cron.
+@click.command('rollover-shows')
+@with_appcontext
+def _rollover_shows():
+      try:
+          updated = roll_over()
+          db.session.commit()
+          click.secho(
+              "Rolled over {venues} venues and {artists} artists".format(**updated), fg="green"
+          )
+      except Exception:
+          db.session.rollback()
+          click.secho("Roll-over failed, rolled back.", fg="red")
+          print(sys.exc_info())
+      finally:
+          db.session.close()
+      cache.invalidate("venues")
+
+
+def register(app):
+    for command in (
+        _inject_init_data, _import_data, _export_data, _build_assets, _precompile_templates,
+        _rollover_shows,
+    ):
+        app.cli.add_command(command)
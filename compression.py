@@ -0,0 +1,105 @@
+# ----------------------------------------------------------------------------#
+# Imports
+# ----------------------------------------------------------------------------#
+
+import zlib
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header, parse_options_header
+
+# ----------------------------------------------------------------------------#
+# Response compression
+# ----------------------------------------------------------------------------#
+# A WSGI middleware gzipping response bodies for clients that accept it.
+# Every chunk the application yields is compressed and flushed (Z_SYNC_FLUSH)
+# before the next one is produced, so a streamed listing (templating.py)
+# reaches the browser compressed but as early as uncompressed, and memory
+# stays bounded by one chunk. Bodies already encoded (the precompressed
+# static bundles of assets.py), small ones and other content types are left
+# alone.
+
+# Statuses without a body, or with one that must not change.
+_SKIP_STATUSES = frozenset([204, 206, 304])
+
+
+def _accepts_gzip(environ):
+    return parse_accept_header(environ.get("HTTP_ACCEPT_ENCODING"))["gzip"] > 0
+
+
+def _compressed(app_iter, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        for chunk in app_iter:
+            if chunk:
+                yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+    finally:
+        if hasattr(app_iter, "close"):
+            app_iter.close()
+
+
+class _GzipMiddleware(object):
+    def __init__(self, wsgi_app, level, min_size, mimetypes):
+        self.wsgi_app = wsgi_app
+        self.level = level
+        self.min_size = min_size
+        self.mimetypes = frozenset(mimetypes)
+
+    def _compressible(self, status, headers):
+        if int(status.split(" ", 1)[0]) in _SKIP_STATUSES:
+            return False
+        if "Content-Encoding" in headers or "no-transform" in headers.get("Cache-Control", ""):
+            return False
+        if parse_options_header(headers.get("Content-Type"))[0] not in self.mimetypes:
+            return False
+        length = headers.get("Content-Length", type=int)
+        return length is None or length >= self.min_size
+
+    def __call__(self, environ, start_response):
+        if environ.get("REQUEST_METHOD") == "HEAD" or not _accepts_gzip(environ):
+            return self.wsgi_app(environ, start_response)
+        compress = []
+
+        def _start_response(status, headers, exc_info=None):
+            headers = Headers(headers)
+            if self._compressible(status, headers):
+                compress.append(True)
+                headers.remove("Content-Length")
+                headers["Content-Encoding"] = "gzip"
+                vary = headers.get("Vary")
+                if not vary:
+                    headers["Vary"] = "Accept-Encoding"
+                elif "accept-encoding" not in vary.lower():
+                    headers["Vary"] = vary + ", Accept-Encoding"
+                # the gzipped body is another representation of the resource
+                etag = headers.get("ETag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = "W/" + etag
+            return start_response(status, headers.to_wsgi_list(), exc_info)
+
+        app_iter = self.wsgi_app(environ, _start_response)
+        if not compress:
+            return app_iter
+        return _compressed(app_iter, self.level)
+
+
+class Compress(object):
+    """ gzip responses configured from COMPRESS_* settings:
+
+    COMPRESS_LEVEL      zlib level, 1 (fastest) to 9 (smallest)
+    COMPRESS_MIN_SIZE   bodies shorter than this many bytes are sent as is
+                        (streamed bodies, of unknown length, are compressed)
+    COMPRESS_MIMETYPES  content types to compress """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.wsgi_app = _GzipMiddleware(
+            app.wsgi_app,
+            app.config.get("COMPRESS_LEVEL", 6),
+            app.config.get("COMPRESS_MIN_SIZE", 500),
+            app.config.get("COMPRESS_MIMETYPES", ["text/html"]),
+        )
+        app.extensions["compress"] = self
@@ -10,5 +10,119 @@ DEBUG = True
 
 
 # TODO IMPLEMENT DATABASE URL
-SQLALCHEMY_DATABASE_URI = 'postgresql://postgres@localhost:5432/fyuur'
-SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'postgresql://postgres@localhost:5432/fyuur')
+SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Connection pool of every engine, per worker process. Keep
+# workers * (pool_size + max_overflow) below the server's max_connections.
+# pool_timeout is how long a request waits for a free connection before
+# failing; pool_recycle/pool_pre_ping drop connections the server or a proxy
+# closed. Ignored for SQLite, which uses its own pools.
+SQLALCHEMY_ENGINE_OPTIONS = {
+    "pool_size": int(os.environ.get("DATABASE_POOL_SIZE", 10)),
+    "max_overflow": int(os.environ.get("DATABASE_MAX_OVERFLOW", 20)),
+    "pool_timeout": int(os.environ.get("DATABASE_POOL_TIMEOUT", 5)),
+    "pool_recycle": int(os.environ.get("DATABASE_POOL_RECYCLE", 1800)),
+    "pool_pre_ping": os.environ.get("DATABASE_POOL_PRE_PING", "1") == "1",
+}
+
+# Read replicas, comma separated. Views marked @db.replica_reads read from
+# one of them (see routing.py); everything else uses the primary.
+SQLALCHEMY_BINDS = {
+    "replica_{}".format(number): url
+    for number, url in enumerate(
+        url.strip() for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+    )
+}
+
+# Maximum number of ranked hits returned by the venue/artist search pages, and
+# how long a worker's in-process search index (SQLite only, search.py) may
+# serve before it is rebuilt to pick up edits made in other workers (seconds).
+SEARCH_RESULT_LIMIT = 50
+SEARCH_INDEX_MAX_AGE = 600
+
+# Number of shows rendered per /shows page (keyset paginated).
+SHOWS_PER_PAGE = 30
+
+# Caps on the show tiles rendered on venue/artist detail pages (None: no cap).
+# Totals are still counted in full; ?past_limit= overrides the past cap, up
+# to PAST_SHOWS_MAX_LIMIT.
+PAST_SHOWS_LIMIT = 20
+PAST_SHOWS_MAX_LIMIT = 500
+UPCOMING_SHOWS_LIMIT = 50
+
+# Number of venues/artists per page on the genre filter listings.
+LISTING_PER_PAGE = 30
+
+# Link the hashed bundles built by "flask build-assets" (static/dist/) when
+# present; off, every source stylesheet and script is linked as is.
+ASSETS_BUNDLED = os.environ.get("ASSETS_BUNDLED", "1") == "1"
+
+# Compiled templates are kept here across processes (templating.py; None
+# disables it); "flask precompile-templates" fills it at build time. With
+# TEMPLATE_WARM_UP each new app loads every template before its first request.
+TEMPLATE_BYTECODE_CACHE_DIR = os.environ.get(
+    "TEMPLATE_BYTECODE_CACHE_DIR", os.path.join(basedir, ".jinja_cache")
+)
+TEMPLATE_WARM_UP = os.environ.get("TEMPLATE_WARM_UP", "1") == "1"
+
+# Page/fragment cache (see cache.py): "lru" (per process), "redis" (shared
+# between workers, CACHE_REDIS_URL; needs the `redis` package) or "null"
+# (disabled).
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "lru")
+CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_MAX_ENTRIES = 2048
+CACHE_DEFAULT_TTL = 300
+# Streamed listings longer than this (characters) are sent but not cached.
+CACHE_MAX_PAGE_SIZE = 4 * 1024 * 1024
+
+# gzip responses on the fly (compression.py) for clients that accept it:
+# level (1-9), smallest body worth compressing (bytes) and the content types.
+# Streamed pages are flushed chunk by chunk, so they still render as they
+# arrive.
+COMPRESS_LEVEL = 6
+COMPRESS_MIN_SIZE = 500
+COMPRESS_MIMETYPES = [
+    "text/html", "text/css", "text/csv", "text/plain", "application/javascript",
+    "application/json", "application/x-ndjson", "image/svg+xml",
+]
+
+# Venue/artist summaries (name, image, city, state, genres) kept per worker
+# by id for show listings (identity.py): how many, and for how long an edit
+# made in another worker may go unseen (seconds).
+IDENTITY_CACHE_MAX_ENTRIES = 10000
+IDENTITY_CACHE_TTL = 60
+
+# Locales the `datetime` filter may render in; the first one is the default.
+SUPPORTED_LOCALES = ["en_US"]
+
+# Suggested artists/venues on detail pages (matching.py), and how long a
+# worker's matching index may serve before it is rebuilt to pick up edits
+# made in other workers (seconds).
+MATCHING_SUGGESTIONS = 6
+MATCHING_INDEX_MAX_AGE = 600
+
+# Typeahead suggestions per request (autocomplete.py), and how long a
+# worker's name index may serve before it is reloaded (seconds).
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_INDEX_MAX_AGE = 600
+
+# Most shows one POST /shows/schedule may book.
+SCHEDULE_MAX_SHOWS = 500
+
+# Rows per batch (and per transaction) for "flask import".
+IMPORT_BATCH_SIZE = 5000
+
+# Rows per server-side cursor fetch (and per streamed chunk) for the
+# /export/<kind>.<format> endpoints and "flask export".
+EXPORT_BATCH_SIZE = 1000
+
+# /metrics flags a request as N+1 when one SQL statement runs more than this
+# many times in it.
+INSTRUMENTATION_N_PLUS_ONE_THRESHOLD = 10
+
+# JSON API (api.py): records per page by default and at most, and most
+# records (or ids) one request may create, update or fetch.
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+API_MAX_BATCH_SIZE = 500
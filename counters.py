@@ -0,0 +1,80 @@
+# ----------------------------------------------------------------------------#
+# Imports
+# ----------------------------------------------------------------------------#
+
+from datetime import datetime
+
+from sqlalchemy import and_, func, select
+
+from models import db, Artist, Venue, Show
+
+# ----------------------------------------------------------------------------#
+# Denormalized show counters
+# ----------------------------------------------------------------------------#
+# Venue and Artist carry upcoming_shows_count, past_shows_count and
+# next_show_at so listing and search pages read a column instead of counting
+# shows. They are recomputed set-based, in the writer's transaction, for the
+# venues/artists a show write touches, and by a periodic roll-over for rows
+# whose next show has started since (next_show_at <= now, which is indexed).
+# "Now" is the application's clock (naive local time, as start_time is
+# stored), never the database's, so the counters, fresh() and the pages'
+# past/upcoming queries all split shows at the same instant.
+
+_SHOW_FK = {
+    Venue: Show.venue_id,
+    Artist: Show.artist_id,
+}
+
+
+def _counter_values(model, now):
+    fk = _SHOW_FK[model]
+    table = model.__table__
+    shows = Show.__table__
+    upcoming = and_(fk == table.c.id, shows.c.start_time >= now)
+    past = and_(fk == table.c.id, shows.c.start_time < now)
+    return {
+        "upcoming_shows_count": select([func.count(shows.c.id)]).where(upcoming).as_scalar(),
+        "past_shows_count": select([func.count(shows.c.id)]).where(past).as_scalar(),
+        "next_show_at": select([func.min(shows.c.start_time)]).where(upcoming).as_scalar(),
+    }
+
+
+def refresh(model, ids=None, whereclause=None, now=None):
+    """ Recompute the counters of `model` rows in the current session's
+    transaction: the rows in `ids`, the rows matching `whereclause`, or every
+    row when neither is given, as of `now` (default: datetime.now()). Returns
+    the number of rows updated. """
+    table = model.__table__
+    stmt = table.update().values(**_counter_values(model, now or datetime.now()))
+    if ids is not None:
+        ids = [id for id in ids if id is not None]
+        if not ids:
+            return 0
+        stmt = stmt.where(table.c.id.in_(ids))
+    if whereclause is not None:
+        stmt = stmt.where(whereclause)
+    return db.session.execute(stmt).rowcount
+
+
+def refresh_for_show(venue_id, artist_id):
+    """ Keep counters correct after a show of (venue, artist) was added or removed. """
+    db.session.flush()
+    refresh(Venue, ids=[venue_id])
+    refresh(Artist, ids=[artist_id])
+
+
+def roll_over(now=None):
+    """ Move started shows from upcoming to past on every stale row. """
+    now = now or datetime.now()
+    return {
+        model.__tablename__: refresh(
+            model, whereclause=model.__table__.c.next_show_at <= now, now=now
+        )
+        for model in (Venue, Artist)
+    }
+
+
+def fresh(instance, now=None):
+    """ Whether `instance`'s counters still hold: none of its upcoming shows
+    has started since they were last computed. """
+    return instance.next_show_at is None or instance.next_show_at > (now or datetime.now())
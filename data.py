@@ -1,11 +1,12 @@
+from datetime import datetime
+
 from models import Artist, Venue, Show
-from random import randint as rd
 
 
 venues = [
     Venue(
         name="The Musical Hop",
-        genres=",".join(["Jazz", "Reggae", "Swing", "Classical", "Folk"]),
+        genres=["Jazz", "Reggae", "Classical", "Folk"],
         address="1015 Folsom Street",
         city="San Francisco",
         state="CA",
@@ -20,7 +21,7 @@ venues = [
     ),
     Venue(
         name="The Dueling Pianos Bar",
-        genres=",".join(["Classical", "R&B", "Hip-Hop"]),
+        genres=["Classical", "R&B", "Hip-Hop"],
         address="335 Delancey Street",
         city="New York",
         state="NY",
@@ -33,7 +34,7 @@ venues = [
     ),
     Venue(
         name="Park Square Live Music & Coffee",
-        genres=",".join(["Rock n Roll", "Jazz", "Classical", "Folk"]),
+        genres=["Rock n Roll", "Jazz", "Classical", "Folk"],
         address="34 Whiskey Moore Ave",
         city="San Francisco",
         state="CA",
@@ -48,7 +49,7 @@ venues = [
 artists = [
     Artist(
         name="Guns N Petals",
-        genres=",".join(["Rock n Roll"]),
+        genres=["Rock n Roll"],
         city="San Francisco",
         state="CA",
         phone="326-123-5000",
@@ -61,7 +62,7 @@ artists = [
     ),
     Artist(
         name="Matt Quevedo",
-        genres=",".join(["Jazz"]),
+        genres=["Jazz"],
         city="New York",
         state="NY",
         phone="300-400-5000",
@@ -72,7 +73,7 @@ artists = [
     ),
     Artist(
         name="The Wild Sax Band",
-        genres=",".join(["Jazz", "Classical"]),
+        genres=["Jazz", "Classical"],
         city="San Francisco",
         state="CA",
         phone="432-325-5432",
@@ -82,11 +83,16 @@ artists = [
     ),
 ]
 
+# Past and upcoming shows, no two of a venue or of an artist at the same time
+# (PostgreSQL rejects overlapping bookings).
 shows = [
-    Show(
-        venue_id=str(rd(1, 3)),
-        artist_id=str(rd(1, 3)),
-        start_time="20" + str(rd(17, 23)) + "-05-21T21:30:00.000Z",
-    )
-    for a in range(5)
+    Show(venue=venues[venue], artist=artists[artist], start_time=start_time)
+    for venue, artist, start_time in [
+        (0, 0, datetime(2019, 5, 21, 21, 30)),
+        (1, 1, datetime(2019, 5, 21, 21, 30)),
+        (2, 2, datetime(2020, 6, 15, 20, 0)),
+        (0, 1, datetime(2035, 4, 1, 20, 0)),
+        (1, 2, datetime(2035, 4, 1, 20, 0)),
+        (2, 0, datetime(2035, 4, 8, 21, 0)),
+    ]
 ]
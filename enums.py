@@ -82,4 +82,5 @@ class Genres(enum.Enum):
 
     @classmethod
     def choices(choices):
-        return [(choice.name, choice.name) for choice in choices]
+        # Genres are stored by value ("Hip-Hop"), so the form posts values too.
+        return [(choice.value, choice.value) for choice in choices]
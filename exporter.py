@@ -0,0 +1,138 @@
+# ----------------------------------------------------------------------------#
+# Imports
+# ----------------------------------------------------------------------------#
+
+import csv
+import io
+import json
+from collections import defaultdict
+
+from models import db, Artist, ArtistGenre, Venue, VenueGenre, Show
+
+# ----------------------------------------------------------------------------#
+# Streaming export
+# ----------------------------------------------------------------------------#
+# Venues, artists and shows are read in primary-key order through a
+# server-side cursor (yield_per) and written out one batch at a time, as CSV
+# with a header row or as JSON Lines, so memory stays bounded by the batch
+# size however large the table is. The output reads back with "flask import"
+# (genres are comma separated in CSV). `since` limits an export to the rows
+# updated since a point in time, for incremental loads.
+
+FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+# kind -> (model, genre model and fk or None, exported columns)
+_KINDS = {
+    "venues": (
+        Venue,
+        (VenueGenre, VenueGenre.venue_id),
+        [
+            "id", "name", "city", "state", "address", "phone", "genres", "image_link",
+            "facebook_link", "website", "seeking_talent", "seeking_description", "updated_at",
+        ],
+    ),
+    "artists": (
+        Artist,
+        (ArtistGenre, ArtistGenre.artist_id),
+        [
+            "id", "name", "city", "state", "phone", "genres", "image_link", "facebook_link",
+            "website", "seeking_venue", "seeking_description", "updated_at",
+        ],
+    ),
+    "shows": (
+        Show,
+        None,
+        ["id", "venue_id", "artist_id", "start_time", "duration_minutes", "updated_at"],
+    ),
+}
+
+KINDS = sorted(_KINDS)
+
+
+def _batches(kind, since, batch_size):
+    """ Yield lists of row tuples of `kind` (in the order of its exported
+    columns), `batch_size` rows at a time. """
+    model, genres, fields = _KINDS[kind]
+    columns = [getattr(model, field) for field in fields if field != "genres"]
+    query = db.session.query(*columns).order_by(model.id)
+    if since is not None:
+        query = query.filter(model.updated_at >= since)
+    batch = []
+    for row in query.yield_per(batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield with_genres(batch, genres, fields)
+            batch = []
+    if batch:
+        yield with_genres(batch, genres, fields)
+
+
+def with_genres(batch, genres, fields):
+    if genres is None:
+        return batch
+    genre_model, genre_fk = genres
+    by_id = defaultdict(list)
+    for record_id, genre in (
+        db.session.query(genre_fk, genre_model.genre)
+        .filter(genre_fk.in_([row.id for row in batch]))
+        .order_by(genre_fk, genre_model.genre)
+    ):
+        by_id[record_id].append(genre)
+    position = fields.index("genres")
+    return [row[:position] + (by_id[row.id],) + row[position:] for row in batch]
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def _converters(kind, fmt):
+    """ Per exported column, a function preparing its value for `fmt`, or None
+    to write it as is. """
+    model, _, fields = _KINDS[kind]
+    converters = []
+    for field in fields:
+        if field == "genres":
+            converters.append(",".join if fmt == "csv" else None)
+            continue
+        column_type = getattr(model, field).type
+        if isinstance(column_type, db.DateTime):
+            converters.append(_isoformat)
+        elif isinstance(column_type, db.Boolean) and fmt == "csv":
+            converters.append(lambda value: "true" if value else "false")
+        else:
+            converters.append(None)
+    return converters
+
+
+def export(kind, fmt, since=None, batch_size=1000):
+    """ Yield `kind` ("venues", "artists" or "shows") as text chunks in `fmt`
+    ("csv" or "jsonl"), one chunk per batch of rows. """
+    if kind not in _KINDS:
+        raise ValueError("kind must be one of {}".format(", ".join(KINDS)))
+    if fmt not in FORMATS:
+        raise ValueError("format must be one of {}".format(", ".join(sorted(FORMATS))))
+    fields = _KINDS[kind][2]
+    converters = list(enumerate(_converters(kind, fmt)))
+    converters = [(position, convert) for position, convert in converters if convert is not None]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(fields)
+        yield buffer.getvalue()
+    for batch in _batches(kind, since, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        for row in batch:
+            values = list(row)
+            for position, convert in converters:
+                values[position] = convert(values[position])
+            if fmt == "csv":
+                writer.writerow(values)
+            else:
+                buffer.write(json.dumps(dict(zip(fields, values))))
+                buffer.write("\n")
+        yield buffer.getvalue()
@@ -0,0 +1,35 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from flask_wtf.csrf import CSRFProtect
+
+from assets import Assets
+from cache import Cache
+from compression import Compress
+from identity import IdentityCache
+from instrumentation import Instrumentation
+
+#----------------------------------------------------------------------------#
+# Extensions.
+#----------------------------------------------------------------------------#
+# Created unbound so the blueprints can import them; create_app() (app.py)
+# binds them to the application.
+
+# Add CSRFProtect Protection
+csrf = CSRFProtect()
+
+# Page/fragment cache, invalidated by the create/edit/delete handlers
+cache = Cache()
+
+# Venue/artist summaries by id, shared by the requests of this worker
+identities = IdentityCache()
+
+# Hashed, precompressed static bundles (flask build-assets)
+assets = Assets()
+
+# gzip, flushed chunk by chunk for streamed pages
+compress = Compress()
+
+# Per-endpoint latency, SQL and template metrics on /metrics
+instrumentation = Instrumentation()
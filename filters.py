@@ -0,0 +1,84 @@
+# ----------------------------------------------------------------------------#
+# Imports
+# ----------------------------------------------------------------------------#
+
+from datetime import datetime
+from functools import lru_cache
+
+from flask import g, has_request_context
+
+# ----------------------------------------------------------------------------#
+# Datetime filter
+# ----------------------------------------------------------------------------#
+# Listing pages format the same handful of show times over and over, so the
+# Babel pattern, locale and timezone objects are parsed once per process and
+# the formatted strings are memoized per (datetime, format, locale, tz). Babel
+# is imported on first use, which keeps it out of the app's startup time.
+
+DEFAULT_LOCALE = "en_US"
+
+FORMATS = {
+    "full": "EEEE MMMM, d, y 'at' h:mma",
+    "medium": "EE MM, dd, y h:mma",
+}
+
+
+@lru_cache(maxsize=64)
+def _pattern(format):
+    from babel.dates import parse_pattern
+
+    return parse_pattern(FORMATS.get(format, format))
+
+
+@lru_cache(maxsize=64)
+def _locale(identifier):
+    from babel import Locale
+
+    return Locale.parse(identifier)
+
+
+@lru_cache(maxsize=64)
+def _timezone(name):
+    from babel.dates import get_timezone
+
+    return get_timezone(name)
+
+
+def _to_datetime(value):
+    # ISO strings only: the pinned python-dateutil does not import on Python
+    # 3.10+, and every stored time is a datetime anyway.
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+@lru_cache(maxsize=8192)
+def _format(value, format, locale, timezone):
+    # Naive datetimes are the server's local time, as in counters.py (show
+    # times are compared with datetime.now()); astimezone() assumes the same.
+    if timezone is not None:
+        value = value.astimezone(_timezone(timezone))
+    return _pattern(format).apply(value, _locale(locale))
+
+
+def format_datetime(value, format="medium", locale=None, timezone=None):
+    """ Jinja `datetime` filter. `value` is a datetime (or an ISO string);
+    `format` is "full", "medium" or a Babel pattern. Locale and timezone
+    default to the ones chosen for the current request (g.locale/g.timezone);
+    naive datetimes are taken as the server's local time when converting to a
+    timezone. """
+    if value is None:
+        return ""
+    if has_request_context():
+        locale = locale or g.get("locale")
+        timezone = timezone or g.get("timezone")
+    return _format(_to_datetime(value), format, locale or DEFAULT_LOCALE, timezone)
+
+
+def valid_timezone(name):
+    """ `name` if it is a known timezone, else None. """
+    try:
+        _timezone(name)
+    except LookupError:
+        return None
+    return name
@@ -1,14 +1,39 @@
 from datetime import datetime
 from flask_wtf import FlaskForm
-from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField
-from wtforms.validators import DataRequired, URL, Length, Optional
+from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, DateField, IntegerField
+from wtforms.validators import DataRequired, URL, Length, Optional, NumberRange
 from enums import States, Genres
+from models import DEFAULT_SHOW_DURATION_MINUTES, MAX_SHOW_DURATION_MINUTES
 
 
 class ShowForm(FlaskForm):
     artist_id = StringField("artist_id", [DataRequired()])
     venue_id = StringField("venue_id", [DataRequired()])
     start_time = DateTimeField("start_time", [DataRequired()], default=datetime.today())
+    duration_minutes = IntegerField(
+        "duration_minutes",
+        [DataRequired(), NumberRange(1, MAX_SHOW_DURATION_MINUTES)],
+        default=DEFAULT_SHOW_DURATION_MINUTES,
+    )
+
+
+class ScheduleForm(FlaskForm):
+    # A residency: one show every `interval` days/weeks, `count` times and/or
+    # through `until`.
+    artist_id = StringField("artist_id", [DataRequired()])
+    venue_id = StringField("venue_id", [DataRequired()])
+    start_time = DateTimeField("start_time", [DataRequired()], default=datetime.today())
+    duration_minutes = IntegerField(
+        "duration_minutes",
+        [DataRequired(), NumberRange(1, MAX_SHOW_DURATION_MINUTES)],
+        default=DEFAULT_SHOW_DURATION_MINUTES,
+    )
+    frequency = SelectField(
+        "frequency", [DataRequired()], choices=[("weekly", "Weekly"), ("daily", "Daily")]
+    )
+    interval = IntegerField("interval", [DataRequired(), NumberRange(1, 52)], default=1)
+    count = IntegerField("count", [Optional(), NumberRange(1)])
+    until = DateField("until", [Optional()])
 
 
 class VenueForm(FlaskForm):
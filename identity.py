@@ -0,0 +1,139 @@
+# ----------------------------------------------------------------------------#
+# Imports
+# ----------------------------------------------------------------------------#
+
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict, namedtuple
+
+from models import db, Artist, ArtistGenre, Venue, VenueGenre
+
+# ----------------------------------------------------------------------------#
+# Identity cache
+# ----------------------------------------------------------------------------#
+# Show rows, show tiles and other listings only need a venue's or an artist's
+# name, image, city, state and genres. Those summaries are kept per worker by
+# primary key, so the same hot venues and artists are not fetched again on
+# every request: a lookup of many ids costs one query (plus one for genres)
+# for the ids not cached yet, and nothing once they are. Entries expire after
+# IDENTITY_CACHE_TTL seconds, which bounds how long an edit made in another
+# worker can go unseen; edits in this worker invalidate them at once.
+
+# Ids per IN (...) when loading misses.
+_CHUNK = 500
+
+_GENRES = {
+    Venue: (VenueGenre, VenueGenre.venue_id),
+    Artist: (ArtistGenre, ArtistGenre.artist_id),
+}
+
+# Immutable, since one instance is shared by every request of the worker.
+Summary = namedtuple("Summary", "id name image_link city state genres")
+
+
+def _load(model, ids):
+    """ {id: Summary} of the existing `model` rows among `ids`. """
+    genre_model, genre_fk = _GENRES[model]
+    rows = []
+    for offset in range(0, len(ids), _CHUNK):
+        rows.extend(
+            db.session.query(model.id, model.name, model.image_link, model.city, model.state)
+            .filter(model.id.in_(ids[offset:offset + _CHUNK]))
+        )
+    genres = defaultdict(list)
+    found = [row.id for row in rows]
+    for offset in range(0, len(found), _CHUNK):
+        for record_id, genre in (
+            db.session.query(genre_fk, genre_model.genre)
+            .filter(genre_fk.in_(found[offset:offset + _CHUNK]))
+            .order_by(genre_fk, genre_model.genre)
+        ):
+            genres[record_id].append(genre)
+    return {
+        row.id: Summary(row.id, row.name, row.image_link, row.city, row.state, tuple(genres[row.id]))
+        for row in rows
+    }
+
+
+class IdentityCache(object):
+    """ Read-through cache of venue/artist Summary records configured from
+    IDENTITY_CACHE_* settings:
+
+    IDENTITY_CACHE_MAX_ENTRIES  records kept per worker, least recently used
+                                evicted first
+    IDENTITY_CACHE_TTL          seconds a record may be served """
+
+    def __init__(self, app=None):
+        self.max_entries = 10000
+        self.ttl = 60
+        self._entries = OrderedDict()
+        self._stats = Counter()
+        self._lock = threading.Lock()
+        # bumped by every invalidation; a load that raced one is not stored
+        self._version = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_entries = app.config.get("IDENTITY_CACHE_MAX_ENTRIES", 10000)
+        self.ttl = app.config.get("IDENTITY_CACHE_TTL", 60)
+        app.extensions["identity_cache"] = self
+
+    def get(self, model, record_id):
+        """ Summary of one `model` row, or None when it does not exist. """
+        return self.get_many(model, [record_id]).get(record_id)
+
+    def get_many(self, model, ids):
+        """ {id: Summary} for the existing `model` rows among `ids`. """
+        found, missing = {}, []
+        now = time.monotonic()
+        with self._lock:
+            for record_id in set(ids):
+                entry = self._entries.get((model, record_id))
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end((model, record_id))
+                    found[record_id] = entry[1]
+                    continue
+                if entry is not None:
+                    del self._entries[(model, record_id)]
+                    self._stats["expired"] += 1
+                missing.append(record_id)
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += len(missing)
+            version = self._version
+        if not missing:
+            return found
+        loaded = _load(model, sorted(missing))
+        with self._lock:
+            if version == self._version:
+                expires_at = time.monotonic() + self.ttl
+                for record_id, summary in loaded.items():
+                    self._entries[(model, record_id)] = (expires_at, summary)
+                    self._entries.move_to_end((model, record_id))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats["evictions"] += 1
+        found.update(loaded)
+        return found
+
+    def invalidate(self, model, *ids):
+        """ Forget edited or deleted `model` rows. """
+        with self._lock:
+            self._version += 1
+            for record_id in ids:
+                self._entries.pop((model, record_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def stats(self):
+        """ {"hits", "misses", "expired", "evictions", "size"} """
+        with self._lock:
+            stats = {
+                outcome: self._stats[outcome]
+                for outcome in ("hits", "misses", "expired", "evictions")
+            }
+            stats["size"] = len(self._entries)
+            return stats
@@ -0,0 +1,391 @@
+# ----------------------------------------------------------------------------#
+# Imports
+# ----------------------------------------------------------------------------#
+
+import csv
+import io
+import json
+import time
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import func, select
+
+from enums import Genres, States
+from models import (
+    db, Artist, ArtistGenre, Venue, VenueGenre, Show,
+    DEFAULT_SHOW_DURATION_MINUTES, MAX_SHOW_DURATION_MINUTES,
+)
+from scheduling import Booking, describe, find_conflicts
+
+# ----------------------------------------------------------------------------#
+# Streaming bulk import
+# ----------------------------------------------------------------------------#
+# Source files (CSV with a header row, or JSON Lines) are read row by row and
+# written in batches through Core inserts, one transaction per batch, so memory
+# stays bounded by the batch size whatever the file size. Venue and artist rows
+# may carry a source "id"; shows reference those ids and are resolved through
+# the in-memory id map built while importing, falling back to ids already in
+# the database.
+
+_STATES = frozenset(state.value for state in States)
+_GENRES = frozenset(genre.value for genre in Genres)
+_TRUE = frozenset(["1", "true", "t", "yes", "y"])
+_FALSE = frozenset(["", "0", "false", "f", "no", "n"])
+
+
+class RowError(ValueError):
+    """ A source row failed validation. """
+
+
+class ImportReport(object):
+    """ Counters and rejected rows for one imported file. """
+
+    MAX_KEPT_REJECTS = 20
+
+    def __init__(self, kind, path):
+        self.kind = kind
+        self.path = path
+        self.inserted = 0
+        self.rejected = 0
+        self.rejects = []
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    def reject(self, line, reason, row, writer=None):
+        self.rejected += 1
+        if len(self.rejects) < self.MAX_KEPT_REJECTS:
+            self.rejects.append((line, reason))
+        if writer is not None:
+            writer.write(json.dumps({
+                "file": self.path, "line": line, "reason": reason, "row": row
+            }) + "\n")
+
+    def finish(self):
+        self.elapsed = time.monotonic() - self.started
+        return self
+
+    @property
+    def rows_per_second(self):
+        return (self.inserted + self.rejected) / self.elapsed if self.elapsed else 0.0
+
+
+def read_rows(path):
+    """ Yield (line number, row dict) from a .csv or .jsonl/.ndjson file. """
+    with io.open(path, newline="", encoding="utf-8") as source:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line, text in enumerate(source, 1):
+                if not text.strip():
+                    continue
+                try:
+                    row = json.loads(text)
+                except ValueError as e:
+                    yield line, RowError("invalid JSON: {}".format(e))
+                    continue
+                yield line, row if isinstance(row, dict) else RowError("not a JSON object")
+        elif path.endswith(".csv"):
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            raise ValueError("Unsupported file type (use .csv or .jsonl): {}".format(path))
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+# ----------------------------------------------------------------------------#
+# Row validation
+# ----------------------------------------------------------------------------#
+
+
+def _text(row, field, required=False, length=None):
+    value = row.get(field)
+    value = value.strip() if isinstance(value, str) else value
+    if value in (None, ""):
+        if required:
+            raise RowError("missing {}".format(field))
+        return None
+    value = str(value)
+    if length is not None and len(value) > length:
+        raise RowError("{} longer than {} characters".format(field, length))
+    return value
+
+
+def _boolean(row, field):
+    value = row.get(field)
+    if isinstance(value, bool):
+        return value
+    value = str(value if value is not None else "").strip().lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise RowError("{} is not a boolean: {!r}".format(field, row.get(field)))
+
+
+def _state(row):
+    state = (_text(row, "state", required=True) or "").upper()
+    if state not in _STATES:
+        raise RowError("unknown state {!r}".format(row.get("state")))
+    return state
+
+
+def _genres(row):
+    value = row.get("genres") or []
+    genres = value if isinstance(value, list) else str(value).split(",")
+    genres = [genre.strip() for genre in genres if genre and genre.strip()]
+    unknown = [genre for genre in genres if genre not in _GENRES]
+    if unknown:
+        raise RowError("unknown genres {}".format(", ".join(unknown)))
+    if not genres:
+        raise RowError("missing genres")
+    return list(dict.fromkeys(genres))
+
+
+def _integer(row, field):
+    value = row.get(field)
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        raise RowError("{} is not an integer: {!r}".format(field, value))
+
+
+def _datetime(row, field):
+    value = _text(row, field, required=True)
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise RowError("{} is not an ISO datetime: {!r}".format(field, value))
+    # Show times are stored naive, in the server's local time (counters.py).
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def _duration(row):
+    if not str(row.get("duration_minutes") or "").strip():
+        return DEFAULT_SHOW_DURATION_MINUTES
+    duration = _integer(row, "duration_minutes")
+    if not 0 < duration <= MAX_SHOW_DURATION_MINUTES:
+        raise RowError("duration_minutes out of range: {}".format(duration))
+    return duration
+
+
+# Column -> cleaner of its value in a row. The JSON API (api.py) validates
+# its writes, including partial updates, with the same tables.
+VENUE_FIELDS = {
+    "name": lambda row: _text(row, "name", required=True),
+    "city": lambda row: _text(row, "city", required=True, length=120),
+    "state": _state,
+    "address": lambda row: _text(row, "address", required=True, length=120),
+    "phone": lambda row: _text(row, "phone", length=120),
+    "image_link": lambda row: _text(row, "image_link", length=500),
+    "facebook_link": lambda row: _text(row, "facebook_link", length=120),
+    "website": lambda row: _text(row, "website", length=120),
+    "seeking_talent": lambda row: _boolean(row, "seeking_talent"),
+    "seeking_description": lambda row: _text(row, "seeking_description", length=500),
+}
+
+ARTIST_FIELDS = {
+    "name": lambda row: _text(row, "name", required=True),
+    "city": lambda row: _text(row, "city", required=True, length=120),
+    "state": _state,
+    "phone": lambda row: _text(row, "phone", length=120),
+    "image_link": lambda row: _text(row, "image_link", length=500),
+    "facebook_link": lambda row: _text(row, "facebook_link", length=120),
+    "website": lambda row: _text(row, "website", length=120),
+    "seeking_venue": lambda row: _boolean(row, "seeking_venue"),
+    "seeking_description": lambda row: _text(row, "seeking_description", length=500),
+}
+
+# venue_id/artist_id are only checked to be integers here.
+SHOW_FIELDS = {
+    "start_time": lambda row: _datetime(row, "start_time"),
+    "duration_minutes": _duration,
+    "venue_id": lambda row: _integer(row, "venue_id"),
+    "artist_id": lambda row: _integer(row, "artist_id"),
+}
+
+
+def clean(fields, row, only=None):
+    """ {column: value} of `row` cleaned with `fields` (one of the tables
+    above), for every column or those in `only`; raises RowError. """
+    return {field: fields[field](row) for field in (fields if only is None else only)}
+
+
+def clean_genres(row):
+    return _genres(row)
+
+
+def _clean_venue(row):
+    return clean(VENUE_FIELDS, row)
+
+
+def _clean_artist(row):
+    return clean(ARTIST_FIELDS, row)
+
+
+# ----------------------------------------------------------------------------#
+# Importer
+# ----------------------------------------------------------------------------#
+
+
+class Importer(object):
+    """ Imports venues, artists and shows files into the configured database.
+
+    `rejects` is an optional text stream receiving one JSON line per rejected
+    row. `use_copy` loads shows with COPY on PostgreSQL. """
+
+    def __init__(self, batch_size=5000, rejects=None, use_copy=True):
+        self.batch_size = batch_size
+        self.rejects = rejects
+        self.engine = db.engine
+        self.use_copy = use_copy and self.engine.dialect.name == "postgresql"
+        self.id_map = {Venue: {}, Artist: {}}
+        self._existing_ids = {}
+
+    # Venues and artists -------------------------------------------------------
+
+    def import_venues(self, path):
+        return self._import_entities(Venue, VenueGenre, "venue_id", _clean_venue, path)
+
+    def import_artists(self, path):
+        return self._import_entities(Artist, ArtistGenre, "artist_id", _clean_artist, path)
+
+    def _import_entities(self, model, genre_model, genre_fk, clean, path):
+        report = ImportReport(model.__tablename__, path)
+        for batch in _batches(read_rows(path), self.batch_size):
+            rows, genres, source_ids = [], [], []
+            for line, row in batch:
+                try:
+                    if isinstance(row, RowError):
+                        raise row
+                    cleaned, row_genres = clean(row), _genres(row)
+                except RowError as e:
+                    report.reject(line, str(e), row if isinstance(row, dict) else None, self.rejects)
+                    continue
+                rows.append(cleaned)
+                genres.append(row_genres)
+                source_ids.append(row.get("id"))
+            if not rows:
+                continue
+            with self.engine.begin() as conn:
+                ids = self._insert_returning_ids(conn, model.__table__, rows)
+                conn.execute(
+                    genre_model.__table__.insert(),
+                    [
+                        {genre_fk: new_id, "genre": genre}
+                        for new_id, row_genres in zip(ids, genres)
+                        for genre in row_genres
+                    ],
+                )
+            for source_id, new_id in zip(source_ids, ids):
+                if source_id not in (None, ""):
+                    self.id_map[model][str(source_id)] = new_id
+            report.inserted += len(rows)
+        return report.finish()
+
+    def _insert_returning_ids(self, conn, table, rows):
+        """ Insert `rows` in one statement; returns their ids in the order of
+        `rows`. Venues and artists have no unique column besides id, so ids
+        are matched to rows on every inserted value (rows equal in all of
+        them are interchangeable). """
+        fields = list(rows[0])
+        columns = [table.c[field] for field in fields]
+        if self.engine.dialect.name == "postgresql":
+            # RETURNING does not promise VALUES order
+            returned = conn.execute(table.insert().values(rows).returning(table.c.id, *columns))
+        else:
+            start = conn.execute(select([func.coalesce(func.max(table.c.id), 0)])).scalar()
+            conn.execute(table.insert(), rows)
+            # ids only grow, so of the rows equal to an imported one the
+            # newest are this batch's
+            returned = conn.execute(
+                select([table.c.id] + columns).where(table.c.id > start).order_by(table.c.id)
+            )
+        ids = defaultdict(list)
+        for row in returned:
+            ids[tuple(row[1:])].append(row[0])
+        return [ids[tuple(row[field] for field in fields)].pop() for row in reversed(rows)][::-1]
+
+    # Shows --------------------------------------------------------------------
+
+    def _resolve(self, model, row, field):
+        source_id = str(row.get(field) if row.get(field) is not None else "").strip()
+        if source_id in self.id_map[model]:
+            return self.id_map[model][source_id]
+        if model not in self._existing_ids:
+            with self.engine.connect() as conn:
+                self._existing_ids[model] = {
+                    existing_id for (existing_id,) in conn.execute(select([model.__table__.c.id]))
+                }
+        existing_id = _integer(row, field)
+        if existing_id not in self._existing_ids[model]:
+            raise RowError("unknown {} {!r}".format(field, row.get(field)))
+        return existing_id
+
+    def _clean_show(self, row):
+        return {
+            "start_time": _datetime(row, "start_time"),
+            "duration_minutes": _duration(row),
+            "venue_id": self._resolve(Venue, row, "venue_id"),
+            "artist_id": self._resolve(Artist, row, "artist_id"),
+        }
+
+    def import_shows(self, path):
+        # Shows overlapping a stored booking (or an earlier row of the same
+        # batch) of their venue or artist are rejected, see scheduling.py.
+        report = ImportReport(Show.__tablename__, path)
+        for batch in _batches(read_rows(path), self.batch_size):
+            lines, rows = [], []
+            for line, row in batch:
+                try:
+                    if isinstance(row, RowError):
+                        raise row
+                    rows.append(self._clean_show(row))
+                    lines.append((line, row))
+                except RowError as e:
+                    report.reject(line, str(e), row if isinstance(row, dict) else None, self.rejects)
+            if not rows:
+                continue
+            with self.engine.begin() as conn:
+                conflicts = find_conflicts(
+                    [Booking(None, **row) for row in rows], connection=conn
+                )
+                for index in sorted(conflicts):
+                    line, row = lines[index]
+                    report.reject(line, "overlaps " + describe(conflicts[index]), row, self.rejects)
+                rows = [row for index, row in enumerate(rows) if index not in conflicts]
+                if not rows:
+                    continue
+                if self.use_copy:
+                    self._copy_shows(conn, rows)
+                else:
+                    conn.execute(Show.__table__.insert(), rows)
+            report.inserted += len(rows)
+        return report.finish()
+
+    def _copy_shows(self, conn, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([
+                row["start_time"].isoformat(" "), row["duration_minutes"], row["venue_id"], row["artist_id"]
+            ])
+        buffer.seek(0)
+        cursor = conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                "COPY shows (start_time, duration_minutes, venue_id, artist_id) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        finally:
+            cursor.close()
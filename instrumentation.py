@@ -0,0 +1,255 @@
+# ----------------------------------------------------------------------------#
+# Imports
+# ----------------------------------------------------------------------------#
+
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from flask import (
+    Response,
+    before_render_template,
+    g,
+    has_request_context,
+    request,
+    request_finished,
+    request_started,
+    template_rendered,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# ----------------------------------------------------------------------------#
+# Metrics registry
+# ----------------------------------------------------------------------------#
+# A small in-process registry rendered in the Prometheus text format. Every
+# worker process keeps its own numbers; scrape each worker (or sum them in
+# Prometheus) when running several.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Metrics(object):
+    """ Thread-safe counters and histograms keyed by metric name and labels. """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}
+        self._counters = Counter()
+        self._histograms = {}
+
+    def counter(self, name, help):
+        self._meta[name] = ("counter", help, None)
+
+    def histogram(self, name, help, buckets):
+        self._meta[name] = ("histogram", help, tuple(buckets))
+
+    def inc(self, name, labels, amount=1):
+        with self._lock:
+            self._counters[(name, tuple(sorted(labels.items())))] += amount
+
+    def observe(self, name, labels, value):
+        buckets = self._meta[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            counts = self._histograms.get(key)
+            if counts is None:
+                # one slot per bucket plus +Inf, then the running sum
+                counts = self._histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            counts[bisect_left(buckets, value)] += 1
+            counts[-1] += value
+
+    def render(self, extra=()):
+        """ Prometheus text exposition; `extra` yields (name, type, help, [(labels, value)]). """
+        lines = []
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(counts) for key, counts in self._histograms.items()}
+        for name, (kind, help, buckets) in sorted(self._meta.items()):
+            lines.append("# HELP {} {}".format(name, help))
+            lines.append("# TYPE {} {}".format(name, kind))
+            if kind == "counter":
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append("{}{} {}".format(name, _labels(labels), _number(value)))
+                continue
+            for (metric, labels), counts in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ("+Inf",), counts):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else _number(bound)
+                    lines.append("{}_bucket{} {}".format(
+                        name, _labels(labels + (("le", le),)), cumulative
+                    ))
+                lines.append("{}_sum{} {}".format(name, _labels(labels), _number(counts[-1])))
+                lines.append("{}_count{} {}".format(name, _labels(labels), cumulative))
+        for name, kind, help, samples in extra:
+            lines.append("# HELP {} {}".format(name, help))
+            lines.append("# TYPE {} {}".format(name, kind))
+            for labels, value in samples:
+                lines.append("{}{} {}".format(name, _labels(tuple(sorted(labels.items()))), _number(value)))
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for key, value in labels
+    ) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ----------------------------------------------------------------------------#
+# Request instrumentation
+# ----------------------------------------------------------------------------#
+
+
+class RequestStats(object):
+    """ What one request spent, accumulated in `g`. """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.statements = Counter()
+        self.template_starts = []
+
+
+class Instrumentation(object):
+    """ Per-endpoint request latency, SQL query count and time, template
+    render time and N+1 detection, served on /metrics.
+
+    INSTRUMENTATION_N_PLUS_ONE_THRESHOLD  a statement executed more than this
+                                          many times in one request is logged
+                                          and counted as an N+1 pattern """
+
+    def __init__(self, app=None):
+        self.metrics = Metrics()
+        self.collectors = []
+        self.metrics.counter("fyyur_requests_total", "Requests by endpoint, method and status.")
+        self.metrics.histogram(
+            "fyyur_request_duration_seconds", "Total request latency.", LATENCY_BUCKETS
+        )
+        self.metrics.histogram(
+            "fyyur_sql_queries_per_request", "SQL statements executed per request.",
+            QUERY_COUNT_BUCKETS,
+        )
+        self.metrics.histogram(
+            "fyyur_sql_duration_seconds", "Time spent in SQL per request.", LATENCY_BUCKETS
+        )
+        self.metrics.histogram(
+            "fyyur_template_render_seconds", "Time spent rendering templates per request.",
+            LATENCY_BUCKETS,
+        )
+        self.metrics.counter(
+            "fyyur_n_plus_one_total", "Requests repeating one statement above the threshold."
+        )
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.threshold = app.config.get("INSTRUMENTATION_N_PLUS_ONE_THRESHOLD", 10)
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+        request_started.connect(self._request_started, app)
+        request_finished.connect(self._request_finished, app)
+        before_render_template.connect(self._before_render_template, app)
+        template_rendered.connect(self._template_rendered, app)
+        app.add_url_rule("/metrics", "metrics", self.metrics_view)
+        app.extensions["instrumentation"] = self
+
+    def collector(self, func):
+        """ Register `func()` -> [(name, type, help, [(labels, value)])] to be
+        rendered on every scrape, for numbers owned by other components. """
+        self.collectors.append(func)
+        return func
+
+    @staticmethod
+    def _stats():
+        return g.get("_request_stats") if has_request_context() else None
+
+    # SQLAlchemy engine events -------------------------------------------------
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self._stats() is not None:
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stats = self._stats()
+        if stats is None or not conn.info.get("query_started"):
+            return
+        stats.sql_time += time.perf_counter() - conn.info["query_started"].pop()
+        stats.queries += 1
+        stats.statements[statement] += 1
+
+    # Flask signals ------------------------------------------------------------
+
+    def _request_started(self, sender, **extra):
+        g._request_stats = RequestStats()
+
+    def _before_render_template(self, sender, template, context, **extra):
+        stats = self._stats()
+        if stats is not None:
+            stats.template_starts.append(time.perf_counter())
+
+    def _template_rendered(self, sender, template, context, **extra):
+        stats = self._stats()
+        if stats is not None and stats.template_starts:
+            elapsed = time.perf_counter() - stats.template_starts.pop()
+            # nested renders ({% include %} via render_template) count once
+            if not stats.template_starts:
+                stats.template_time += elapsed
+
+    def _request_finished(self, sender, response, **extra):
+        stats = self._stats()
+        if stats is None:
+            return
+        endpoint = {"endpoint": request.endpoint or "unmatched"}
+        labels = dict(endpoint, method=request.method, status=response.status_code)
+        if response.is_streamed and not response.direct_passthrough:
+            # A streamed page (templating.stream_template) renders, and
+            # queries, while it is sent, after this signal: record it once
+            # its body is exhausted or closed.
+            response.response = self._recorded(response.response, stats, endpoint, labels)
+        else:
+            self._record(stats, endpoint, labels)
+
+    def _recorded(self, body, stats, endpoint, labels):
+        try:
+            yield from body
+        finally:
+            self._record(stats, endpoint, labels)
+
+    def _record(self, stats, endpoint, labels):
+        self.metrics.inc("fyyur_requests_total", labels)
+        self.metrics.observe(
+            "fyyur_request_duration_seconds", endpoint, time.perf_counter() - stats.started
+        )
+        self.metrics.observe("fyyur_sql_queries_per_request", endpoint, stats.queries)
+        self.metrics.observe("fyyur_sql_duration_seconds", endpoint, stats.sql_time)
+        self.metrics.observe("fyyur_template_render_seconds", endpoint, stats.template_time)
+        repeated = [(s, n) for s, n in stats.statements.items() if n > self.threshold]
+        if repeated:
+            self.metrics.inc("fyyur_n_plus_one_total", endpoint)
+            for statement, count in repeated:
+                self.app.logger.warning(
+                    "Possible N+1 in %s: statement executed %d times: %s",
+                    endpoint["endpoint"], count, " ".join(statement.split()),
+                )
+
+    def metrics_view(self):
+        extra = [metric for collect in self.collectors for metric in collect()]
+        return Response(
+            self.metrics.render(extra), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
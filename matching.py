@@ -0,0 +1,345 @@
+# ----------------------------------------------------------------------------#
+# Imports
+# ----------------------------------------------------------------------------#
+
+import heapq
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import func
+
+from enums import Genres
+from models import db, Artist, ArtistGenre, Venue, VenueGenre, Show
+
+# ----------------------------------------------------------------------------#
+# Artist/venue matchmaking
+# ----------------------------------------------------------------------------#
+# Suggests venues for an artist and artists for a venue. A candidate scores
+#   GENRE_WEIGHT * |shared genres| / |genres of either|   (Jaccard)
+#   + CITY_WEIGHT (same city) or STATE_WEIGHT (same state only)
+#   + SEEKING_WEIGHT when it is seeking talent/a venue
+#   + up to HISTORY_WEIGHT for shows the two already played together.
+# Each worker keeps, per side, every row's genres as a bit-vector and buckets
+# ids by (vector, seeking), overall, per state and per (state, city). Ranking
+# scores the owner's booking history explicitly, then walks by decreasing best
+# possible score the owner's city buckets, its state's buckets, the buckets
+# sharing a genre and, last, the remaining buckets (seeking ones first), and
+# stops once no remaining bucket can beat the current top `limit`: a catalog
+# of 100k candidates is ranked from a few buckets.
+
+GENRE_BITS = {genre.value: 1 << position for position, genre in enumerate(Genres)}
+
+GENRE_WEIGHT = 3.0
+CITY_WEIGHT = 2.0
+STATE_WEIGHT = 1.0
+SEEKING_WEIGHT = 1.0
+HISTORY_WEIGHT = 1.0
+# Shows played together for the full history bonus.
+HISTORY_SATURATION = 5
+
+_GENRE_FK = {
+    Venue: VenueGenre.venue_id,
+    Artist: ArtistGenre.artist_id,
+}
+_SEEKING = {
+    Venue: Venue.seeking_talent,
+    Artist: Artist.seeking_venue,
+}
+# owner model -> (counterpart model, owner's shows fk, counterpart's shows fk)
+_COUNTERPART = {
+    Venue: (Artist, Show.venue_id, Show.artist_id),
+    Artist: (Venue, Show.artist_id, Show.venue_id),
+}
+
+
+def genre_mask(genres):
+    mask = 0
+    for genre in genres:
+        mask |= GENRE_BITS.get(genre, 0)
+    return mask
+
+
+def mask_genres(mask):
+    return [genre for genre, bit in GENRE_BITS.items() if mask & bit]
+
+
+def _popcount(mask):
+    return bin(mask).count("1")
+
+
+if hasattr(int, "bit_count"):  # Python 3.10+
+    _popcount = int.bit_count  # noqa: F811
+
+
+def _bound(key, mask):
+    """ Best genre + seeking score a bucket `key` can reach against `mask`. """
+    other, seeking = key
+    shared = other & mask
+    jaccard = _popcount(shared) / _popcount(other | mask) if shared else 0.0
+    return GENRE_WEIGHT * jaccard + (SEEKING_WEIGHT if seeking else 0.0)
+
+
+# Scopes of the rank() walk: the owner's city, the rest of its state, elsewhere.
+_CITY, _STATE, _ELSEWHERE = "city", "state", "elsewhere"
+
+
+def _city_key(state, city):
+    return (state, (city or "").strip().lower())
+
+
+class MatchIndex(object):
+    """ Genre bit-vectors, (state, city) and seeking flags of one side, with
+    ids bucketed by (genre vector, seeking) overall, per state and per city. """
+
+    def __init__(self):
+        self._entries = {}
+        self._by_key = defaultdict(set)
+        self._keys_by_bit = defaultdict(set)
+        self._by_state = defaultdict(lambda: defaultdict(set))
+        self._by_city = defaultdict(lambda: defaultdict(set))
+        # owner genre vector -> (bucket version, [(bound, key)] best first)
+        self._ordered_keys = {}
+        self._key_version = 0
+        self._lock = threading.Lock()
+        self.built_at = None
+
+    def build(self, records):
+        with self._lock:
+            self._entries.clear()
+            self._by_key.clear()
+            self._keys_by_bit.clear()
+            self._by_state.clear()
+            self._by_city.clear()
+            self._ordered_keys.clear()
+            for record in records:
+                self._add(record)
+            self.built_at = time.monotonic()
+
+    def add(self, record):
+        with self._lock:
+            self._remove(record["id"])
+            self._add(record)
+
+    def remove(self, candidate_id):
+        with self._lock:
+            self._remove(candidate_id)
+
+    def rank(self, mask, state, city, history, limit):
+        """ Top `limit` (score, id, shared genre mask, same city), best first;
+        `history` maps candidate ids to shows played with the owner. """
+        city_key = _city_key(state, city)
+        best = []
+
+        def consider(candidate_id):
+            candidate_mask, candidate_city, seeking = self._entries[candidate_id]
+            shared = candidate_mask & mask
+            score = 0.0
+            if shared:
+                score = GENRE_WEIGHT * _popcount(shared) / _popcount(candidate_mask | mask)
+            if candidate_city == city_key:
+                score += CITY_WEIGHT
+            elif candidate_city[0] == state:
+                score += STATE_WEIGHT
+            if seeking:
+                score += SEEKING_WEIGHT
+            if candidate_id in history:
+                played = min(history[candidate_id], HISTORY_SATURATION)
+                score += HISTORY_WEIGHT * played / HISTORY_SATURATION
+            entry = (score, -candidate_id, shared, candidate_city == city_key)
+            if len(best) < limit:
+                heapq.heappush(best, entry)
+            elif entry > best[0]:
+                heapq.heapreplace(best, entry)
+
+        with self._lock:
+            for candidate_id in history:
+                if candidate_id in self._entries:
+                    consider(candidate_id)
+            # (best possible score, ids, scope), best first per scope; a row
+            # is ranked from the groups of the narrowest scope it is in.
+            city_groups = sorted(
+                (
+                    (_bound(key, mask) + CITY_WEIGHT, ids, _CITY)
+                    for key, ids in self._by_city.get(city_key, {}).items()
+                ),
+                key=lambda group: group[0],
+                reverse=True,
+            )
+            state_groups = sorted(
+                (
+                    (_bound(key, mask) + STATE_WEIGHT, ids, _STATE)
+                    for key, ids in self._by_state.get(state, {}).items()
+                ),
+                key=lambda group: group[0],
+                reverse=True,
+            )
+            genre_groups = (
+                (best_possible, self._by_key[key], _ELSEWHERE)
+                for best_possible, key in self._sorted_keys(mask)
+            )
+            # no shared genre: only the seeking bonus is left
+            rest_groups = [
+                (SEEKING_WEIGHT, self._unshared(mask, True), _ELSEWHERE),
+                (0.0, self._unshared(mask, False), _ELSEWHERE),
+            ]
+            groups = heapq.merge(
+                city_groups, state_groups, genre_groups, rest_groups,
+                key=lambda group: group[0], reverse=True,
+            )
+            for best_possible, ids, scope in groups:
+                if len(best) >= limit and best_possible <= best[0][0]:
+                    break
+                for candidate_id in ids:
+                    if candidate_id in history:
+                        continue
+                    candidate_city = self._entries[candidate_id][1]
+                    if scope is _STATE and candidate_city == city_key:
+                        continue
+                    if scope is _ELSEWHERE and candidate_city[0] == state:
+                        continue
+                    consider(candidate_id)
+        return [
+            (score, -negative_id, shared, same_city)
+            for score, negative_id, shared, same_city in sorted(best, reverse=True)
+        ]
+
+    def _unshared(self, mask, seeking):
+        """ Ids of the buckets sharing no genre with `mask`, read lazily. """
+        for key, ids in self._by_key.items():
+            if key[1] == seeking and not key[0] & mask:
+                yield from ids
+
+    def _sorted_keys(self, mask):
+        """ Buckets sharing a genre with `mask` by genre and seeking score,
+        cached until a bucket is created or emptied. """
+        cached = self._ordered_keys.get(mask)
+        if cached is not None and cached[0] == self._key_version:
+            return cached[1]
+        keys = set()
+        for bit in GENRE_BITS.values():
+            if mask & bit:
+                keys.update(self._keys_by_bit.get(bit, ()))
+        ordered = sorted(((_bound(key, mask), key) for key in keys), reverse=True)
+        if len(self._ordered_keys) >= 1024:
+            self._ordered_keys.clear()
+        self._ordered_keys[mask] = (self._key_version, ordered)
+        return ordered
+
+    def _add(self, record):
+        mask = genre_mask(record["genres"])
+        city_key = _city_key(record["state"], record["city"])
+        key = (mask, bool(record["seeking"]))
+        self._entries[record["id"]] = (mask, city_key, key[1])
+        if key not in self._by_key:
+            self._key_version += 1
+        self._by_key[key].add(record["id"])
+        for bit in GENRE_BITS.values():
+            if mask & bit:
+                self._keys_by_bit[bit].add(key)
+        self._by_state[city_key[0]][key].add(record["id"])
+        self._by_city[city_key][key].add(record["id"])
+
+    def _remove(self, candidate_id):
+        entry = self._entries.pop(candidate_id, None)
+        if entry is None:
+            return
+        mask, city_key, seeking = entry
+        key = (mask, seeking)
+        self._by_key[key].discard(candidate_id)
+        if not self._by_key[key]:
+            del self._by_key[key]
+            self._key_version += 1
+            for bit in GENRE_BITS.values():
+                if mask & bit:
+                    self._keys_by_bit[bit].discard(key)
+        for groups, group_key in ((self._by_state, city_key[0]), (self._by_city, city_key)):
+            group = groups[group_key]
+            group[key].discard(candidate_id)
+            if not group[key]:
+                del group[key]
+            if not group:
+                del groups[group_key]
+
+
+_indexes = {Venue: MatchIndex(), Artist: MatchIndex()}
+
+
+def _record(instance):
+    return {
+        "id": instance.id,
+        "state": instance.state,
+        "city": instance.city,
+        "seeking": bool(getattr(instance, _SEEKING[type(instance)].key)),
+        "genres": list(instance.genres),
+    }
+
+
+def _ensure_built(model, max_age):
+    index = _indexes[model]
+    if index.built_at is not None:
+        if max_age is None or time.monotonic() - index.built_at < max_age:
+            return index
+    genre_fk = _GENRE_FK[model]
+    genres = defaultdict(list)
+    for candidate_id, genre in db.session.query(genre_fk, genre_fk.class_.genre).yield_per(5000):
+        genres[candidate_id].append(genre)
+    rows = db.session.query(model.id, model.state, model.city, _SEEKING[model].label("seeking"))
+    index.build(
+        dict(row._asdict(), genres=genres[row.id]) for row in rows.yield_per(5000)
+    )
+    return index
+
+
+# ----------------------------------------------------------------------------#
+# Public API
+# ----------------------------------------------------------------------------#
+
+
+def suggest(owner, limit, max_age=None):
+    """ Ranked counterparts of a Venue or Artist `owner`, as
+    [{"id", "name", "image_link", "city", "state", "seeking", "score",
+    "shared_genres", "same_city", "shows_together"}]. The index is rebuilt
+    when older than `max_age` seconds (edits made in other workers). """
+    counterpart, owner_fk, counterpart_fk = _COUNTERPART[type(owner)]
+    index = _ensure_built(counterpart, max_age)
+    history = dict(
+        db.session.query(counterpart_fk, func.count(Show.id))
+        .filter(owner_fk == owner.id)
+        .group_by(counterpart_fk)
+    )
+    ranked = index.rank(genre_mask(owner.genres), owner.state, owner.city, history, limit)
+    if not ranked:
+        return []
+    rows = {
+        row.id: row
+        for row in db.session.query(
+            counterpart.id, counterpart.name, counterpart.image_link,
+            counterpart.city, counterpart.state, _SEEKING[counterpart].label("seeking"),
+        ).filter(counterpart.id.in_([candidate_id for _, candidate_id, _, _ in ranked]))
+    }
+    return [
+        dict(
+            rows[candidate_id]._asdict(),
+            score=round(score, 3),
+            shared_genres=mask_genres(shared),
+            same_city=same_city,
+            shows_together=history.get(candidate_id, 0),
+        )
+        for score, candidate_id, shared, same_city in ranked
+        if candidate_id in rows
+    ]
+
+
+def index_candidate(instance):
+    """ Refresh a created or edited Venue/Artist in this worker's index. """
+    index = _indexes[type(instance)]
+    if index.built_at is not None:
+        index.add(_record(instance))
+
+
+def unindex_candidate(model, candidate_id):
+    """ Drop a deleted row from this worker's index. """
+    index = _indexes[model]
+    if index.built_at is not None:
+        index.remove(candidate_id)
@@ -0,0 +1,46 @@
+"""search indexes
+
+Revision ID: a3c91e5d7b20
+Revises: 75f2f849fdcb
+Create Date: 2026-10-18 09:12:41.207311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c91e5d7b20'
+down_revision = '75f2f849fdcb'
+branch_labels = None
+depends_on = None
+
+# Must match search.search_document() exactly for the planner to use it.
+SEARCH_DOCUMENT = (
+    "to_tsvector('simple', name || ' ' || city || ' ' || state || ' ' || genres)"
+)
+
+
+def upgrade():
+    # Full-text and trigram indexes only exist on PostgreSQL; other backends
+    # fall back to the in-process inverted index in search.py.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table in ('venues', 'artists'):
+        op.execute(
+            'CREATE INDEX ix_{0}_search_document ON {0} USING gin ({1})'.format(
+                table, SEARCH_DOCUMENT
+            )
+        )
+        op.execute(
+            'CREATE INDEX ix_{0}_name_trgm ON {0} USING gin (name gin_trgm_ops)'.format(table)
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in ('venues', 'artists'):
+        op.drop_index('ix_{}_name_trgm'.format(table), table_name=table)
+        op.drop_index('ix_{}_search_document'.format(table), table_name=table)
@@ -0,0 +1,235 @@
+"""genre tables
+
+Revision ID: b7d2e4f61c08
+Revises: a3c91e5d7b20
+Create Date: 2026-10-18 10:03:55.481920
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2e4f61c08'
+down_revision = 'a3c91e5d7b20'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+# Comma-joined genres were written both by enum name ("Hip_Hop", from the old
+# form choices) and by value ("Hip-Hop", from data.py); both map to the value.
+GENRES = [
+    ('Alternative', 'Alternative'),
+    ('Blues', 'Blues'),
+    ('Classical', 'Classical'),
+    ('Country', 'Country'),
+    ('Electronic', 'Electronic'),
+    ('Folk', 'Folk'),
+    ('Funk', 'Funk'),
+    ('Hip_Hop', 'Hip-Hop'),
+    ('Heavy_Metal', 'Heavy Metal'),
+    ('Instrumental', 'Instrumental'),
+    ('Jazz', 'Jazz'),
+    ('Musical_Theatre', 'Musical Theatre'),
+    ('Pop', 'Pop'),
+    ('Punk', 'Punk'),
+    ('R_B', 'R&B'),
+    ('Reggae', 'Reggae'),
+    ('Rock_n_Roll', 'Rock n Roll'),
+    ('Soul', 'Soul'),
+    ('Other', 'Other'),
+]
+
+# Spellings seen in hand-entered rows that name an enum genre. Extend it (raw
+# spelling: enum value) if the upgrade stops on rows it cannot map.
+GENRE_ALIASES = {
+    'Rap': 'Hip-Hop',
+    'Metal': 'Heavy Metal',
+    'Musical Theater': 'Musical Theatre',
+    'Rock and Roll': 'Rock n Roll',
+    'Rock & Roll': 'Rock n Roll',
+    'RnB': 'R&B',
+    'R and B': 'R&B',
+    'Rhythm and Blues': 'R&B',
+}
+
+
+def _key(genre):
+    # Case, spacing and punctuation insensitive: "hip hop" == "Hip-Hop".
+    return re.sub(r'[^a-z0-9&]+', '', genre.lower())
+
+
+GENRE_VALUES = {}
+for _name, _value in GENRES:
+    GENRE_VALUES[_key(_name)] = GENRE_VALUES[_key(_value)] = _value
+GENRE_VALUES.update((_key(alias), value) for alias, value in GENRE_ALIASES.items())
+
+# Unmapped rows listed in the upgrade's error, at most.
+MAX_REPORTED_ROWS = 50
+
+# (owner table, association table, fk column)
+OWNERS = [
+    ('venues', 'venue_genres', 'venue_id'),
+    ('artists', 'artist_genres', 'artist_id'),
+]
+
+OLD_SEARCH_DOCUMENT = (
+    "to_tsvector('simple', name || ' ' || city || ' ' || state || ' ' || genres)"
+)
+SEARCH_DOCUMENT = "to_tsvector('simple', name || ' ' || city || ' ' || state)"
+
+
+def _split(raw):
+    return [genre.strip() for genre in (raw or '').split(',') if genre.strip()]
+
+
+def _parse_genres(raw):
+    genres = []
+    for genre in _split(raw):
+        value = GENRE_VALUES[_key(genre)]
+        if value not in genres:
+            genres.append(value)
+    return genres
+
+
+def _owner_batches(bind, owner):
+    """ (id, genres) rows of `owner`, BATCH_SIZE at a time. """
+    owner_table = sa.table(owner, sa.column('id', sa.Integer), sa.column('genres', sa.String))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select([owner_table.c.id, owner_table.c.genres])
+            .where(owner_table.c.id > last_id)
+            .order_by(owner_table.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        yield rows
+        last_id = rows[-1].id
+
+
+def _check_genres(bind):
+    """ Stop before any change if a row holds a genre that maps to no enum
+    value, listing the offending rows, rather than dropping it. """
+    unmapped = []
+    for owner, _, _ in OWNERS:
+        for rows in _owner_batches(bind, owner):
+            for row in rows:
+                unknown = [genre for genre in _split(row.genres) if _key(genre) not in GENRE_VALUES]
+                if unknown:
+                    unmapped.append('{} {}: {}'.format(owner, row.id, ', '.join(unknown)))
+    if unmapped:
+        raise RuntimeError(
+            '{} row(s) hold genres outside enums.Genres; fix them or add the spellings '
+            'to GENRE_ALIASES:\n  {}{}'.format(
+                len(unmapped),
+                '\n  '.join(unmapped[:MAX_REPORTED_ROWS]),
+                '\n  ...' if len(unmapped) > MAX_REPORTED_ROWS else '',
+            )
+        )
+
+
+def _backfill(bind, owner, association, fk):
+    """ Copy comma-joined genres into `association`, BATCH_SIZE owners at a time. """
+    association_table = sa.table(
+        association, sa.column(fk, sa.Integer), sa.column('genre', sa.String)
+    )
+    for rows in _owner_batches(bind, owner):
+        values = [
+            {fk: row.id, 'genre': genre} for row in rows for genre in _parse_genres(row.genres)
+        ]
+        if values:
+            bind.execute(association_table.insert(), values)
+
+
+def _restore(bind, owner, association, fk):
+    """ Rebuild the comma-joined column from `association`, in batches. """
+    owner_table = sa.table(owner, sa.column('id', sa.Integer), sa.column('genres', sa.String))
+    association_table = sa.table(
+        association, sa.column(fk, sa.Integer), sa.column('genre', sa.String)
+    )
+    last_id = 0
+    while True:
+        ids = [
+            row.id
+            for row in bind.execute(
+                sa.select([owner_table.c.id])
+                .where(owner_table.c.id > last_id)
+                .order_by(owner_table.c.id)
+                .limit(BATCH_SIZE)
+            )
+        ]
+        if not ids:
+            break
+        genres = {}
+        for owner_id, genre in bind.execute(
+            sa.select([association_table.c[fk], association_table.c.genre])
+            .where(association_table.c[fk].in_(ids))
+            .order_by(association_table.c[fk], association_table.c.genre)
+        ):
+            genres.setdefault(owner_id, []).append(genre)
+        for owner_id in ids:
+            bind.execute(
+                owner_table.update()
+                .where(owner_table.c.id == owner_id)
+                .values(genres=','.join(genres.get(owner_id, [])))
+            )
+        last_id = ids[-1]
+
+
+def upgrade():
+    bind = op.get_bind()
+    _check_genres(bind)
+    for owner, association, fk in OWNERS:
+        op.create_table(association,
+        sa.Column(fk, sa.Integer(), nullable=False),
+        sa.Column('genre', sa.String(length=50), nullable=False),
+        sa.ForeignKeyConstraint([fk], ['{}.id'.format(owner)], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint(fk, 'genre')
+        )
+        op.create_index(
+            'ix_{}_genre_{}'.format(association, fk), association, ['genre', fk], unique=False
+        )
+        _backfill(bind, owner, association, fk)
+
+    if bind.dialect.name == 'postgresql':
+        for owner, _, _ in OWNERS:
+            op.drop_index('ix_{}_search_document'.format(owner), table_name=owner)
+            op.execute(
+                'CREATE INDEX ix_{0}_search_document ON {0} USING gin ({1})'.format(
+                    owner, SEARCH_DOCUMENT
+                )
+            )
+
+    for owner, _, _ in OWNERS:
+        with op.batch_alter_table(owner) as batch_op:
+            batch_op.drop_column('genres')
+
+
+def downgrade():
+    bind = op.get_bind()
+    for owner, _, _ in OWNERS:
+        with op.batch_alter_table(owner) as batch_op:
+            batch_op.add_column(
+                sa.Column('genres', sa.String(length=120), nullable=False, server_default='')
+            )
+
+    for owner, association, fk in OWNERS:
+        _restore(bind, owner, association, fk)
+        with op.batch_alter_table(owner) as batch_op:
+            batch_op.alter_column('genres', server_default=None)
+        op.drop_index('ix_{}_genre_{}'.format(association, fk), table_name=association)
+        op.drop_table(association)
+
+    if bind.dialect.name == 'postgresql':
+        for owner, _, _ in OWNERS:
+            op.drop_index('ix_{}_search_document'.format(owner), table_name=owner)
+            op.execute(
+                'CREATE INDEX ix_{0}_search_document ON {0} USING gin ({1})'.format(
+                    owner, OLD_SEARCH_DOCUMENT
+                )
+            )
@@ -0,0 +1,50 @@
+"""show counters
+
+Revision ID: c4e8a1f09d37
+Revises: b7d2e4f61c08
+Create Date: 2026-10-18 11:26:10.734652
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a1f09d37'
+down_revision = 'b7d2e4f61c08'
+branch_labels = None
+depends_on = None
+
+# (table, shows fk column)
+OWNERS = [
+    ('venues', 'venue_id'),
+    ('artists', 'artist_id'),
+]
+
+
+def upgrade():
+    for table, fk in OWNERS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+            batch_op.add_column(sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+            batch_op.add_column(sa.Column('next_show_at', sa.DateTime(), nullable=True))
+        op.create_index('ix_{}_next_show_at'.format(table), table, ['next_show_at'], unique=False)
+        # Set-based backfill, same computation as counters.refresh()
+        op.execute(
+            'UPDATE {0} SET '
+            'upcoming_shows_count = (SELECT count(*) FROM shows '
+            'WHERE shows.{1} = {0}.id AND shows.start_time >= CURRENT_TIMESTAMP), '
+            'past_shows_count = (SELECT count(*) FROM shows '
+            'WHERE shows.{1} = {0}.id AND shows.start_time < CURRENT_TIMESTAMP), '
+            'next_show_at = (SELECT min(shows.start_time) FROM shows '
+            'WHERE shows.{1} = {0}.id AND shows.start_time >= CURRENT_TIMESTAMP)'.format(table, fk)
+        )
+
+
+def downgrade():
+    for table, _ in OWNERS:
+        op.drop_index('ix_{}_next_show_at'.format(table), table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('next_show_at')
+            batch_op.drop_column('past_shows_count')
+            batch_op.drop_column('upcoming_shows_count')
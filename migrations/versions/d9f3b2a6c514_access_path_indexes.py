@@ -0,0 +1,43 @@
+"""access path indexes
+
+Revision ID: d9f3b2a6c514
+Revises: c4e8a1f09d37
+Create Date: 2026-10-18 12:40:22.118045
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9f3b2a6c514'
+down_revision = 'c4e8a1f09d37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # shows: detail-page partitions/counters per venue and artist, /shows keyset
+    op.create_index('ix_shows_venue_id_start_time', 'shows', ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_shows_artist_id_start_time', 'shows', ['artist_id', 'start_time'], unique=False)
+    op.create_index('ix_shows_start_time_id', 'shows', ['start_time', 'id'], unique=False)
+    # venues: /venues area listing, filters, keyset on (name, id), name lookups
+    op.create_index('ix_venues_state_city_name', 'venues', ['state', 'city', 'name'], unique=False)
+    op.create_index('ix_venues_name_id', 'venues', ['name', 'id'], unique=False)
+    op.create_index('ix_venues_lower_name', 'venues', [sa.text('lower(name)')], unique=False)
+    # artists: /artists listing, filters, keyset on (name, id), name lookups
+    op.create_index('ix_artists_name_id', 'artists', ['name', 'id'], unique=False)
+    op.create_index('ix_artists_state_city', 'artists', ['state', 'city'], unique=False)
+    op.create_index('ix_artists_lower_name', 'artists', [sa.text('lower(name)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_artists_lower_name', table_name='artists')
+    op.drop_index('ix_artists_state_city', table_name='artists')
+    op.drop_index('ix_artists_name_id', table_name='artists')
+    op.drop_index('ix_venues_lower_name', table_name='venues')
+    op.drop_index('ix_venues_name_id', table_name='venues')
+    op.drop_index('ix_venues_state_city_name', table_name='venues')
+    op.drop_index('ix_shows_start_time_id', table_name='shows')
+    op.drop_index('ix_shows_artist_id_start_time', table_name='shows')
+    op.drop_index('ix_shows_venue_id_start_time', table_name='shows')
@@ -0,0 +1,74 @@
+"""show duration and overlap constraints
+
+Revision ID: e5a7c3d91f42
+Revises: d9f3b2a6c514
+Create Date: 2026-10-18 13:52:47.306118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c3d91f42'
+down_revision = 'd9f3b2a6c514'
+branch_labels = None
+depends_on = None
+
+# Keep in step with models.MAX_SHOW_DURATION_MINUTES
+MAX_SHOW_DURATION_MINUTES = 12 * 60
+
+# (constraint, shows column): no two shows of one venue/artist overlap
+EXCLUSIONS = [
+    ('ex_shows_venue_id_overlap', 'venue_id'),
+    ('ex_shows_artist_id_overlap', 'artist_id'),
+]
+
+BOOKING = "tsrange(start_time, start_time + duration_minutes * interval '1 minute')"
+
+
+def upgrade():
+    with op.batch_alter_table('shows') as batch_op:
+        batch_op.add_column(sa.Column('duration_minutes', sa.Integer(), server_default='120', nullable=False))
+        batch_op.create_check_constraint(
+            'ck_shows_duration',
+            'duration_minutes > 0 AND duration_minutes <= {}'.format(MAX_SHOW_DURATION_MINUTES),
+        )
+
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    # Existing double bookings have to be resolved by hand first; list them
+    # instead of failing on an opaque constraint error. Of two overlapping
+    # shows one starts within the other, an index range per show.
+    for _, column in EXCLUSIONS:
+        overlapping = bind.execute(sa.text(
+            'SELECT a.id, b.id FROM shows a JOIN shows b ON b.{0} = a.{0} AND b.id <> a.id '
+            'AND b.start_time >= a.start_time '
+            "AND b.start_time < a.start_time + a.duration_minutes * interval '1 minute' "
+            'LIMIT 20'.format(column)
+        )).fetchall()
+        if overlapping:
+            raise RuntimeError(
+                'shows overlapping on {}: {} (first 20 pairs); move or delete them, then upgrade'.format(
+                    column, ', '.join('{}/{}'.format(a, b) for a, b in overlapping)
+                )
+            )
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    for name, column in EXCLUSIONS:
+        op.execute(
+            'ALTER TABLE shows ADD CONSTRAINT {} EXCLUDE USING gist ({} WITH =, {} WITH &&)'.format(
+                name, column, BOOKING
+            )
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for name, _ in EXCLUSIONS:
+            op.execute('ALTER TABLE shows DROP CONSTRAINT IF EXISTS {}'.format(name))
+    # ck_shows_duration goes with its column: PostgreSQL drops the constraints
+    # of a dropped column, and SQLite's batch rebuild does not reflect CHECK
+    # constraints (so cannot drop one by name) and leaves it out of the table.
+    with op.batch_alter_table('shows') as batch_op:
+        batch_op.drop_column('duration_minutes')
@@ -0,0 +1,38 @@
+"""updated_at columns
+
+Revision ID: f2b6d8e04a19
+Revises: e5a7c3d91f42
+Create Date: 2026-10-18 15:21:09.527331
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b6d8e04a19'
+down_revision = 'e5a7c3d91f42'
+branch_labels = None
+depends_on = None
+
+TABLES = ['venues', 'artists', 'shows']
+
+
+def upgrade():
+    # SQLite cannot add a column with a non-constant default, and rebuilding
+    # the tables in batch mode would drop their expression indexes: add it
+    # there with a constant default and backfill. The app always sets it.
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    default = sa.text("'1970-01-01 00:00:00'") if sqlite else sa.func.now()
+    for table in TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), server_default=default, nullable=False))
+        if sqlite:
+            op.execute('UPDATE {} SET updated_at = CURRENT_TIMESTAMP'.format(table))
+        # max(updated_at) of the pages' validators
+        op.create_index('ix_{}_updated_at'.format(table), table, ['updated_at'], unique=False)
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_index('ix_{}_updated_at'.format(table), table_name=table)
+        op.drop_column(table, 'updated_at')
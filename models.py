@@ -2,24 +2,63 @@
 # Imports
 # ----------------------------------------------------------------------------#
 
-from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+
+from sqlalchemy.ext.associationproxy import association_proxy
+from sqlalchemy.orm import validates
+
+from enums import Genres
+from routing import RoutingSQLAlchemy
 
 # ----------------------------------------------------------------------------#
 # Initiate db SQLAlchemy object
 # ----------------------------------------------------------------------------#
 
-db = SQLAlchemy()
+db = RoutingSQLAlchemy()
 
 # ----------------------------------------------------------------------------#
 # Models.
 # ----------------------------------------------------------------------------#
 
 
+# Longest booking a show may hold. Bounds the start_time range the overlap
+# check scans (scheduling.py), so keep it in step with ck_shows_duration.
+MAX_SHOW_DURATION_MINUTES = 12 * 60
+DEFAULT_SHOW_DURATION_MINUTES = 120
+
+
 class Show(db.Model):
     __tablename__ = "shows"
+    # Per-venue/per-artist past/upcoming partitions and counters, the
+    # keyset-paginated /shows listing, and the booking overlap check. On
+    # PostgreSQL the migrations also add exclusion constraints so no two shows
+    # of a venue (or of an artist) overlap.
+    __table_args__ = (
+        db.Index("ix_shows_venue_id_start_time", "venue_id", "start_time"),
+        db.Index("ix_shows_artist_id_start_time", "artist_id", "start_time"),
+        db.Index("ix_shows_start_time_id", "start_time", "id"),
+        db.CheckConstraint(
+            "duration_minutes > 0 AND duration_minutes <= {}".format(MAX_SHOW_DURATION_MINUTES),
+            name="ck_shows_duration",
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     start_time = db.Column(db.DateTime, nullable=False)
+    # The booking holds [start_time, start_time + duration_minutes).
+    duration_minutes = db.Column(
+        db.Integer, nullable=False, default=DEFAULT_SHOW_DURATION_MINUTES, server_default="120"
+    )
+
+    # Last change to the row, for the pages' ETag/Last-Modified (naive UTC)
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        server_default=db.func.now(),
+        index=True,
+    )
 
     # Foreign keys
     venue_id = db.Column(db.Integer, db.ForeignKey("venues.id", ondelete="CASCADE"), nullable=False)
@@ -31,8 +70,50 @@ class Show(db.Model):
         return "<Id: {}, Show on {} >".format(self.id, self.start_time)
 
 
+class VenueGenre(db.Model):
+    __tablename__ = "venue_genres"
+    # (genre, venue_id) serves "all venues of genre X"; the primary key serves
+    # "genres of venue Y".
+    __table_args__ = (db.Index("ix_venue_genres_genre_venue_id", "genre", "venue_id"),)
+
+    venue_id = db.Column(
+        db.Integer, db.ForeignKey("venues.id", ondelete="CASCADE"), primary_key=True
+    )
+    genre = db.Column(db.String(50), primary_key=True)
+
+    @validates("genre")
+    def validate_genre(self, key, genre):
+        return Genres(genre).value
+
+    def __repr__(self):
+        return "<Venue: {}, Genre: {}>".format(self.venue_id, self.genre)
+
+
+class ArtistGenre(db.Model):
+    __tablename__ = "artist_genres"
+    __table_args__ = (db.Index("ix_artist_genres_genre_artist_id", "genre", "artist_id"),)
+
+    artist_id = db.Column(
+        db.Integer, db.ForeignKey("artists.id", ondelete="CASCADE"), primary_key=True
+    )
+    genre = db.Column(db.String(50), primary_key=True)
+
+    @validates("genre")
+    def validate_genre(self, key, genre):
+        return Genres(genre).value
+
+    def __repr__(self):
+        return "<Artist: {}, Genre: {}>".format(self.artist_id, self.genre)
+
+
 class Venue(db.Model):
     __tablename__ = "venues"
+    # /venues area listing, genre filters and case-insensitive name lookups.
+    __table_args__ = (
+        db.Index("ix_venues_state_city_name", "state", "city", "name"),
+        db.Index("ix_venues_name_id", "name", "id"),
+        db.Index("ix_venues_lower_name", db.func.lower(db.text("name"))),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
@@ -40,16 +121,49 @@ class Venue(db.Model):
     state = db.Column(db.String(120), nullable=False)
     address = db.Column(db.String(120), nullable=False)
     phone = db.Column(db.String(120))
-    genres = db.Column(db.String(120), nullable=False)
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     website = db.Column(db.String(120))
     seeking_talent = db.Column(db.Boolean, default=False, nullable=False)
     seeking_description = db.Column(db.String(500))
 
-    # Relationships
-    shows = db.relationship("Show", backref="venue", lazy=True)
-    artists = db.relationship("Artist", secondary="shows", backref="venue", lazy=True)
+    # Show counters, maintained by counters.py
+    upcoming_shows_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    past_shows_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    next_show_at = db.Column(db.DateTime, index=True)
+
+    # Last change to the row, for the pages' ETag/Last-Modified (naive UTC)
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        server_default=db.func.now(),
+        index=True,
+    )
+
+    # Relationships. Shows go with their venue or artist (ON DELETE CASCADE,
+    # or a bulk delete first where SQLite does not enforce foreign keys); the
+    # shows-backed artists/venue lists are read-only views of the same rows.
+    shows = db.relationship("Show", backref="venue", lazy=True, passive_deletes=True)
+    artists = db.relationship(
+        "Artist",
+        secondary="shows",
+        backref=db.backref("venue", viewonly=True, sync_backref=False),
+        lazy=True,
+        viewonly=True,
+        sync_backref=False,
+    )
+    genre_rows = db.relationship(
+        "VenueGenre",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="selectin",
+        order_by="VenueGenre.genre",
+    )
+
+    # List of enums.Genres values, e.g. venue.genres = ["Jazz", "Folk"]
+    genres = association_proxy("genre_rows", "genre", creator=lambda genre: VenueGenre(genre=genre))
 
     def __repr__(self):
         return "<Id: {}, Venue: {}, Shows: (past: {}, upcoming: {})>".format(self.id, self.name,)
@@ -57,21 +171,53 @@ class Venue(db.Model):
 
 class Artist(db.Model):
     __tablename__ = "artists"
+    # /artists listing, genre filters and case-insensitive name lookups.
+    __table_args__ = (
+        db.Index("ix_artists_name_id", "name", "id"),
+        db.Index("ix_artists_state_city", "state", "city"),
+        db.Index("ix_artists_lower_name", db.func.lower(db.text("name"))),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
     city = db.Column(db.String(120), nullable=False)
     state = db.Column(db.String(120), nullable=False)
     phone = db.Column(db.String(120))
-    genres = db.Column(db.String(120), nullable=False)
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     website = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean, default=False, nullable=False)
     seeking_description = db.Column(db.String(500))
 
+    # Show counters, maintained by counters.py
+    upcoming_shows_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    past_shows_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    next_show_at = db.Column(db.DateTime, index=True)
+
+    # Last change to the row, for the pages' ETag/Last-Modified (naive UTC)
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        server_default=db.func.now(),
+        index=True,
+    )
+
     # Relationships
-    shows = db.relationship("Show", backref="artist", lazy=True)
+    shows = db.relationship("Show", backref="artist", lazy=True, passive_deletes=True)
+    genre_rows = db.relationship(
+        "ArtistGenre",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="selectin",
+        order_by="ArtistGenre.genre",
+    )
+
+    # List of enums.Genres values, e.g. artist.genres = ["Jazz", "Folk"]
+    genres = association_proxy(
+        "genre_rows", "genre", creator=lambda genre: ArtistGenre(genre=genre)
+    )
 
     def _to_dict(self):
         return {
@@ -79,7 +225,7 @@ class Artist(db.Model):
             "city": self.city,
             "state": self.state,
             "phone": self.phone,
-            "genres": self.genres,
+            "genres": list(self.genres),
             "image_link": self.image_link,
             "facebook_link": self.facebook_link,
             "website": self.website,
@@ -0,0 +1,78 @@
+# ----------------------------------------------------------------------------#
+# Imports
+# ----------------------------------------------------------------------------#
+
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import DateTime, tuple_
+
+# ----------------------------------------------------------------------------#
+# Keyset (cursor) pagination
+# ----------------------------------------------------------------------------#
+# Pages are addressed by the sort key of their boundary row instead of an
+# OFFSET, so fetching page N costs the same as fetching page 1 as long as the
+# sort columns are indexed.
+
+Page = namedtuple("Page", ["items", "next_cursor", "prev_cursor"])
+
+
+def encode_cursor(values):
+    """ Opaque, url-safe cursor for a tuple of sort-key values. """
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, columns):
+    """ Sort-key values for `columns` from `cursor`; raises ValueError if malformed. """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError("Malformed cursor: {!r}".format(cursor))
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("Malformed cursor: {!r}".format(cursor))
+    try:
+        return tuple(
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+            for column, value in zip(columns, values)
+        )
+    except (TypeError, ValueError):
+        raise ValueError("Malformed cursor: {!r}".format(cursor))
+
+
+def keyset_page(query, columns, key, per_page, after=None, before=None):
+    """ One page of `query` ordered by `columns`.
+
+    `key(row)` returns the row's values for `columns`; `after`/`before` are
+    cursors from a previous Page. Only one extra row is fetched to detect
+    whether another page exists. """
+    sort_key = tuple_(*columns)
+    if before is not None:
+        boundary = decode_cursor(before, columns)
+        rows = (
+            query.filter(sort_key < boundary)
+            .order_by(*[column.desc() for column in columns])
+            .limit(per_page + 1)
+            .all()
+        )
+        has_prev = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        return Page(
+            items=rows,
+            next_cursor=encode_cursor(key(rows[-1])) if rows else None,
+            prev_cursor=encode_cursor(key(rows[0])) if has_prev else None,
+        )
+
+    if after is not None:
+        query = query.filter(sort_key > decode_cursor(after, columns))
+    rows = query.order_by(*columns).limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    return Page(
+        items=rows,
+        next_cursor=encode_cursor(key(rows[-1])) if has_next else None,
+        prev_cursor=encode_cursor(key(rows[0])) if after is not None and rows else None,
+    )
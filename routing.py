@@ -0,0 +1,107 @@
+# ----------------------------------------------------------------------------#
+# Imports
+# ----------------------------------------------------------------------------#
+
+import random
+from functools import wraps
+
+import sqlalchemy
+from flask import g, has_request_context
+from flask_sqlalchemy import SQLAlchemy, SignallingSession, get_state
+from sqlalchemy import orm
+from sqlalchemy.sql.expression import CompoundSelect, Select
+
+# ----------------------------------------------------------------------------#
+# Connection pools and read-replica routing
+# ----------------------------------------------------------------------------#
+# Every engine (primary and replicas) is built with SQLALCHEMY_ENGINE_OPTIONS
+# (pool size, overflow, timeout, recycle, pre-ping). Replicas are ordinary
+# SQLALCHEMY_BINDS whose key starts with "replica". Views decorated with
+# @db.replica_reads send their SELECTs to one replica, picked once per
+# request, until the request writes anything: from then on every statement
+# goes to the primary so the request reads its own writes.
+
+REPLICA_BIND_PREFIX = "replica"
+
+# Options only QueuePool understands; SQLite engines use other pools.
+_QUEUE_POOL_OPTIONS = ("pool_size", "max_overflow", "pool_timeout")
+
+
+def _is_read(clause):
+    if isinstance(clause, Select):
+        return clause._for_update_arg is None
+    return isinstance(clause, CompoundSelect)
+
+
+class RoutingSession(SignallingSession):
+    """ SignallingSession that sends replica-eligible reads to a replica. """
+
+    def get_bind(self, mapper=None, clause=None):
+        if has_request_context() and g.get("_replica_reads"):
+            # flushes and ORM unit-of-work writes come in without a clause
+            if self._flushing or not _is_read(clause):
+                g._primary_pinned = True
+            elif not g.get("_primary_pinned"):
+                replica = get_state(self.app).db.replica_engine(self.app)
+                if replica is not None:
+                    return replica
+        return SignallingSession.get_bind(self, mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """ SQLAlchemy with pool options that work on every dialect, replica
+    routing and pool statistics. """
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def create_engine(self, sa_url, engine_opts):
+        if sa_url.drivername.startswith("sqlite"):
+            engine_opts = {
+                key: value for key, value in engine_opts.items() if key not in _QUEUE_POOL_OPTIONS
+            }
+        return sqlalchemy.create_engine(sa_url, **engine_opts)
+
+    def replica_binds(self, app=None):
+        app = self.get_app(app)
+        return sorted(
+            bind for bind in app.config.get("SQLALCHEMY_BINDS") or ()
+            if bind.startswith(REPLICA_BIND_PREFIX)
+        )
+
+    def replica_engine(self, app=None):
+        """ The replica engine of the current request, or None without replicas. """
+        binds = self.replica_binds(app)
+        if not binds:
+            return None
+        bind = g.get("_replica_bind")
+        if bind is None:
+            bind = g._replica_bind = random.choice(binds)
+        return self.get_engine(self.get_app(app), bind)
+
+    def replica_reads(self, view):
+        """ Let `view`'s reads go to a replica (see RoutingSession). """
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g._replica_reads = True
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    def pool_stats(self, app=None):
+        """ {bind: {"size", "checked_out", "checked_in", "overflow"}} for every
+        engine with a connection pool ("primary" is the default bind). """
+        app = self.get_app(app)
+        stats = {}
+        for bind in [None] + list(app.config.get("SQLALCHEMY_BINDS") or ()):
+            pool = self.get_engine(app, bind).pool
+            if not hasattr(pool, "checkedout"):
+                continue
+            stats[bind or "primary"] = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+            }
+        return stats
@@ -0,0 +1,163 @@
+# ----------------------------------------------------------------------------#
+# Imports
+# ----------------------------------------------------------------------------#
+
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from sqlalchemy import and_, or_, select
+
+from models import db, Show, MAX_SHOW_DURATION_MINUTES
+
+# ----------------------------------------------------------------------------#
+# Booking conflicts
+# ----------------------------------------------------------------------------#
+# A show holds its venue and its artist for [start_time, start_time +
+# duration_minutes); two bookings overlap when each starts before the other
+# ends. No show lasts longer than MAX_SHOW_DURATION_MINUTES, so only shows
+# starting in (start - MAX_SHOW_DURATION_MINUTES, end) can overlap a slot:
+# a bounded range on the (venue_id, start_time) and (artist_id, start_time)
+# indexes however many past shows the venue has. Many slots are checked with
+# one query per chunk (an OR of those ranges); the exact end comparison then
+# runs in Python on the few candidate rows. On PostgreSQL exclusion
+# constraints enforce the same rule against concurrent writers (see
+# is_exclusion_violation).
+
+# SQLSTATE of an exclusion constraint violation.
+EXCLUSION_VIOLATION = "23P01"
+
+# Slots per conflict query (each adds two index ranges and six parameters).
+_CHUNK = 100
+
+_COLUMNS = [
+    Show.__table__.c.id,
+    Show.__table__.c.venue_id,
+    Show.__table__.c.artist_id,
+    Show.__table__.c.start_time,
+    Show.__table__.c.duration_minutes,
+]
+
+# A show, stored (id) or not (id None).
+Booking = namedtuple("Booking", "id venue_id artist_id start_time duration_minutes")
+
+
+class ShowConflict(Exception):
+    """ A booking overlaps shows of the same venue or artist. """
+
+    def __init__(self, conflicts):
+        self.conflicts = conflicts
+        super(ShowConflict, self).__init__("overlaps " + describe(conflicts))
+
+
+def describe(bookings):
+    return ", ".join(
+        "{} (venue {}, artist {}, {:%Y-%m-%d %H:%M}-{:%H:%M})".format(
+            "show {}".format(booking.id) if booking.id is not None else "another new show",
+            booking.venue_id, booking.artist_id, booking.start_time, end_time(booking),
+        )
+        for booking in bookings
+    )
+
+
+def end_time(booking):
+    return booking.start_time + timedelta(minutes=booking.duration_minutes)
+
+
+def _overlaps(a, b):
+    return a.start_time < end_time(b) and b.start_time < end_time(a)
+
+
+def find_conflicts(slots, exclude_ids=(), connection=None):
+    """ {index in `slots`: [Booking]} for every slot overlapping a stored show
+    of its venue or artist, or an earlier-ending slot of the list itself.
+    Slots are Show instances or Bookings; runs on `connection` (default: the
+    session). """
+    for slot in slots:
+        if not 0 < slot.duration_minutes <= MAX_SHOW_DURATION_MINUTES:
+            raise ValueError(
+                "duration_minutes must be within 1..{}".format(MAX_SHOW_DURATION_MINUTES)
+            )
+    connection = connection if connection is not None else db.session
+    longest = timedelta(minutes=MAX_SHOW_DURATION_MINUTES)
+    table = Show.__table__
+    conflicts = defaultdict(list)
+
+    for offset in range(0, len(slots), _CHUNK):
+        chunk = slots[offset:offset + _CHUNK]
+        ranges = []
+        for slot in chunk:
+            window = and_(
+                table.c.start_time > slot.start_time - longest,
+                table.c.start_time < end_time(slot),
+            )
+            ranges.append(and_(table.c.venue_id == slot.venue_id, window))
+            ranges.append(and_(table.c.artist_id == slot.artist_id, window))
+        by_venue, by_artist = defaultdict(list), defaultdict(list)
+        for row in connection.execute(select(_COLUMNS).where(or_(*ranges))):
+            if row.id in exclude_ids:
+                continue
+            booking = Booking(*row)
+            by_venue[booking.venue_id].append(booking)
+            by_artist[booking.artist_id].append(booking)
+        for index, slot in enumerate(chunk, offset):
+            candidates = by_venue[slot.venue_id] + [
+                booking for booking in by_artist[slot.artist_id] if booking.venue_id != slot.venue_id
+            ]
+            conflicts[index].extend(booking for booking in candidates if _overlaps(booking, slot))
+
+    # slots against each other: a sweep per venue and per artist
+    for owner in ("venue_id", "artist_id"):
+        order = sorted(range(len(slots)), key=lambda i: (getattr(slots[i], owner), slots[i].start_time))
+        latest = None
+        for index in order:
+            slot = slots[index]
+            if latest is not None and getattr(latest, owner) == getattr(slot, owner):
+                if slot.start_time < end_time(latest):
+                    conflicts[index].append(latest)
+                if end_time(slot) <= end_time(latest):
+                    continue
+            latest = Booking(None, slot.venue_id, slot.artist_id, slot.start_time, slot.duration_minutes)
+
+    return {
+        index: sorted(set(found), key=lambda booking: (booking.start_time, booking.id or 0))
+        for index, found in conflicts.items() if found
+    }
+
+
+def check_show(show):
+    """ Raise ShowConflict when `show` overlaps a stored booking. """
+    conflicts = find_conflicts([show], exclude_ids={show.id} if show.id else ())
+    if conflicts:
+        raise ShowConflict(conflicts[0])
+
+
+def is_exclusion_violation(error):
+    """ Whether a DBAPI error came from the PostgreSQL overlap constraints. """
+    return getattr(getattr(error, "orig", None), "pgcode", None) == EXCLUSION_VIOLATION
+
+
+# ----------------------------------------------------------------------------#
+# Recurring bookings
+# ----------------------------------------------------------------------------#
+
+FREQUENCIES = {
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+}
+
+
+def recurrence(start_time, frequency, interval=1, count=None, until=None):
+    """ Start times every `interval` days/weeks from `start_time`, `count`
+    times and/or through the date `until`. """
+    if frequency not in FREQUENCIES:
+        raise ValueError("frequency must be one of {}".format(", ".join(sorted(FREQUENCIES))))
+    if interval < 1:
+        raise ValueError("interval must be at least 1")
+    if count is None and until is None:
+        raise ValueError("count or until is required")
+    step = FREQUENCIES[frequency] * interval
+    current, produced = start_time, 0
+    while (count is None or produced < count) and (until is None or current.date() <= until):
+        yield current
+        current += step
+        produced += 1
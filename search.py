@@ -0,0 +1,263 @@
+# ----------------------------------------------------------------------------#
+# Imports
+# ----------------------------------------------------------------------------#
+
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from sqlalchemy import func, literal_column, or_
+
+from enums import Genres
+from models import db, Artist, ArtistGenre, Venue, VenueGenre
+
+# ----------------------------------------------------------------------------#
+# Search documents
+# ----------------------------------------------------------------------------#
+# Every searchable model is indexed on name, city, state and genres. On
+# PostgreSQL the name/city/state document below is backed by a GIN expression
+# index (see the search migrations), so the expression here must stay identical
+# to it; genres are matched through the genre association tables' index.
+
+SEARCH_CONFIG = "simple"
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_GENRE_FK = {
+    Venue: VenueGenre.venue_id,
+    Artist: ArtistGenre.artist_id,
+}
+
+
+def tokenize(text):
+    """ Lower-cased word tokens of `text`. """
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def search_document(model):
+    """ The tsvector expression indexed for `model`. """
+    return func.to_tsvector(
+        literal_column("'{}'".format(SEARCH_CONFIG)),
+        model.name + " " + model.city + " " + model.state,
+    )
+
+
+def matching_genres(tokens):
+    """ enums.Genres values with a word starting with any of `tokens`. """
+    return [
+        genre.value
+        for genre in Genres
+        if any(word.startswith(token) for word in tokenize(genre.value) for token in tokens)
+    ]
+
+
+def _prefix_tsquery(term):
+    """ Build 'tok1:* & tok2:*' so partially typed words still match. """
+    tokens = tokenize(term)
+    if not tokens:
+        return None
+    return func.to_tsquery(
+        literal_column("'{}'".format(SEARCH_CONFIG)),
+        " & ".join("{}:*".format(token) for token in tokens),
+    )
+
+
+def _with_upcoming_counts(model, *columns):
+    """ Query (id, name, num_upcoming_shows, *columns) for `model`; the count is
+    the denormalized counter maintained by counters.py. """
+    return db.session.query(
+        model.id, model.name, model.upcoming_shows_count.label("num_upcoming_shows"), *columns
+    )
+
+
+def _to_result(row):
+    return {"id": row.id, "name": row.name, "num_upcoming_shows": row.num_upcoming_shows}
+
+
+# ----------------------------------------------------------------------------#
+# PostgreSQL: tsvector + pg_trgm
+# ----------------------------------------------------------------------------#
+
+
+def _search_postgres(model, term, limit):
+    tsquery = _prefix_tsquery(term)
+    document = search_document(model)
+    similarity = func.similarity(model.name, term)
+    matches = [model.name.op("%")(term)]
+    rank = similarity
+    genres = matching_genres(tokenize(term))
+    if genres:
+        genre_fk = _GENRE_FK[model]
+        matches.append(
+            model.id.in_(
+                db.session.query(genre_fk).filter(genre_fk.class_.genre.in_(genres))
+            )
+        )
+    if tsquery is not None:
+        matches.append(document.op("@@")(tsquery))
+        rank = func.ts_rank(document, tsquery) + similarity
+    rows = (
+        _with_upcoming_counts(model, rank.label("rank"))
+        .filter(or_(*matches))
+        .order_by(rank.desc(), model.name)
+        .limit(limit)
+    )
+    return [_to_result(row) for row in rows]
+
+
+# ----------------------------------------------------------------------------#
+# Fallback: in-process inverted index
+# ----------------------------------------------------------------------------#
+
+
+class InvertedIndex(object):
+    """ Token -> ids index with prefix lookup, used when the database has no
+    full-text support (SQLite test runs). Name tokens weigh more than
+    city/state/genre tokens. """
+
+    NAME_WEIGHT = 3
+    FIELD_WEIGHT = 1
+
+    def __init__(self):
+        self._postings = defaultdict(dict)
+        self._tokens = []
+        self._docs = {}
+        self._doc_tokens = {}
+        self._lock = threading.Lock()
+        self.built_at = None
+
+    def build(self, records):
+        with self._lock:
+            self._postings.clear()
+            self._docs.clear()
+            self._doc_tokens.clear()
+            for record in records:
+                self._add(record)
+            self._tokens = sorted(self._postings)
+            self.built_at = time.monotonic()
+
+    def add(self, record):
+        with self._lock:
+            self._remove(record["id"])
+            for token in self._add(record):
+                i = bisect_left(self._tokens, token)
+                if i == len(self._tokens) or self._tokens[i] != token:
+                    insort(self._tokens, token)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def search(self, term, limit):
+        """ Ids ranked by summed token weight; every query token must match. """
+        tokens = tokenize(term)
+        if not tokens:
+            return []
+        with self._lock:
+            scores = None
+            for token in tokens:
+                token_scores = defaultdict(int)
+                i = bisect_left(self._tokens, token)
+                while i < len(self._tokens) and self._tokens[i].startswith(token):
+                    for doc_id, weight in self._postings[self._tokens[i]].items():
+                        token_scores[doc_id] = max(token_scores[doc_id], weight)
+                    i += 1
+                if scores is None:
+                    scores = dict(token_scores)
+                else:
+                    scores = {
+                        doc_id: score + token_scores[doc_id]
+                        for doc_id, score in scores.items()
+                        if doc_id in token_scores
+                    }
+                if not scores:
+                    return []
+            ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], self._docs[doc_id]))
+            return ranked[:limit]
+
+    def _add(self, record):
+        doc_id = record["id"]
+        tokens = set(tokenize(record.get("name")))
+        self._docs[doc_id] = (record.get("name") or "").lower()
+        for token in tokens:
+            self._postings[token][doc_id] = self.NAME_WEIGHT
+        for field in ("city", "state", "genres"):
+            for token in tokenize(record.get(field)):
+                self._postings[token].setdefault(doc_id, self.FIELD_WEIGHT)
+                tokens.add(token)
+        self._doc_tokens[doc_id] = tokens
+        return tokens
+
+    def _remove(self, doc_id):
+        self._docs.pop(doc_id, None)
+        for token in self._doc_tokens.pop(doc_id, ()):
+            del self._postings[token][doc_id]
+            if not self._postings[token]:
+                del self._postings[token]
+                self._tokens.pop(bisect_left(self._tokens, token))
+
+
+_indexes = {Venue: InvertedIndex(), Artist: InvertedIndex()}
+
+
+def _record(instance):
+    return {
+        "id": instance.id,
+        "name": instance.name,
+        "city": instance.city,
+        "state": instance.state,
+        "genres": " ".join(instance.genres),
+    }
+
+
+def _search_fallback(model, term, limit, max_age):
+    index = _indexes[model]
+    stale = max_age is not None and index.built_at is not None and (
+        time.monotonic() - index.built_at >= max_age
+    )
+    if index.built_at is None or stale:
+        genre_fk = _GENRE_FK[model]
+        genres = defaultdict(list)
+        for doc_id, genre in db.session.query(genre_fk, genre_fk.class_.genre):
+            genres[doc_id].append(genre)
+        rows = db.session.query(model.id, model.name, model.city, model.state)
+        index.build(
+            dict(row._asdict(), genres=" ".join(genres[row.id])) for row in rows.yield_per(1000)
+        )
+    ids = index.search(term, limit)
+    if not ids:
+        return []
+    rows = {row.id: row for row in _with_upcoming_counts(model).filter(model.id.in_(ids))}
+    return [_to_result(rows[doc_id]) for doc_id in ids if doc_id in rows]
+
+
+# ----------------------------------------------------------------------------#
+# Public API
+# ----------------------------------------------------------------------------#
+
+
+def search(model, term, limit, max_age=None):
+    """ Ranked [{"id", "name", "num_upcoming_shows"}] for `term`, at most `limit`.
+    Without full-text support the in-process index is rebuilt when older than
+    `max_age` seconds (edits made in other workers). """
+    term = (term or "").strip()
+    if not term:
+        return []
+    if db.engine.dialect.name == "postgresql":
+        return _search_postgres(model, term, limit)
+    return _search_fallback(model, term, limit, max_age)
+
+
+def index_instance(instance):
+    """ Refresh `instance` in the in-process index after a create or edit. """
+    index = _indexes[type(instance)]
+    if index.built_at is not None:
+        index.add(_record(instance))
+
+
+def unindex_instance(model, doc_id):
+    """ Drop a deleted row from the in-process index. """
+    index = _indexes[model]
+    if index.built_at is not None:
+        index.remove(doc_id)
@@ -0,0 +1,293 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import sys
+from datetime import date, datetime
+from itertools import islice
+
+from flask import Blueprint, abort, current_app, flash, jsonify, render_template, request
+
+from catalog import shows_version
+from counters import refresh_for_show
+from extensions import cache, csrf, identities
+from forms import ShowForm, ScheduleForm
+from models import db, Artist, Venue, Show, DEFAULT_SHOW_DURATION_MINUTES
+from pagination import keyset_page
+from scheduling import (
+    Booking, ShowConflict, check_show, describe, find_conflicts, is_exclusion_violation, recurrence,
+)
+from templating import stream_template
+
+bp = Blueprint("shows", __name__)
+
+#  Shows
+#  ----------------------------------------------------------------
+
+@bp.route('/shows')
+@db.replica_reads
+@cache.conditional(shows_version)
+@cache.page(tags=lambda: ["shows"])
+def shows():
+      # Keyset pagination on (start_time, id), so each page costs one query on
+      # shows whatever its position; artist and venue names come from the
+      # identity cache.
+      upcoming = request.args.get("upcoming", type=int, default=0) == 1
+      query = db.session.query(Show.id, Show.start_time, Show.artist_id, Show.venue_id)
+      if upcoming:
+        query = query.filter(Show.start_time >= datetime.now())
+      try:
+        page = keyset_page(
+            query,
+            [Show.start_time, Show.id],
+            key=lambda row: (row.start_time, row.id),
+            per_page=current_app.config["SHOWS_PER_PAGE"],
+            after=request.args.get("after"),
+            before=request.args.get("before"),
+        )
+      except ValueError:
+        abort(400)
+      artists = identities.get_many(Artist, [show.artist_id for show in page.items])
+      venues = identities.get_many(Venue, [show.venue_id for show in page.items])
+      shows = [
+        {
+            "artist_id": show.artist_id,
+            "artist_name": artists[show.artist_id].name,
+            "artist_image_link": artists[show.artist_id].image_link,
+            "venue_id": show.venue_id,
+            "venue_name": venues[show.venue_id].name,
+            "start_time": show.start_time,
+        }
+        for show in page.items
+        if show.artist_id in artists and show.venue_id in venues
+      ]
+      return stream_template("pages/shows.html", shows=shows, page=page, upcoming=upcoming)
+
+
+
+@bp.route('/shows/create')
+def create_shows():
+  form = ShowForm()
+  return render_template('forms/new_show.html', form=form)
+
+
+def _hydrte_show(form):
+    # start_time as rendered by ShowForm ("YYYY-MM-DD HH:MM[:SS]")
+    return Show(
+        venue_id=form.get("venue_id", type=int),
+        artist_id=form.get("artist_id", type=int),
+        start_time=datetime.fromisoformat(form.get("start_time", "").strip()),
+        duration_minutes=form.get(
+            "duration_minutes", type=int, default=DEFAULT_SHOW_DURATION_MINUTES
+        ),
+    )
+
+
+@bp.route('/shows/create', methods=['POST'])
+def create_show_submission():
+      error = None
+      try:
+        data = request.form
+        show = _hydrte_show(data)
+        check_show(show)
+        db.session.add(show)
+        refresh_for_show(show.venue_id, show.artist_id)
+        db.session.commit()
+        cache.invalidate(
+            "shows",
+            "venues",
+            "venue:{}".format(data.get("venue_id")),
+            "artist:{}".format(data.get("artist_id")),
+        )
+      except ShowConflict as conflict:
+        error = "Show could not be listed: it {}".format(conflict)
+        db.session.rollback()
+      except Exception as e:
+        error = "An error occured. Show could not be listed"
+        if is_exclusion_violation(e):
+              error = "Show could not be listed: it overlaps another show of the venue or artist"
+        db.session.rollback()
+        print(sys.exc_info())
+      finally:
+        db.session.close()
+        if error:
+              flash(error)
+        else:
+              flash("Show was successfully listed!")
+      return render_template("pages/home.html")
+
+
+#  Scheduling
+#  ----------------------------------------------------------------
+# A residency ("every Friday for six months") or a list of slots for one venue
+# and artist, as a form post or as JSON:
+#   {"venue_id": 1, "artist_id": 2, "start_time": "2026-11-06 21:00",
+#    "duration_minutes": 120, "frequency": "weekly", "interval": 1,
+#    "count": 26, "until": "2027-05-01"}
+#   {"venue_id": 1, "artist_id": 2, "duration_minutes": 120,
+#    "slots": ["2026-11-06 21:00", {"start_time": "2026-11-14 20:00", "duration_minutes": 90}]}
+# Venue and artist are checked with one query, conflicts with set-based
+# queries (scheduling.py), and every show is inserted with one executemany in
+# one transaction: all shows are booked or none.
+
+class _ScheduleError(Exception):
+    def __init__(self, status, message, conflicts=None):
+        super(_ScheduleError, self).__init__(message)
+        self.status = status
+        self.conflicts = conflicts
+
+
+def _schedule_slots(data):
+    """ (venue_id, artist_id, [Booking]) from the request fields. """
+    limit = current_app.config["SCHEDULE_MAX_SHOWS"]
+    try:
+        venue_id, artist_id = int(data["venue_id"]), int(data["artist_id"])
+        duration = int(data.get("duration_minutes") or DEFAULT_SHOW_DURATION_MINUTES)
+        if data.get("slots"):
+            if len(data["slots"]) > limit:
+                raise ValueError("at most {} shows per request".format(limit))
+            slots = [slot if isinstance(slot, dict) else {"start_time": slot} for slot in data["slots"]]
+            starts = [
+                (
+                    datetime.fromisoformat(str(slot["start_time"]).strip()),
+                    int(slot.get("duration_minutes") or duration),
+                )
+                for slot in slots
+            ]
+        else:
+            times = recurrence(
+                datetime.fromisoformat(str(data["start_time"]).strip()),
+                data.get("frequency") or "weekly",
+                interval=int(data.get("interval") or 1),
+                count=int(data["count"]) if data.get("count") else None,
+                until=date.fromisoformat(str(data["until"])[:10]) if data.get("until") else None,
+            )
+            starts = [(start_time, duration) for start_time in islice(times, limit + 1)]
+    except KeyError as e:
+        raise ValueError("{} is required".format(e.args[0]))
+    except (TypeError, AttributeError):
+        raise ValueError("malformed schedule")
+    if not starts:
+        raise ValueError("the schedule has no shows")
+    if len(starts) > limit:
+        raise ValueError("at most {} shows per request".format(limit))
+    return venue_id, artist_id, [
+        Booking(None, venue_id, artist_id, start_time, duration_minutes)
+        for start_time, duration_minutes in starts
+    ]
+
+
+def _schedule(data):
+    """ Book the schedule in `data`; returns the number of shows created. """
+    try:
+        venue_id, artist_id, slots = _schedule_slots(data)
+        venue_exists, artist_exists = db.session.query(
+            db.session.query(Venue.id).filter(Venue.id == venue_id).exists(),
+            db.session.query(Artist.id).filter(Artist.id == artist_id).exists(),
+        ).one()
+        if not venue_exists or not artist_exists:
+            raise _ScheduleError(404, "unknown {}".format("venue" if not venue_exists else "artist"))
+        conflicts = find_conflicts(slots)
+    except ValueError as e:
+        raise _ScheduleError(400, str(e))
+    if conflicts:
+        raise _ScheduleError(
+            409,
+            "{} of {} shows overlap other bookings".format(len(conflicts), len(slots)),
+            [
+                {
+                    "start_time": slots[index].start_time.isoformat(),
+                    "duration_minutes": slots[index].duration_minutes,
+                    "overlaps": describe(found),
+                }
+                for index, found in sorted(conflicts.items())
+            ],
+        )
+    db.session.execute(
+        Show.__table__.insert(),
+        [
+            {
+                "venue_id": slot.venue_id,
+                "artist_id": slot.artist_id,
+                "start_time": slot.start_time,
+                "duration_minutes": slot.duration_minutes,
+            }
+            for slot in slots
+        ],
+    )
+    refresh_for_show(venue_id, artist_id)
+    db.session.commit()
+    cache.invalidate(
+        "shows", "venues", "venue:{}".format(venue_id), "artist:{}".format(artist_id)
+    )
+    return len(slots)
+
+
+@bp.route('/shows/schedule')
+def schedule_shows():
+    form = ScheduleForm()
+    return render_template('forms/schedule_shows.html', form=form)
+
+
+@bp.route('/shows/schedule', methods=['POST'])
+@csrf.exempt
+def schedule_shows_submission():
+    # JSON clients cannot be driven cross-site without CORS, form posts can.
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        payload = None
+        if current_app.config.get("WTF_CSRF_ENABLED", True):
+            csrf.protect()
+    status, body = 201, {"success": True}
+    try:
+        body["created"] = _schedule(payload if payload is not None else request.form.to_dict())
+    except _ScheduleError as e:
+        db.session.rollback()
+        status, body = e.status, {"success": False, "error": str(e)}
+        if e.conflicts:
+            body["conflicts"] = e.conflicts
+    except Exception as e:
+        db.session.rollback()
+        print(sys.exc_info())
+        status, body = 500, {"success": False, "error": "shows could not be scheduled"}
+        if is_exclusion_violation(e):
+            status, body["error"] = 409, "a show overlaps a booking made meanwhile"
+    finally:
+        db.session.close()
+    if payload is not None:
+        return jsonify(body), status
+    if body["success"]:
+        flash("{} shows were successfully scheduled!".format(body["created"]))
+    else:
+        flash("Shows could not be scheduled: {}".format(body["error"]))
+        for conflict in body.get("conflicts", [])[:10]:
+            flash("{start_time} overlaps {overlaps}".format(**conflict))
+    return render_template("pages/home.html")
+
+
+@bp.route("/shows/<int:show_id>", methods=["DELETE"])
+def delete_show(show_id):
+    error = False
+    try:
+        show = Show.query.get(show_id)
+        if show:
+            venue_id, artist_id = show.venue_id, show.artist_id
+            db.session.delete(show)
+            refresh_for_show(venue_id, artist_id)
+            db.session.commit()
+            cache.invalidate(
+                "shows", "venues", "venue:{}".format(venue_id), "artist:{}".format(artist_id)
+            )
+        else:
+            error = True
+    except Exception:
+        error = True
+        db.session.rollback()
+        print(sys.exc_info())
+    finally:
+        db.session.close()
+        if error:
+            flash("An error occurred. the show could not be removed.")
+        else:
+            flash("Show was successfully removed!")
+    return jsonify({"success": not error})
@@ -18,3 +18,73 @@ window.log = function(){
 
 // place any jQuery/helper plugins in here, instead of separate, slower script files.
 
+
+
+// Typeahead for inputs with data-autocomplete="/artists/autocomplete" (or
+// /venues/autocomplete). Picking a suggestion fills the input with its name,
+// writes its id into the field named by data-autocomplete-target, and submits
+// the form when data-autocomplete-submit is set (navbar search boxes).
+(function($){
+  if (!$) { return; }
+  var cache = {};
+
+  function fetch(url, term, done){
+    var key = url + '?' + term;
+    if (cache[key]) { return done(cache[key]); }
+    $.getJSON(url, {q: term}, function(data){
+      cache[key] = data.results;
+      done(data.results);
+    });
+  }
+
+  $(function(){
+    $('input[data-autocomplete]').each(function(){
+      var $input = $(this).attr('autocomplete', 'off'),
+          $menu = $('<ul class="dropdown-menu autocomplete-menu"></ul>').insertAfter($input),
+          timer = null,
+          results = [];
+
+      function pick(i){
+        var result = results[i];
+        if (!result) { return; }
+        $input.val(result.name);
+        $($input.data('autocomplete-target')).val(result.id);
+        $menu.hide();
+        if ($input.data('autocomplete-submit') !== undefined) { $input.closest('form').submit(); }
+      }
+
+      function render(items){
+        results = items;
+        $menu.empty();
+        $.each(items, function(i, result){
+          $('<li><a href="#"></a></li>').find('a')
+            .text(result.name)
+            .append($('<small class="text-muted"></small>').text(' ' + result.city + ', ' + result.state))
+            .on('mousedown', function(e){ e.preventDefault(); pick(i); })
+            .end().appendTo($menu);
+        });
+        $menu.toggle(items.length > 0);
+      }
+
+      $input.on('input', function(){
+        var term = $.trim($input.val());
+        clearTimeout(timer);
+        if (!term) { return render([]); }
+        timer = setTimeout(function(){ fetch($input.data('autocomplete'), term, render); }, 100);
+      }).on('keydown', function(e){
+        var $active = $menu.find('li.active'), index = $menu.find('li').index($active);
+        if (!$menu.is(':visible')) { return; }
+        if (e.which === 40 || e.which === 38) {
+          e.preventDefault();
+          index = (index + (e.which === 40 ? 1 : -1) + results.length) % results.length;
+          $menu.find('li').removeClass('active').eq(index).addClass('active');
+        } else if (e.which === 13 && index >= 0) {
+          e.preventDefault();
+          pick(index);
+        } else if (e.which === 27) {
+          $menu.hide();
+        }
+      }).on('blur', function(){ $menu.hide(); });
+    });
+  });
+})(window.jQuery);
@@ -0,0 +1,139 @@
+# ----------------------------------------------------------------------------#
+# Imports
+# ----------------------------------------------------------------------------#
+
+import os
+import tempfile
+import time
+
+from flask import (
+    Response, current_app, get_flashed_messages, render_template, stream_with_context,
+)
+from flask.signals import before_render_template, template_rendered
+from jinja2 import FileSystemBytecodeCache
+
+# ----------------------------------------------------------------------------#
+# Template bytecode cache
+# ----------------------------------------------------------------------------#
+# Jinja compiles a template's source to Python code the first time a process
+# loads it, so every new worker used to parse and compile the layout and the
+# pages on its first requests. Compiled templates are kept on disk instead
+# (TEMPLATE_BYTECODE_CACHE_DIR), keyed by name and checked against a hash of
+# the source, so an edited template is simply compiled again. Entries are
+# written under a temporary name and renamed into place, so workers starting
+# together never read a half written one.
+#
+#   flask precompile-templates  fills the cache at build time
+#   TEMPLATE_WARM_UP            loads every template (and renders the ones
+#                               that need no context) when the app is created
+
+# Folders whose templates are precompiled and warmed up.
+FOLDERS = ("layouts", "pages", "forms", "errors")
+
+# Rendered at warm up; they need no context beyond the request.
+_CONTEXT_FREE = ("pages/home.html", "errors/404.html", "errors/500.html")
+
+
+class AtomicBytecodeCache(FileSystemBytecodeCache):
+    """ FileSystemBytecodeCache writing its files atomically. """
+
+    def dump_bytecode(self, bucket):
+        target = self._get_cache_filename(bucket)
+        handle, path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(handle, "wb") as output:
+                bucket.write_bytecode(output)
+            os.replace(path, target)
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+
+
+def init_app(app):
+    directory = app.config.get("TEMPLATE_BYTECODE_CACHE_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        app.jinja_env.bytecode_cache = AtomicBytecodeCache(directory)
+
+
+def templates(app):
+    """ Names of the app's templates under FOLDERS. """
+    return [
+        name
+        for name in app.jinja_env.list_templates(extensions=["html"])
+        if name.split("/", 1)[0] in FOLDERS
+    ]
+
+
+def precompile(app):
+    """ Compile every template from source into the bytecode cache; returns
+    the names compiled. """
+    env = app.jinja_env
+    names = templates(app)
+    for name in names:
+        source, filename, _ = env.loader.get_source(env, name)
+        code = env.compile(source, name, filename)
+        if env.bytecode_cache is not None:
+            bucket = env.bytecode_cache.get_bucket(env, name, filename, source)
+            bucket.code = code
+            env.bytecode_cache.set_bucket(bucket)
+    return names
+
+
+def warm_up(app):
+    """ Load every template (from the bytecode cache when fresh), then render
+    the context-free ones once, so the first requests find them compiled;
+    returns the seconds it took. """
+    started = time.perf_counter()
+    for name in templates(app):
+        app.jinja_env.get_template(name)
+    with app.test_request_context("/"):
+        for name in _CONTEXT_FREE:
+            render_template(name)
+    return time.perf_counter() - started
+
+
+# ----------------------------------------------------------------------------#
+# Streamed rendering
+# ----------------------------------------------------------------------------#
+# Long listings are sent while they render: the layout's <head> reaches the
+# browser before the first row is read, and neither the rows nor the page are
+# held in memory at once when the view passes a lazily read query (yield_per).
+# Jinja yields every text node separately; they are joined into chunks of
+# about STREAM_CHUNK_SIZE characters so each write (and each gzip flush, see
+# compression.py) carries a useful amount of markup.
+
+STREAM_CHUNK_SIZE = 4096
+
+
+def _chunked(pieces, size):
+    buffer, length = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def _generate(app, template, context):
+    before_render_template.send(app, template=template, context=context)
+    yield from _chunked(template.generate(context), STREAM_CHUNK_SIZE)
+    template_rendered.send(app, template=template, context=context)
+
+
+def stream_template(name, **context):
+    """ Like render_template, but returns a streamed text/html Response. The
+    request context stays available until the page is sent, but the session
+    cookie is written before the first chunk, so pending flash messages are
+    taken here; errors raised while rendering can no longer change the
+    status, so views pass lazily read rows through catalog.streamed_rows(),
+    which ends them early on a database error. """
+    app = current_app._get_current_object()
+    get_flashed_messages(with_categories=True)
+    app.update_template_context(context)
+    template = app.jinja_env.get_or_select_template(name)
+    return Response(stream_with_context(_generate(app, template, context)), mimetype="text/html")
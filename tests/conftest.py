@@ -0,0 +1,62 @@
+import pytest
+
+import counters
+import search
+from app import create_app
+from models import db, Artist, Show, Venue
+
+
+@pytest.fixture
+def app(tmp_path):
+    """ The app on a fresh SQLite database, with an empty in-process cache. """
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(tmp_path / "fyyur.db"),
+        "SQLALCHEMY_ENGINE_OPTIONS": {},
+        "SQLALCHEMY_BINDS": {},
+        "CACHE_BACKEND": "lru",
+        "TEMPLATE_WARM_UP": False,
+        "TEMPLATE_BYTECODE_CACHE_DIR": None,
+        "WTF_CSRF_ENABLED": False,
+        "TESTING": True,
+    })
+    # The in-process search indexes outlive an app; start each test unbuilt.
+    for index in search._indexes.values():
+        index.built_at = None
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_venue(**fields):
+    venue = Venue(**dict(
+        {"name": "The Musical Hop", "city": "San Francisco", "state": "CA",
+         "address": "1015 Folsom Street"},
+        **fields
+    ))
+    db.session.add(venue)
+    db.session.commit()
+    return venue
+
+
+def make_artist(**fields):
+    artist = Artist(**dict({"name": "Guns N Petals", "city": "San Francisco", "state": "CA"},
+                           **fields))
+    db.session.add(artist)
+    db.session.commit()
+    return artist
+
+
+def make_show(venue, artist, start_time, **fields):
+    """ A show, with both sides' counters refreshed as the show form does. """
+    show = Show(venue_id=venue.id, artist_id=artist.id, start_time=start_time, **fields)
+    db.session.add(show)
+    counters.refresh_for_show(venue.id, artist.id)
+    db.session.commit()
+    return show
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+from conftest import make_artist, make_show, make_venue
+from models import db, Artist, Show, Venue
+
+
+def _venue(name):
+    return {"name": name, "city": "Austin", "state": "TX", "address": "1 Main St",
+            "genres": ["Jazz"]}
+
+
+def _at(days, hour):
+    start = datetime.combine(datetime.now().date() + timedelta(days=days), datetime.min.time())
+    return (start + timedelta(hours=hour)).isoformat()
+
+
+def test_create_writes_every_record_or_none(client):
+    response = client.post("/api/v1/venues", json={
+        "data": [_venue("First Hall"), dict(_venue("Second Hall"), state=None), _venue("Third")]
+    })
+    assert response.status_code == 400
+    assert [error["index"] for error in response.get_json()["errors"]] == [1]
+    assert db.session.query(Venue).count() == 0
+
+    response = client.post("/api/v1/venues", json={"data": [_venue("First Hall")]})
+    assert response.status_code == 201
+    assert [venue["name"] for venue in response.get_json()["data"]] == ["First Hall"]
+
+
+def test_overlapping_shows_in_one_batch_write_nothing(client):
+    venue_id, artist_id = make_venue().id, make_artist().id
+    other_artist_id = make_artist(name="Other Band").id
+    response = client.post("/api/v1/shows", json={"data": [
+        {"venue_id": venue_id, "artist_id": artist_id, "start_time": _at(3, 20)},
+        {"venue_id": venue_id, "artist_id": other_artist_id, "start_time": _at(3, 21)},
+    ]})
+    assert response.status_code == 409
+    assert db.session.query(Show).count() == 0
+    assert db.session.query(Venue.upcoming_shows_count).scalar() == 0
+
+
+def test_update_with_an_unknown_id_changes_nothing(client):
+    venue_id = make_venue(name="Old Name").id
+    response = client.patch("/api/v1/venues", json={"data": [
+        {"id": venue_id, "name": "New Name"}, {"id": venue_id + 100, "name": "Nobody"},
+    ]})
+    assert response.status_code == 404
+    assert db.session.query(Venue.name).filter(Venue.id == venue_id).scalar() == "Old Name"
+
+
+def test_moving_a_show_updates_counters_and_pages(client):
+    venue, other = make_venue(name="Old Hall"), make_venue(name="New Hall")
+    artist = make_artist(name="Touring Band")
+    show = make_show(venue, artist, datetime.now() + timedelta(days=3))
+    venue_id, other_id, artist_id, show_id = venue.id, other.id, artist.id, show.id
+    assert b"1 Upcoming Show" in client.get("/venues/{}".format(venue_id)).data
+
+    response = client.patch("/api/v1/shows", json={"data": [{"id": show_id, "venue_id": other_id}]})
+    assert response.status_code == 200
+    counts = dict(db.session.query(Venue.id, Venue.upcoming_shows_count))
+    assert counts == {venue_id: 0, other_id: 1}
+    assert db.session.query(Artist.upcoming_shows_count).scalar() == 1
+    # the cached page of the old venue was invalidated
+    assert b"0 Upcoming Shows" in client.get("/venues/{}".format(venue_id)).data
+    assert b"1 Upcoming Show" in client.get("/venues/{}".format(other_id)).data
@@ -0,0 +1,22 @@
+from assets import minify_css
+
+
+def test_minify_css():
+    css = """/*! License */
+a:hover , b > c {
+    color : red ;  /* drop */
+}
+"""
+    assert minify_css(css) == "/*! License */ a:hover,b>c{color :red}"
+
+
+def test_minify_css_keeps_strings_and_urls():
+    css = """a::before { content: "a ;  b } /* c */"; font-family: 'Open  Sans', serif; }
+b { background: url( img/two  words.png ) no-repeat; }
+c { background: url("x  ,  y.png"); }
+"""
+    assert minify_css(css) == (
+        """a::before{content:"a ;  b } /* c */";font-family:'Open  Sans',serif}"""
+        "b{background:url( img/two  words.png ) no-repeat}"
+        """c{background:url("x  ,  y.png")}"""
+    )
@@ -0,0 +1,32 @@
+import time
+from datetime import datetime, timedelta
+
+from conftest import make_artist, make_show, make_venue
+
+
+def test_detail_page_expires_when_its_next_show_starts(client):
+    venue, artist = make_venue(), make_artist()
+    starts = datetime.now() + timedelta(seconds=1.5)
+    make_show(venue, artist, starts)
+    path = "/venues/{}".format(venue.id)
+
+    assert b"1 Upcoming Show" in client.get(path).data
+    time.sleep(max((starts - datetime.now()).total_seconds(), 0) + 0.1)
+    page = client.get(path).data
+    assert b"0 Upcoming Shows" in page
+    assert b"1 Past Show" in page
+
+
+def test_editing_a_venue_invalidates_its_artists_pages(client):
+    venue, artist = make_venue(name="Old Hall"), make_artist()
+    make_show(venue, artist, datetime.now() + timedelta(days=3))
+    edit = "/venues/{}/edit".format(venue.id)
+    form = {"name": "New Hall", "city": venue.city, "state": venue.state,
+            "address": venue.address, "genres": ["Jazz"]}
+    path = "/artists/{}".format(artist.id)
+    assert b"Old Hall" in client.get(path).data
+
+    client.post(edit, data=form)
+    page = client.get(path).data
+    assert b"New Hall" in page
+    assert b"Old Hall" not in page
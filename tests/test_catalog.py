@@ -0,0 +1,25 @@
+import pytest
+from werkzeug.exceptions import BadRequest
+
+from catalog import past_shows_limit
+from conftest import make_venue
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("", 20),
+    ("?past_limit=5", 5),
+    ("?past_limit=0", 0),
+    ("?past_limit=-3", 0),
+    ("?past_limit=100000", 500),
+])
+def test_past_shows_limit_is_clamped(app, query, expected):
+    with app.test_request_context("/venues/1" + query):
+        assert past_shows_limit() == expected
+
+
+def test_past_shows_limit_rejects_non_integers(app, client):
+    with app.test_request_context("/venues/1?past_limit=all"):
+        with pytest.raises(BadRequest):
+            past_shows_limit()
+    venue = make_venue()
+    assert client.get("/venues/{}?past_limit=all".format(venue.id)).status_code == 400
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from models import db, Artist, Show, Venue
+
+
+def test_inject_data(app):
+    result = app.test_cli_runner().invoke(args=["inject-data"])
+    assert "Data injection success." in result.output
+    assert db.session.query(Show).count() == 6
+    now = datetime.now()
+    for model in (Venue, Artist):
+        for record in db.session.query(model):
+            past = sum(show.start_time < now for show in record.shows)
+            assert (record.past_shows_count, record.upcoming_shows_count) == (
+                past, len(record.shows) - past
+            )
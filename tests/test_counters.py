@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+from conftest import make_artist, make_show, make_venue
+from models import db, Artist, Show, Venue
+
+
+def _counters(model, record_id):
+    return (
+        db.session.query(model.past_shows_count, model.upcoming_shows_count, model.next_show_at)
+        .filter(model.id == record_id)
+        .one()
+    )
+
+
+def test_creating_a_show_updates_both_sides(client):
+    venue, artist = make_venue(), make_artist()
+    starts = (datetime.now() + timedelta(days=2)).replace(microsecond=0)
+    venue_id, artist_id = venue.id, artist.id
+
+    client.post("/shows/create", data={
+        "venue_id": venue_id, "artist_id": artist_id, "start_time": starts.isoformat(" "),
+    })
+    assert _counters(Venue, venue_id) == (0, 1, starts)
+    assert _counters(Artist, artist_id) == (0, 1, starts)
+
+
+def test_deleting_a_show_updates_both_sides(client):
+    venue, artist = make_venue(), make_artist()
+    make_show(venue, artist, datetime.now() - timedelta(days=2))
+    show = make_show(venue, artist, datetime.now() + timedelta(days=2))
+    venue_id, artist_id, show_id = venue.id, artist.id, show.id
+
+    assert client.delete("/shows/{}".format(show_id)).get_json() == {"success": True}
+    assert _counters(Venue, venue_id) == (1, 0, None)
+    assert _counters(Artist, artist_id) == (1, 0, None)
+
+
+def test_deleting_a_venue_with_shows_updates_its_artists(client):
+    venue, other, artist = make_venue(), make_venue(name="Other Hall"), make_artist()
+    make_show(venue, artist, datetime.now() - timedelta(days=2))
+    make_show(venue, artist, datetime.now() + timedelta(days=2))
+    later = make_show(other, artist, datetime.now() + timedelta(days=5))
+    venue_id, artist_id, later_start = venue.id, artist.id, later.start_time
+
+    assert client.delete("/venues/{}".format(venue_id)).get_json() == {"success": True}
+    assert db.session.query(Venue).get(venue_id) is None
+    assert db.session.query(Show).filter(Show.venue_id == venue_id).count() == 0
+    assert _counters(Artist, artist_id) == (0, 1, later_start)
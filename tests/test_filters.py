@@ -0,0 +1,43 @@
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+import filters
+import importer
+from filters import format_datetime
+
+
+@pytest.fixture
+def new_york():
+    """ Run with the server clock in New York. """
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = "America/New_York"
+    time.tzset()
+    filters._format.cache_clear()
+    yield
+    if previous is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = previous
+    time.tzset()
+    filters._format.cache_clear()
+
+
+def test_naive_times_are_server_local(new_york):
+    show = datetime(2026, 1, 1, 20, 0)
+    assert format_datetime(show, "HH:mm") == "20:00"
+    assert format_datetime(show, "HH:mm", timezone="America/New_York") == "20:00"
+    assert format_datetime(show, "HH:mm", timezone="Europe/London") == "01:00"
+
+
+def test_iso_strings():
+    assert format_datetime("2026-01-01T20:00:00", "HH:mm") == "20:00"
+    with pytest.raises(ValueError):
+        format_datetime("Jan 1st 2026", "HH:mm")
+
+
+def test_imported_offsets_become_server_local(new_york):
+    row = {"start_time": "2026-01-02T01:00:00Z"}
+    assert importer._datetime(row, "start_time") == datetime(2026, 1, 1, 20, 0)
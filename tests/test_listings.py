@@ -0,0 +1,27 @@
+from sqlalchemy.exc import OperationalError
+
+import artists
+from catalog import streamed_rows
+from conftest import make_artist
+
+
+def _failing_after_first(rows):
+    rows = iter(rows)
+    yield next(rows)
+    raise OperationalError("SELECT ...", {}, Exception("connection lost"))
+
+
+def test_database_error_ends_streamed_listing_cleanly(client, monkeypatch):
+    make_artist(name="Alpha Band")
+    make_artist(name="Beta Band")
+    monkeypatch.setattr(
+        artists, "streamed_rows", lambda rows: streamed_rows(_failing_after_first(rows))
+    )
+    page = client.get("/artists").get_data(as_text=True)
+    assert "Alpha Band" in page and "Beta Band" not in page
+    assert page.rstrip().endswith("</html>")
+
+    # the cut-short page was not cached
+    monkeypatch.undo()
+    page = client.get("/artists").get_data(as_text=True)
+    assert "Alpha Band" in page and "Beta Band" in page
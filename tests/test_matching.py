@@ -0,0 +1,75 @@
+import random
+
+from matching import (
+    CITY_WEIGHT, GENRE_BITS, GENRE_WEIGHT, HISTORY_SATURATION, HISTORY_WEIGHT, SEEKING_WEIGHT,
+    STATE_WEIGHT, MatchIndex, genre_mask,
+)
+
+GENRES = sorted(GENRE_BITS)
+PLACES = [("CA", "San Francisco"), ("CA", "Oakland"), ("NY", "New York"), ("TX", "Austin")]
+
+
+def _records(rng, count):
+    for candidate_id in range(1, count + 1):
+        state, city = rng.choice(PLACES)
+        yield {
+            "id": candidate_id,
+            "state": state,
+            "city": city,
+            "seeking": rng.random() < 0.5,
+            "genres": rng.sample(GENRES, rng.randint(0, 3)),
+        }
+
+
+def _score(record, mask, state, city, history):
+    """ Score of `record` against the owner, computed from scratch. """
+    candidate_mask = genre_mask(record["genres"])
+    score = 0.0
+    if candidate_mask & mask:
+        shared, either = candidate_mask & mask, candidate_mask | mask
+        score += GENRE_WEIGHT * bin(shared).count("1") / bin(either).count("1")
+    if record["state"] == state and record["city"].lower() == city.lower():
+        score += CITY_WEIGHT
+    elif record["state"] == state:
+        score += STATE_WEIGHT
+    if record["seeking"]:
+        score += SEEKING_WEIGHT
+    if record["id"] in history:
+        played = min(history[record["id"]], HISTORY_SATURATION)
+        score += HISTORY_WEIGHT * played / HISTORY_SATURATION
+    return score
+
+
+def test_rank_matches_brute_force():
+    rng = random.Random(7)
+    records = list(_records(rng, 400))
+    index = MatchIndex()
+    index.build(records)
+    for _ in range(200):
+        state, city = rng.choice(PLACES + [("WA", "Seattle")])
+        mask = genre_mask(rng.sample(GENRES, rng.randint(0, 3)))
+        history = {rng.randint(1, 400): rng.randint(1, 8) for _ in range(rng.randint(0, 3))}
+        limit = rng.choice([1, 5, 20])
+        ranked = index.rank(mask, state, city, history, limit)
+        expected = sorted(
+            (_score(record, mask, state, city, history) for record in records), reverse=True
+        )[:limit]
+        assert [round(score, 9) for score, _, _, _ in ranked] == [
+            round(score, 9) for score in expected
+        ]
+        by_id = {record["id"]: record for record in records}
+        for score, candidate_id, _, _ in ranked:
+            assert abs(score - _score(by_id[candidate_id], mask, state, city, history)) < 1e-9
+
+
+def test_same_state_seeker_outranks_distant_genre_match():
+    index = MatchIndex()
+    index.build([
+        {"id": 1, "state": "CA", "city": "Oakland", "seeking": True, "genres": []},
+        {
+            "id": 2, "state": "NY", "city": "New York", "seeking": False,
+            "genres": ["Jazz", "Folk", "Blues", "Funk"],
+        },
+    ])
+    ranked = index.rank(genre_mask(["Jazz"]), "CA", "San Francisco", {}, 1)
+    assert [candidate_id for _, candidate_id, _, _ in ranked] == [1]
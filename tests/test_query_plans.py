@@ -0,0 +1,31 @@
+from app import create_app
+from check_query_plans import check, fingerprint, record_routes
+from models import db
+from run_benchmarks import seed
+
+
+def test_no_unexpected_sequential_scans(tmp_path):
+    # SQLite plans from the schema's indexes rather than table sizes, so a
+    # small seed exercises the same plans as the full benchmark database.
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(tmp_path / "plans.db"),
+        "SQLALCHEMY_ENGINE_OPTIONS": {},
+        "SQLALCHEMY_BINDS": {},
+        "CACHE_BACKEND": "null",
+        "TEMPLATE_WARM_UP": False,
+        "TEMPLATE_BYTECODE_CACHE_DIR": None,
+        "WTF_CSRF_ENABLED": False,
+        "TESTING": True,
+    })
+    with app.app_context():
+        seed(200, 200, 1000)
+        statements = record_routes(app)
+        failures = check(db.engine, statements)
+        db.session.remove()
+        db.drop_all()
+
+    assert statements
+    assert [
+        "{} scans {} ({}): {}".format(route, table, fingerprint(statement), statement)
+        for route, table, statement in failures
+    ] == []
@@ -0,0 +1,16 @@
+from conftest import make_venue
+from models import Venue
+from search import search
+
+
+def test_fallback_index_rebuilds_when_stale(app):
+    make_venue(name="Park Square Live Music")
+    assert [hit["name"] for hit in search(Venue, "park", 10)] == ["Park Square Live Music"]
+
+    # Written by another worker: this one's index never saw the insert.
+    make_venue(name="Parkside Hall")
+    assert [hit["name"] for hit in search(Venue, "park", 10, max_age=600)] == [
+        "Park Square Live Music"
+    ]
+    names = {hit["name"] for hit in search(Venue, "park", 10, max_age=0)}
+    assert names == {"Park Square Live Music", "Parkside Hall"}
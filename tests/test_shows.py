@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+from conftest import make_artist, make_show, make_venue
+from models import db, Show
+
+
+def _create(client, venue_id, artist_id, start_time, duration_minutes=120):
+    # the flashed outcome is rendered into the returned page
+    return client.post("/shows/create", data={
+        "venue_id": venue_id, "artist_id": artist_id,
+        "start_time": start_time.isoformat(" "), "duration_minutes": duration_minutes,
+    }).get_data(as_text=True)
+
+
+def test_overlapping_shows_are_rejected(client):
+    venue, other_venue = make_venue(), make_venue(name="Other Hall")
+    artist, other_artist = make_artist(), make_artist(name="Other Band")
+    starts = datetime.combine(datetime.now().date() + timedelta(days=7), datetime.min.time())
+    make_show(venue, artist, starts)  # 00:00-02:00
+    venue_id, other_venue_id = venue.id, other_venue.id
+    artist_id, other_artist_id = artist.id, other_artist.id
+
+    # same venue, other artist, starting during the show
+    assert "overlaps" in _create(client, venue_id, other_artist_id, starts + timedelta(hours=1))
+    # same artist at another venue, ending after the show started
+    assert "overlaps" in _create(client, other_venue_id, artist_id, starts - timedelta(hours=1), 90)
+    assert db.session.query(Show).count() == 1
+
+    # back to back is fine
+    assert "Show was successfully listed!" in _create(
+        client, venue_id, other_artist_id, starts + timedelta(hours=2)
+    )
+    assert db.session.query(Show).count() == 2
@@ -0,0 +1,273 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import sys
+from datetime import datetime
+from itertools import groupby
+
+from flask import (
+    Blueprint, current_app, flash, jsonify, redirect, render_template, request, url_for,
+)
+
+from catalog import (
+    autocomplete, detail_version, filter_listing, listing_version, past_shows_limit, reindex,
+    show_partitions, streamed_rows, suggestions, suggestions_limit, unindex, until_next_show,
+    venue_tags,
+)
+from counters import fresh, refresh as refresh_counters
+from extensions import cache
+from forms import VenueForm
+from models import db, Artist, Venue, VenueGenre, Show
+from search import search
+from templating import stream_template
+
+bp = Blueprint("venues", __name__)
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@bp.route('/venues')
+@db.replica_reads
+@cache.conditional(lambda: listing_version(Venue))
+@cache.page(tags=lambda: ["venues", "shows"])
+def venues():
+    # num_shows is the venue's denormalized upcoming_shows_count (counters.py).
+    # One query ordered by area, read through a server-side cursor; rows are
+    # folded into areas while the page streams out, so neither the rows, the
+    # areas nor the page are held at once. A database error mid-stream ends
+    # the listing early (catalog.streamed_rows).
+
+    def _agregate_state_city(rows):
+        """ Take (state, city, id, name, num_upcoming_shows) rows ordered by area,
+        yields: {"state":"","city":"","venues":[...]} """
+
+        for (state, city), area_rows in groupby(rows, key=lambda row: (row.state, row.city)):
+            yield {
+                "city": city,
+                "state": state,
+                "venues": [
+                    {
+                        "id": row.id,
+                        "name": row.name,
+                        "num_upcoming_shows": row.num_upcoming_shows,
+                    }
+                    for row in area_rows
+                ],
+            }
+
+    data = []
+    try:
+        rows = (
+            db.session.query(
+                Venue.state,
+                Venue.city,
+                Venue.id,
+                Venue.name,
+                Venue.upcoming_shows_count.label("num_upcoming_shows"),
+            )
+            .order_by(Venue.state, Venue.city, Venue.name)
+            .yield_per(1000)
+        )
+        data = _agregate_state_city(streamed_rows(rows))
+    except Exception:
+        print(sys.exc_info())
+    return stream_template("pages/venues.html", areas=data)
+
+@bp.route("/venues/search", methods=["POST"])
+@db.replica_reads
+def search_venues():
+    search_term = request.form.get("search_term", "").strip()
+    venues = search(
+        Venue,
+        search_term,
+        current_app.config["SEARCH_RESULT_LIMIT"],
+        max_age=current_app.config["SEARCH_INDEX_MAX_AGE"],
+    )
+    response = {
+        "count": len(venues),
+        "data": venues,
+    }
+    return render_template("pages/search_venues.html", results=response, search_term=search_term)
+
+
+@bp.route('/venues/autocomplete')
+def autocomplete_venues():
+    return autocomplete(Venue)
+
+
+@bp.route('/venues/filter')
+@db.replica_reads
+@cache.conditional(lambda: listing_version(Venue))
+@cache.page(tags=lambda: ["venues"])
+def filter_venues():
+    # e.g. /venues/filter?genre=Jazz&state=CA
+    return filter_listing(Venue, VenueGenre, VenueGenre.venue_id, "pages/filter_venues.html")
+
+
+@bp.route('/venues/<int:venue_id>')
+@db.replica_reads
+@cache.conditional(
+    lambda venue_id: detail_version(Venue, venue_id, Artist, Show.venue_id, Show.artist_id)
+)
+@cache.page(tags=lambda venue_id: ["venue:{}".format(venue_id)])
+def show_venue(venue_id):
+    venue = Venue.query.get_or_404(venue_id)
+    past_limit = past_shows_limit()
+    now = datetime.now()
+    counts = (venue.past_shows_count, venue.upcoming_shows_count) if fresh(venue, now) else None
+    past_shows, upcoming_shows, past_shows_count, upcoming_shows_count = cache.fragment(
+        "venue:{}:shows:{}".format(venue_id, past_limit),
+        ["venue:{}".format(venue_id)],
+        lambda: show_partitions(
+            Show.venue_id, venue_id, Artist, Show.artist_id, "artist", past_limit, counts, now
+        ),
+        until_next_show(now),
+    )
+    return render_template(
+        "pages/show_venue.html",
+        suggestions=suggestions(venue),
+        venue=dict(
+            venue.__dict__,
+            genres=list(venue.genres),
+            past_shows=past_shows,
+            upcoming_shows=upcoming_shows,
+            past_shows_count=past_shows_count,
+            upcoming_shows_count=upcoming_shows_count,
+        ),
+    )
+
+@bp.route('/venues/<int:venue_id>/suggestions')
+@db.replica_reads
+def venue_suggestions(venue_id):
+    # Artists to book, e.g. /venues/3/suggestions?limit=20
+    venue = Venue.query.get_or_404(venue_id)
+    return jsonify({"venue_id": venue_id, "artists": suggestions(venue, suggestions_limit())})
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/create', methods=['GET'])
+def create_venue_form():
+  form = VenueForm()
+  return render_template('forms/new_venue.html', form=form)
+
+
+
+def _hydrate_venue(form):
+    return Venue(
+        name=form.get("name"),
+        city=form.get("city"),
+        state=form.get("state"),
+        address=form.get("address"),
+        phone=form.get("phone"),
+        genres=form.getlist("genres"),
+        image_link=form.get("image_link"),
+        facebook_link=form.get("facebook_link"),
+        website=form.get("website"),
+        seeking_talent=form.get("seeking_talent"),
+        seeking_description=form.get("seeking_description"),
+    )
+
+
+
+@bp.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+  form = VenueForm()
+  if not form.validate():
+        flash(form.errors)
+        return redirect(url_for("venues.create_venue_form"))
+  error = False
+  try:
+    data = request.form
+    venue = _hydrate_venue(data)
+    db.session.add(venue)
+    db.session.commit()
+    reindex(venue)
+    cache.invalidate("venues")
+  except Exception:
+    error = True
+    db.session.rollback()
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+    if error:
+          flash("An error occured. Venue "+ data["name"] + "could not be listed.")
+    else:
+          flash("Venue " + data["name"] + "was successfully listed!")
+  return render_template("pages/home.html")
+
+
+@bp.route("/venues/<int:venue_id>", methods=["DELETE"])
+def delete_venue(venue_id):
+    error = False
+    try:
+        venue = Venue.query.get(venue_id)
+        if venue:
+            tags = venue_tags(venue_id)
+            artist_ids = [
+                artist_id
+                for (artist_id,) in db.session.query(Show.artist_id)
+                .filter(Show.venue_id == venue_id)
+                .distinct()
+            ]
+            Show.query.filter(Show.venue_id == venue_id).delete(synchronize_session=False)
+            db.session.delete(venue)
+            db.session.flush()
+            refresh_counters(Artist, ids=artist_ids)
+            db.session.commit()
+            unindex(Venue, venue_id)
+            cache.invalidate(*tags)
+        else:
+            error = True
+    except Exception:
+        error = True
+        db.session.rollback()
+        print(sys.exc_info())
+    finally:
+        db.session.close()
+        if error:
+            flash("An error occurred. the venue could not be removed.")
+        else:
+            flash("Venue was successfully removed!")
+    return jsonify({"success": not error})
+
+#  Update
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+      venue = Venue.query.get_or_404(venue_id)
+      form = VenueForm(obj=venue)
+      return render_template("forms/edit_venue.html", form=form, venue=venue)
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+    error = False
+    try:
+        data = request.form
+        venue = Venue.query.get(venue_id)
+        venue.name = data.get("name")
+        venue.city = data.get("city")
+        venue.state = data.get("state")
+        venue.address = data.get("address")
+        venue.phone = data.get("phone")
+        venue.genres = data.getlist("genres")
+        venue.image_link = data.get("image_link")
+        # genres live in venue_genres; touch the row for the pages' validators
+        venue.updated_at = datetime.utcnow()
+        tags = venue_tags(venue_id)
+        db.session.commit()
+        reindex(venue)
+        cache.invalidate(*tags)
+    except Exception:
+        error = True
+        db.session.rollback()
+        print(sys.exc_info())
+    finally:
+        db.session.close()
+        if error:
+            flash("An error occurred. Venue " + data["name"] + " could not be updated.")
+        else:
+            flash("Venue " + data["name"] + " was successfully updated!")
+    return redirect(url_for("venues.show_venue", venue_id=venue_id))